@@ -54,6 +54,27 @@ def start_pipeline(model, config=None):
     return model
 
 
-def prepare_ir(model, config=None):
-    model = start_pipeline(model, config=None)
-    return model
+def prepare_ir(model, config=None, cache_dir=None):
+    """Compile the model to the engine graph.
+
+    Args:
+        model: the model path, or the model object of a supported framework.
+        config: reserved.
+        cache_dir (string): the directory caching the compiled IR of the models, the
+                            environment variable ENGINE_IR_CACHE by default. The IR
+                            of an identical model compiled before is loaded from it.
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get('ENGINE_IR_CACHE')
+    if not cache_dir:
+        return start_pipeline(model, config=None)
+
+    from .ir_cache import IRCache
+    cache = IRCache(cache_dir)
+    key = cache.key(model)
+    graph = cache.load(key) if key is not None else None
+    if graph is None:
+        graph = start_pipeline(model, config=None)
+        if key is not None:
+            cache.save(key, graph)
+    return graph
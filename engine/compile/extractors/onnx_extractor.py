@@ -19,8 +19,7 @@
 from neural_compressor.utils import logger
 from ..graph.graph import Graph
 from ..ops.op import OPERATORS
-from ..onnx_utils import graph_node_names_details
-from onnx.numpy_helper import to_array
+from ..onnx_utils import graph_node_names_details, convert_initializers
 from ..graph_utils import names_from_input
 
 
@@ -39,6 +38,7 @@ class ONNXExtractor(object):
     def __call__(self, model):
         # onnx_consts = model.initializer()
         graph_nodes_dict = graph_node_names_details(model)
+        graph_nodes_dict = convert_initializers(graph_nodes_dict)
         logger.info('Start to extarct onnx model ops...')
         new_graph = Graph()
         new_graph.framework = 'onnxruntime'
@@ -69,15 +69,16 @@ class ONNXExtractor(object):
                                         util.names_from_input(input_tensor_name)
                                     if origin_tensor_name in graph_nodes_dict and \
                                         hasattr(graph_nodes_dict[origin_tensor_name], 'node'):
-                                        pre_node = graph_nodes_dict[origin_tensor_name].node
+                                        pre_details = graph_nodes_dict[origin_tensor_name]
+                                        pre_node = pre_details.node
                                         data = None
                                         graph_node = new_graph.get_node_by_name(node.name)
                                         has_tensor = True
                                         for tensor in graph_node.input_tensors:
                                             if origin_tensor_name + ':0' == tensor.name: 
                                                 has_tensor = False
-                                        if pre_node in model.initializer() and has_tensor:
-                                            data = to_array(pre_node)
+                                        if pre_details.data is not None and has_tensor:
+                                            data = pre_details.data
                                             from engine.compile.ops.tensor import Tensor
                                             shape = list(data.shape) if data.shape != () else [1]
                                             dtype = util.get_data_dtype(data)
@@ -19,7 +19,7 @@
 from neural_compressor.utils import logger
 from ..graph.graph import Graph
 from ..ops.op import OPERATORS
-from ..tf_utils import graph_node_names_details
+from ..tf_utils import graph_node_names_details, convert_consts
 from ..graph_utils import names_from_input
 
 
@@ -39,6 +39,7 @@ class TensorflowExtractor(object):
 
         nodes = model.graph_def.node
         graph_nodes_dict = graph_node_names_details(nodes)
+        graph_nodes_dict = convert_consts(graph_nodes_dict)
         logger.info('Start to extarct tensorflow model ops...')
         new_graph = Graph()
         new_graph.framework = 'tensorflow'
@@ -15,6 +15,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import re
 from collections import OrderedDict
 from neural_compressor.utils import logger
@@ -223,11 +224,8 @@ class Graph(object):
 
         return node
 
-    # get the weight_bytes to bin file
-    @property
-    def weight_data(self):
-        consts_info = OrderedDict()
-        weight_bytes = bytearray()
+    # yield the const data in the order of bin file, and set their locations in bin file
+    def _weights(self):
         non_consts_len = 0
         for t in self._nodes[0].output_tensors:
             assert self._nodes[0].op_type=='Input', 'The graph must have input data'
@@ -236,19 +234,30 @@ class Graph(object):
             else:
                 non_consts_len += 1
         self._nodes[0].output_tensors = self._nodes[0].output_tensors[:non_consts_len]
+        start = 0
         for i in range(len(self._nodes)):
             for j in range(len(self._nodes[i].input_tensors)):
                 t = self._nodes[i].input_tensors[j]
                 if t.source_op==[] and isinstance(t.data, np.ndarray):
-                    data = t.data
-                    start = len(weight_bytes)
-                    data_bytes = data.tobytes()
-                    weight_bytes.extend(data_bytes)
-                    offset = len(data_bytes)
-                    self._nodes[i].input_tensors[j].location = [start, offset]
+                    data = np.ascontiguousarray(t.data)
+                    self._nodes[i].input_tensors[j].location = [start, data.nbytes]
+                    start += data.nbytes
                     self._nodes[0].output_tensors.append(self._nodes[i].input_tensors[j])
-        weight_bytes = bytes(weight_bytes)
-        return weight_bytes
+                    yield data
+
+    # get the weight_bytes to bin file
+    @property
+    def weight_data(self):
+        weight_bytes = io.BytesIO()
+        for data in self._weights():
+            weight_bytes.write(data.data)
+        return weight_bytes.getvalue()
+
+    # write the weights to bin file one by one, without holding them all in memory
+    def dump_weight(self, bin_file):
+        with open(bin_file, 'wb') as f:
+            for data in self._weights():
+                f.write(data.data)
 
     # get the network config dict to yaml file
     @property
@@ -460,9 +469,7 @@ class Graph(object):
         yaml_file = os.path.join(output_dir, 'conf.yaml')
 
         # serialize_weight
-        weight_data = self.weight_data
-        with open(bin_file, 'wb') as f:
-            f.write(weight_data)
+        self.dump_weight(bin_file)
 
         # serialize_network
         net_info = self.net_config
@@ -17,6 +17,7 @@
 
 from neural_compressor.utils import logger
 import copy
+import os
 import re
 import numpy as np
 from collections import namedtuple, OrderedDict
@@ -76,6 +77,34 @@ def get_data_dtype(data):
     return dtype
 
 
+def compile_workers():
+    """Get the number of worker threads of the compiler, which can be set by the
+       environment variable ENGINE_COMPILE_WORKERS
+    """
+    workers = os.environ.get('ENGINE_COMPILE_WORKERS')
+    if workers is not None:
+        return max(1, int(workers))
+    return min(32, os.cpu_count() or 1)
+
+
+def parallel_map(func, items, workers=None):
+    """Apply func to the items in a thread pool
+    Args:
+       func (function): the function applied to each item
+       items (list): the items
+       workers (int): the number of threads, compile_workers() by default
+    Returns:
+       results (list): the results in the order of items
+    """
+    items = list(items)
+    workers = compile_workers() if workers is None else workers
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
 def search_straight_pattern(input_pattern, graph):
     """search user specified patterns on internal grpah structure.
     Attention: the input computation chain in the graph which can be called pattern, there must be
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2021 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A content-addressed cache of the compiled intermediate representation.
+
+The IR (conf.yaml and model.bin) is stored under a key hashed from the source model,
+the compiler version and the enabled sub-graph patterns, so compiling an identical
+model again only loads the cached IR. The digest of a source model file is remembered
+together with its size and modification time, so a cache hit does not read the model.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from neural_compressor.utils import logger
+from neural_compressor.version import __version__
+from .graph import Graph
+from .sub_graph.subgraph_matcher import enabled_patterns
+
+
+def _file_stats(path):
+    """Get the (relative path, size, mtime) of the files of a model file or directory."""
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [['', stat.st_size, stat.st_mtime_ns]]
+    stats = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            stats.append([os.path.relpath(file_path, path), stat.st_size, stat.st_mtime_ns])
+    return stats
+
+
+def _hash_files(path, stats, chunk_size=1 << 20):
+    sha = hashlib.sha256()
+    for rel_path, _, _ in stats:
+        sha.update(rel_path.encode('utf-8'))
+        with open(os.path.join(path, rel_path) if rel_path else path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha.update(chunk)
+    return sha.hexdigest()
+
+
+class IRCache(object):
+    """Cache the compiled IR of source models in cache_dir.
+
+    Args:
+        cache_dir (string): the directory of the cached IR.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        os.makedirs(os.path.join(self.cache_dir, 'stamps'), exist_ok=True)
+
+    def source_digest(self, model):
+        """Get the content digest of a model path or a serializable model, None if the
+           model can not be hashed.
+        """
+        if isinstance(model, str):
+            if not os.path.exists(model):
+                return None
+            path = os.path.abspath(model)
+            stats = _file_stats(path)
+            stamp_file = os.path.join(self.cache_dir, 'stamps',
+                                      hashlib.sha1(path.encode('utf-8')).hexdigest() + '.json')
+            try:
+                with open(stamp_file) as f:
+                    stamp = json.load(f)
+                if stamp['path'] == path and stamp['stats'] == stats:
+                    return stamp['digest']
+            except (OSError, ValueError, KeyError):
+                pass
+            digest = _hash_files(path, stats)
+            self._write_json(stamp_file, {'path': path, 'stats': stats, 'digest': digest})
+            return digest
+        if hasattr(model, 'SerializeToString'):
+            return hashlib.sha256(model.SerializeToString()).hexdigest()
+        return None
+
+    def key(self, model):
+        """Get the cache key of a model, None if the model can not be cached."""
+        digest = self.source_digest(model)
+        if digest is None:
+            return None
+        config = {'source': digest, 'version': __version__, 'patterns': enabled_patterns()}
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key):
+        """Load the cached IR of key as a Graph, None if it is not cached."""
+        ir_dir = self.path(key)
+        try:
+            with open(os.path.join(ir_dir, 'meta.json')) as f:
+                meta = json.load(f)
+            valid = meta['key'] == key and \
+                os.path.getsize(os.path.join(ir_dir, 'model.bin')) == meta['bin_size'] and \
+                os.path.getsize(os.path.join(ir_dir, 'conf.yaml')) == meta['yaml_size']
+        except (OSError, ValueError, KeyError):
+            return None
+        if not valid:
+            logger.warning("The cached IR {} is broken, compile the model again.".format(ir_dir))
+            return None
+        graph = Graph()
+        graph.graph_init(os.path.join(ir_dir, 'conf.yaml'), os.path.join(ir_dir, 'model.bin'))
+        logger.info("Load the compiled IR from cache {}.".format(ir_dir))
+        return graph
+
+    def save(self, key, graph):
+        """Save the IR of graph as key. The IR is emitted into a temporary directory
+           and renamed, so a concurrent compile never sees a partial IR.
+        """
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=self.cache_dir)
+        try:
+            graph.save(tmp_dir)
+            self._write_json(os.path.join(tmp_dir, 'meta.json'), {
+                'key': key,
+                'bin_size': os.path.getsize(os.path.join(tmp_dir, 'model.bin')),
+                'yaml_size': os.path.getsize(os.path.join(tmp_dir, 'conf.yaml'))})
+            ir_dir = self.path(key)
+            if os.path.exists(ir_dir):
+                shutil.rmtree(ir_dir, ignore_errors=True)
+            os.rename(tmp_dir, ir_dir)
+        except OSError as e:
+            logger.warning("Failed to cache the compiled IR: {}".format(e))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _write_json(path, content):
+        tmp_path = path + '.tmp{}'.format(os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(content, f)
+        os.replace(tmp_path, path)
@@ -57,7 +57,8 @@ def graph_node_names_details(model):
     Be used for Grpah class with cerating a new graph.
     The node_name is the key, node in value is for getting the Const
     tensor value and the input_tensor source op; output_names in value
-    is the node ouput name list; outputs in value is for output_tensor dest op
+    is the node ouput name list; outputs in value is for output_tensor dest op;
+    data in value is the numpy data of initializer, see convert_initializers
     Args:
         model: neural_compressor ONNXModel
     Returns:
@@ -65,11 +66,11 @@ def graph_node_names_details(model):
 
     """
 
-    node_details = namedtuple('node_details', ['node', 'outputs'])
+    node_details = namedtuple('node_details', ['node', 'outputs', 'data'])
     node_names_details = {}
     for initializer in model.initializer():
         initializer_name = initializer.name
-        each_node = node_details(node=initializer, outputs=[])
+        each_node = node_details(node=initializer, outputs=[], data=None)
         if initializer_name not in node_names_details:
             each_node.outputs.extend(get_initializer_children_names(model, initializer))
             node_names_details[initializer_name] = each_node
@@ -80,7 +81,7 @@ def graph_node_names_details(model):
         for output_name in output_names:
             if output_name not in node_names_details:
                 node_names_details[output_name] = node_name
-        each_node = node_details(node=node, outputs=[])
+        each_node = node_details(node=node, outputs=[], data=None)
         if node_name not in node_names_details:
             each_node.outputs.extend(get_node_children_names(model, node))
             node_names_details[node_name] = each_node
@@ -93,13 +94,32 @@ def graph_node_names_details(model):
                     outputs.append(k)
             except BaseException:
                 continue
-        each_node = node_details(node=graph_input, outputs=outputs)
+        each_node = node_details(node=graph_input, outputs=outputs, data=None)
         # if node_name not in node_names_details:
         node_names_details[node_name] = each_node
 
     return node_names_details
 
 
+def convert_initializers(nodes_dict, workers=None):
+    """Convert the initializers in graph_nodes_dict to numpy data in a thread pool,
+    so that the op extraction does not convert the weights one by one
+    Args:
+        nodes_dict: dict, return value from graph_node_names_details
+        workers: int, the number of threads
+    Returns:
+        nodes_dict: the graph node info dict with initializer data
+    """
+    from onnx import TensorProto
+    from onnx.numpy_helper import to_array
+    names = [name for name, details in nodes_dict.items() if
+             hasattr(details, 'node') and isinstance(details.node, TensorProto)]
+    datas = util.parallel_map(lambda name: to_array(nodes_dict[name].node), names, workers)
+    for name, data in zip(names, datas):
+        nodes_dict[name] = nodes_dict[name]._replace(data=data)
+    return nodes_dict
+
+
 def change_num_name(tensor_name):
     # for number string
     try:
@@ -158,6 +178,7 @@ def onnx_extract_operator(node, model, nodes_dict):
         input_tensors: Tensor list, contains the node input tensors info
         output_tensors: Tensor list, contains the node output tensor info
     """
+    from onnx import TensorProto
     from onnx.numpy_helper import to_array
 
     op_type = node.op_type
@@ -174,13 +195,15 @@ def onnx_extract_operator(node, model, nodes_dict):
     for input_tensor_name in input_tensor_names:
         origin_tensor_name, input_tensor_name = util.names_from_input(input_tensor_name)
         try:
-            pre_node = nodes_dict[nodes_dict[origin_tensor_name]].node
+            pre_details = nodes_dict[nodes_dict[origin_tensor_name]]
         except BaseException:
-            pre_node = nodes_dict[origin_tensor_name].node
-        
+            pre_details = nodes_dict[origin_tensor_name]
+        pre_node = pre_details.node
+
         data = None
-        if pre_node in model.initializer():
-            data = to_array(pre_node)
+        # only the initializers are TensorProto in graph_nodes_dict
+        if isinstance(pre_node, TensorProto):
+            data = pre_details.data if pre_details.data is not None else to_array(pre_node)
         else:
             if (pre_node not in model.graph().input) and (pre_node.op_type == 'Constant'):
                 data = to_array(pre_node.attribute[0].t)
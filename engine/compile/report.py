@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2021 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Report the fusion coverage of the compiled graph.
+
+The report tells which patterns matched, and which nodes are left unfused with their
+estimated share of the FLOPs and of the memory traffic of the model. The estimates
+come from a static shape inference over the compiled graph with the given input
+shapes, so the model does not need to run.
+"""
+
+import json
+from collections import OrderedDict
+import numpy as np
+from neural_compressor.utils import logger
+
+# the operators registered in the executor
+EXECUTOR_OPERATORS = [
+    'BinaryAdd', 'Concat', 'EmbeddingBag', 'Gather', 'Gelu', 'InnerProduct', 'Input',
+    'LayerNorm', 'Matmul', 'Onehot', 'Output', 'PaddingSequence', 'PositionIds', 'Quantize',
+    'ReduceMean', 'Reorder', 'Reshape', 'Softmax', 'Split', 'StridedSlice', 'TokenTypeIds',
+    'Transpose',
+]
+
+DTYPE_BYTES = {'fp32': 4, 's32': 4, 'int32': 4, 'fp16': 2, 'bf16': 2, 's8': 1, 'u8': 1,
+               'int8': 1, 'uint8': 1, 'int64': 8, 'fp64': 8}
+
+# estimated FLOPs per output element of the elementwise and normalization operators
+ELEMENTWISE_FLOPS = {'BinaryAdd': 1, 'Gelu': 8, 'LayerNorm': 8, 'Softmax': 5, 'Quantize': 2}
+
+
+def _attr_list(attr, key):
+    value = attr.get(key) if isinstance(attr, dict) else None
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, np.integer)):
+        return [int(value)]
+    if isinstance(value, str):
+        return [int(i) for i in value.split(',')]
+    return [int(i) for i in value]
+
+
+def _permute(shape, perm):
+    if shape is None or not perm:
+        return shape
+    if len(perm) != len(shape):
+        return None
+    return [shape[i] for i in perm]
+
+
+def _numel(shape):
+    return int(np.prod(shape)) if shape is not None else 0
+
+
+def _known(shape):
+    return shape is not None and all(isinstance(i, (int, np.integer)) and i >= 0 for i in shape)
+
+
+def _reshape(node, shapes):
+    # the same as ReshapeOperator::Reshape of the executor
+    dst_shape = _attr_list(node.attr, 'dst_shape')
+    if dst_shape is None or not _known(shapes[0]):
+        return None
+    dims = _attr_list(node.attr, 'dims') or []
+    if len(shapes) == 2:
+        if not _known(shapes[1]):
+            return None
+        j = 0
+        for i in range(len(dst_shape)):
+            if j >= len(dims):
+                break
+            if dst_shape[i] == -1:
+                dst_shape[i] = shapes[1][dims[j]]
+                j += 1
+    acc, idx = 1, -1
+    for i, dim in enumerate(dst_shape):
+        if dim != -1:
+            acc *= dim
+        else:
+            idx = i
+    if idx != -1:
+        dst_shape[idx] = _numel(shapes[0]) // acc if acc else 0
+    mul = _attr_list(node.attr, 'mul') or []
+    if len(mul) > 1:
+        merged = int(np.prod([dst_shape[i] for i in mul]))
+        dst_shape = [merged if i == mul[0] else dim for i, dim in enumerate(dst_shape)
+                     if i not in mul[1:]]
+    return dst_shape
+
+
+def _inner_product(node, shapes):
+    src0 = _permute(shapes[0], _attr_list(node.attr, 'src0_perm'))
+    src1 = _permute(shapes[1], _attr_list(node.attr, 'src1_perm'))
+    if not _known(src0) or not _known(src1) or len(src0) != 2 or len(src1) != 2:
+        return None
+    return _permute([src0[0], src1[0]], _attr_list(node.attr, 'dst_perm'))
+
+
+def _matmul(node, shapes):
+    src0 = _permute(shapes[0], _attr_list(node.attr, 'src0_perm'))
+    src1 = _permute(shapes[1], _attr_list(node.attr, 'src1_perm'))
+    if not _known(src0) or not _known(src1):
+        return None
+    return _permute(src0[:-1] + src1[-1:], _attr_list(node.attr, 'dst_perm'))
+
+
+def _broadcast(node, shapes):
+    if not all(_known(shape) for shape in shapes):
+        return None
+    try:
+        return list(np.broadcast_shapes(*[tuple(shape) for shape in shapes]))
+    except ValueError:
+        return None
+
+
+def _same_as_input(node, shapes):
+    return shapes[0]
+
+
+SHAPE_RULES = {
+    'InnerProduct': _inner_product,
+    'Matmul': _matmul,
+    'Reshape': _reshape,
+    'Reorder': lambda node, shapes: _permute(shapes[0], _attr_list(node.attr, 'dst_perm')),
+    'BinaryAdd': _broadcast,
+    'Gelu': _same_as_input,
+    'LayerNorm': _same_as_input,
+    'Softmax': _same_as_input,
+    'Quantize': _same_as_input,
+}
+
+
+def infer_shapes(graph, input_shapes=None):
+    """Infer the tensor shapes of the compiled graph statically.
+
+    Args:
+        graph (Graph): the compiled graph.
+        input_shapes (list): the shapes of the model inputs, in the order of the non-const
+                             outputs of the Input node. The configured shapes are used
+                             by default, which may contain unknown dimensions (-1).
+    Returns:
+        shapes (dict): the inferred shape of each tensor name, None if it is unknown.
+    """
+    shapes = {}
+    input_idx = 0
+    for node in graph.nodes:
+        for tensor in node.input_tensors + node.output_tensors:
+            if not tensor.source_op and isinstance(tensor.data, np.ndarray):
+                shapes[tensor.name] = list(tensor.data.shape) if tensor.data.shape != () \
+                    else [1]
+        if node.op_type == 'Input':
+            for tensor in node.output_tensors:
+                if tensor.name in shapes:
+                    continue
+                if input_shapes is not None and input_idx < len(input_shapes):
+                    shapes[tensor.name] = list(input_shapes[input_idx])
+                else:
+                    shapes[tensor.name] = list(tensor.shape) if tensor.shape else None
+                input_idx += 1
+            continue
+        rule = SHAPE_RULES.get(node.op_type)
+        in_shapes = [shapes.get(tensor.name) for tensor in node.input_tensors]
+        out_shape = None
+        if rule is not None and in_shapes and in_shapes[0] is not None:
+            try:
+                out_shape = rule(node, in_shapes)
+            except (IndexError, ValueError, TypeError):
+                out_shape = None
+        for idx, tensor in enumerate(node.output_tensors):
+            shapes.setdefault(tensor.name, out_shape if idx == 0 else None)
+    return shapes
+
+
+def _tensor_bytes(tensor, shape):
+    if isinstance(tensor.data, np.ndarray):
+        return int(tensor.data.nbytes)
+    return _numel(shape) * DTYPE_BYTES.get(tensor.dtype, 4) if _known(shape) else 0
+
+
+def estimate_cost(node, shapes):
+    """Estimate the FLOPs and the bytes read and written by a node.
+
+    Returns:
+        (flops, bytes, known): known is False if some shapes are not inferred.
+    """
+    in_shapes = [shapes.get(tensor.name) for tensor in node.input_tensors]
+    out_shapes = [shapes.get(tensor.name) for tensor in node.output_tensors]
+    known = all(_known(shape) for shape in in_shapes + out_shapes)
+    nbytes = sum(_tensor_bytes(t, s) for t, s in zip(node.input_tensors, in_shapes)) + \
+        sum(_tensor_bytes(t, s) for t, s in zip(node.output_tensors, out_shapes))
+    flops = 0
+    out = out_shapes[0] if out_shapes and _known(out_shapes[0]) else None
+    if out is not None:
+        if node.op_type == 'InnerProduct' and _known(in_shapes[0]):
+            src0 = _permute(in_shapes[0], _attr_list(node.attr, 'src0_perm'))
+            # the bias and the appended op are one flop per output element each
+            post_ops = int(len(node.input_tensors) > 2 and node.input_tensors[2].data is not
+                           None) + int(bool(node.attr and node.attr.get('append_op')))
+            flops = 2 * _numel(out) * src0[-1] + _numel(out) * post_ops
+        elif node.op_type == 'Matmul' and _known(in_shapes[0]):
+            src0 = _permute(in_shapes[0], _attr_list(node.attr, 'src0_perm'))
+            flops = 2 * _numel(out) * src0[-1]
+        elif node.op_type in ELEMENTWISE_FLOPS:
+            flops = ELEMENTWISE_FLOPS[node.op_type] * _numel(out)
+        elif node.op_type not in ['Reshape', 'Reorder', 'Transpose', 'Input', 'Output']:
+            flops = _numel(out)
+    return flops, nbytes, known
+
+
+def coverage_report(graph, matcher=None, input_shapes=None):
+    """Make the fusion coverage report of a compiled graph.
+
+    Args:
+        graph (Graph): the compiled graph.
+        matcher (SubGraphMatcher): the matcher which compiled the graph, for the pattern
+                                   statistics and the fused nodes.
+        input_shapes (list): the shapes of the model inputs, see infer_shapes.
+    Returns:
+        report (dict): the matched patterns, and the FLOPs and bytes of each op type and
+                       of each unfused node, sorted by FLOPs.
+    """
+    shapes = infer_shapes(graph, input_shapes)
+    fused_nodes = matcher.fused_nodes if matcher is not None else set()
+    nodes = []
+    for node in graph.nodes:
+        if node.op_type in ['Input', 'Output']:
+            continue
+        flops, nbytes, known = estimate_cost(node, shapes)
+        nodes.append(OrderedDict([
+            ('name', node.name), ('op_type', node.op_type),
+            ('fused', node.name in fused_nodes),
+            ('supported', node.op_type in EXECUTOR_OPERATORS),
+            ('output_shapes', [shapes.get(t.name) for t in node.output_tensors]),
+            ('flops', flops), ('bytes', nbytes), ('shape_known', known)]))
+    total_flops = sum(node['flops'] for node in nodes)
+    total_bytes = sum(node['bytes'] for node in nodes)
+    for node in nodes:
+        node['flops_share'] = node['flops'] / total_flops if total_flops else 0.
+        node['bytes_share'] = node['bytes'] / total_bytes if total_bytes else 0.
+
+    op_types = OrderedDict()
+    for node in nodes:
+        stats = op_types.setdefault(node['op_type'], OrderedDict([
+            ('count', 0), ('fused', 0), ('supported', node['supported']),
+            ('flops', 0), ('bytes', 0), ('flops_share', 0.), ('bytes_share', 0.)]))
+        stats['count'] += 1
+        stats['fused'] += int(node['fused'])
+        for key in ['flops', 'bytes', 'flops_share', 'bytes_share']:
+            stats[key] += node[key]
+
+    unfused = sorted([node for node in nodes if not node['fused']],
+                     key=lambda node: (node['flops'], node['bytes']), reverse=True)
+    report = OrderedDict()
+    report['patterns'] = matcher.pattern_stats if matcher is not None else OrderedDict()
+    report['total_flops'] = total_flops
+    report['total_bytes'] = total_bytes
+    report['unknown_shape_nodes'] = sum(1 for node in nodes if not node['shape_known'])
+    report['op_types'] = OrderedDict(sorted(op_types.items(),
+                                            key=lambda item: item[1]['flops'], reverse=True))
+    report['unfused'] = unfused
+    return report
+
+
+def fusion_report(model, input_shapes=None, output_file=None, top=10):
+    """Compile the model and report the fusion coverage.
+
+       example:
+            from engine.compile.report import fusion_report
+            report = fusion_report('/path/to/bert.onnx', input_shapes=[[1, 128]] * 3,
+                                   output_file='fusion_report.json')
+
+    Args:
+        model: the model path, or the model object of a supported framework.
+        input_shapes (list): the shapes of the model inputs, see infer_shapes.
+        output_file (string): dump the report as json if given.
+        top (int): the number of the most expensive unfused nodes to log.
+    Returns:
+        (report, graph): the report, see coverage_report, and the compiled graph.
+    """
+    from .loaders.loader import Loader
+    from .extractors.extractor import Extractor
+    from .sub_graph.subgraph_matcher import SubGraphMatcher
+    matcher = SubGraphMatcher()
+    graph = matcher(Extractor()(Loader()(model)))
+    report = coverage_report(graph, matcher, input_shapes)
+    log_report(report, top)
+    if output_file is not None:
+        with open(output_file, 'w') as f:
+            json.dump(report, f, indent=2, default=int)
+    return report, graph
+
+
+def log_report(report, top=10):
+    matched = ', '.join('{}({})'.format(name, stats['created']) for name, stats in
+                        report['patterns'].items() if stats['created'])
+    logger.info("Matched patterns: {}".format(matched or 'none'))
+    unfused = report['unfused']
+    logger.info("{} nodes are not fused by any pattern, {:.1%} of FLOPs and {:.1%} of "
+                "bytes.".format(len(unfused), sum(node['flops_share'] for node in unfused),
+                                sum(node['bytes_share'] for node in unfused)))
+    for node in unfused[:top]:
+        logger.info("  {} ({}{}): {:.1%} FLOPs, {:.1%} bytes".format(
+            node['name'], node['op_type'], '' if node['supported'] else ', unsupported',
+            node['flops_share'], node['bytes_share']))
+    if report['unknown_shape_nodes']:
+        logger.info("The shapes of {} nodes are not inferred, pass input_shapes to "
+                    "estimate them.".format(report['unknown_shape_nodes']))
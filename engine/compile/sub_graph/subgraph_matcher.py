@@ -15,6 +15,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import OrderedDict
 from .pattern import supported_patterns, PATTERNS
 from neural_compressor.utils import logger
 
@@ -48,23 +49,42 @@ EXECUTOR_TYPE = {
 }
 
 
+PATTERNS_SWITCH = {
+    'LayerNorm': True,
+    'TransposeBatchMatMul': True,
+    'MatMulWithBiasGelu': True,
+    'MatMulWithBiasAdd': True,
+    'MatMulWithBiasTanh': True,
+}
+
+
+def enabled_patterns():
+    """Get the names of the patterns applied by SubGraphMatcher, in the applied order."""
+    return [pattern for pattern in supported_patterns if pattern in PATTERNS and
+            PATTERNS_SWITCH.get(pattern, True)]
+
+
 class SubGraphMatcher(object):
+    """Apply the enabled patterns to the graph.
+
+       pattern_stats records the nodes created and removed by each pattern, and
+       fused_nodes the names of the nodes created by any pattern.
+    """
+    def __init__(self):
+        self.pattern_stats = OrderedDict()
+        self.fused_nodes = set()
+
     def __call__(self, model):
-        patterns_switch = {
-            'LayerNorm': True,
-            'TransposeBatchMatMul': True,
-            'MatMulWithBiasGelu': True,
-            'MatMulWithBiasAdd': True,
-            'MatMulWithBiasTanh': True,
-        }
         logger.info('Start to implement Sub-Graph matching and replacing...')
-        for pattern in supported_patterns:
-            if pattern in PATTERNS:
-                if pattern in patterns_switch.keys() and not patterns_switch[pattern]:
-                    continue
-                else:
-                    p_fusion = PATTERNS[pattern]()
-                    model = p_fusion(model)
+        for pattern in enabled_patterns():
+            before = set((node.name, node.op_type) for node in model.nodes)
+            p_fusion = PATTERNS[pattern]()
+            model = p_fusion(model)
+            after = set((node.name, node.op_type) for node in model.nodes)
+            created = after - before
+            self.pattern_stats[pattern] = {'created': len(created),
+                                           'removed': len(before - after)}
+            self.fused_nodes.update(name for name, _ in created)
 
         rm_node_names = []
         rm_op_type = ['Identity']
@@ -48,7 +48,8 @@ def graph_node_names_details(nodes):
     Be used for Grpah class with cerating a new graph.
     The node_name is the key, node in value is for getting the Const
     tensor value and the input_tensor source op; outputs in value is for
-    output_tensor dest op.
+    output_tensor dest op; data in value is the numpy data of Const node, see
+    convert_consts.
     Args:
         nodes (tendorflow graph_def.node): NodeDef list
     Returns:
@@ -58,11 +59,11 @@ def graph_node_names_details(nodes):
     # nodes = model.graph_def.node
     # some node may have several output edges
     # use tensor represents edge in graph
-    node_details = namedtuple('node_details', ['node', 'outputs'])
+    node_details = namedtuple('node_details', ['node', 'outputs', 'data'])
     node_names_details = {}
     for node in nodes:
         node_name = node.name
-        each_node = node_details(node=node, outputs=[])
+        each_node = node_details(node=node, outputs=[], data=None)
         if node_name not in node_names_details:
             node_names_details[node_name] = each_node
     for name, details in node_names_details.items():
@@ -78,6 +79,25 @@ def graph_node_names_details(nodes):
     return node_names_details
 
 
+def convert_consts(nodes_dict, workers=None):
+    """Convert the Const nodes in graph_nodes_dict to numpy data in a thread pool,
+    so that the op extraction does not convert the weights one by one
+    Args:
+        nodes_dict: dict, return value from graph_node_names_details
+        workers: int, the number of threads
+    Returns:
+        nodes_dict: the graph node info dict with Const data
+    """
+    from tensorflow.python.framework import tensor_util
+    names = [name for name, details in nodes_dict.items() if details.node.op == 'Const']
+    datas = util.parallel_map(
+        lambda name: tensor_util.MakeNdarray(nodes_dict[name].node.attr['value'].tensor),
+        names, workers)
+    for name, data in zip(names, datas):
+        nodes_dict[name] = nodes_dict[name]._replace(data=data)
+    return nodes_dict
+
+
 def get_tensor_dest_op(node_name, tensor_name, nodes_dict):
     """get the tensor dest op name
        Args:
@@ -133,9 +153,12 @@ def tf_extract_operator(node, model, nodes_dict):
     input_tensor_names = input_names
     for input_tensor_name in input_tensor_names:
         input_node_name, input_tensor_name = util.names_from_input(input_tensor_name)
-        pre_node = nodes_dict[input_node_name].node
+        pre_details = nodes_dict[input_node_name]
+        pre_node = pre_details.node
         if pre_node.op == 'Const':
-            data = tensor_util.MakeNdarray(pre_node.attr['value'].tensor)
+            data = pre_details.data
+            if data is None:
+                data = tensor_util.MakeNdarray(pre_node.attr['value'].tensor)
             dtype = util.get_data_dtype(data)
             shape = list(data.shape) if data.shape != () else [1]
             input_tensor = Tensor(name=input_tensor_name,
@@ -21,8 +21,10 @@
 #include <map>
 #include <memory>
 #include <mutex>  // NOLINT
+#include <set>
 #include <cstdlib>
 #include "i_malloc.hpp"
+#include "memory_plan.hpp"
 
 namespace executor {
 using std::vector;
@@ -38,10 +40,42 @@ class MemoryAllocator {
   typedef std::map<std::thread::id, MemoryBuffer*> TreadMemory;
   typedef std::map<std::thread::id, BufferName*> TreadName;
 
+  // counters of the buffer activities of current thread, which are read by the profiler
+  struct Statistics {
+    size_t alloc_count = 0;
+    size_t alloc_bytes = 0;
+    size_t reuse_count = 0;
+  };
+
+  static Statistics& Stats() {
+    static thread_local Statistics stats;
+    return stats;
+  }
+
+  static void CountAlloc(size_t size) {
+    Statistics& stats = Stats();
+    stats.alloc_count++;
+    stats.alloc_bytes += size;
+  }
+
+  // guard the maps from thread id to the buffers of each thread, as model streams
+  // can run concurrently on different threads
+  static std::mutex& ThreadMutex() {
+    static std::mutex mutex;
+    return mutex;
+  }
+
+  // the unified buffer memory pool is shared by all the threads
+  static std::mutex& UnifiedMutex() {
+    static std::mutex mutex;
+    return mutex;
+  }
+
   static MemoryBuffer& Buffer() {
     static TreadMemory t_memory;
     // (TODO) it's not good for each thread to obtain a MemoryBuffer
     std::thread::id id = std::this_thread::get_id();
+    std::lock_guard<std::mutex> lock(ThreadMutex());
     if (t_memory.count(id) == 0) {
       t_memory[id] = new MemoryBuffer();
     }
@@ -52,6 +86,7 @@ class MemoryAllocator {
     static TreadName t_name;
     // (TODO) it's not good for each thread to obtain a MemoryBuffer
     std::thread::id id = std::this_thread::get_id();
+    std::lock_guard<std::mutex> lock(ThreadMutex());
     if (t_name.count(id) == 0) {
       t_name[id] = new BufferName();
     }
@@ -98,24 +133,89 @@ class MemoryAllocator {
   static StrategyList& Strategy() {
     static StrategyList* m_strategy_ = new StrategyList({{"cycle_buffer", false},
                                                          {"direct_buffer", false},
-                                                         {"unified_buffer", false}});
+                                                         {"unified_buffer", false},
+                                                         {"static_buffer", false}});
     return *m_strategy_;
   }
 
   static void InitStrategy() {
     string memory_strategy = getenv("UNIFIED_BUFFER") != NULL ? "unified_buffer" : 
-                             (getenv("DIRECT_BUFFER") == NULL ? "cycle_buffer" : "direct_buffer");
+                             (getenv("DIRECT_BUFFER") != NULL ? "direct_buffer" :
+                             (getenv("STATIC_BUFFER") != NULL ? "static_buffer" : "cycle_buffer"));
     SetStrategy(memory_strategy);
   }
 
   static void SetStrategy(const string strategy) {
-    CHECK(strategy == "cycle_buffer" || strategy == "direct_buffer" || strategy == "unified_buffer") <<
-      "only support memory strategy cycle buffer, direct buffer and unified buffer";
+    CHECK(strategy == "cycle_buffer" || strategy == "direct_buffer" ||
+          strategy == "unified_buffer" || strategy == "static_buffer") <<
+      "only support memory strategy cycle buffer, direct buffer, unified buffer and static buffer";
     StrategyList& strategy_list = Strategy();
     strategy_list[strategy] = true;
     LOG(INFO) << "strategy list set success " << strategy;
   }
 
+  // the memory plan of the model running Forward in current thread
+  static MemoryPlan*& CurrentPlan() {
+    static thread_local MemoryPlan* plan = nullptr;
+    return plan;
+  }
+
+  // static buffer strategy: the first Forward of new input shapes records the buffer
+  // liveness with cycle buffers, the following Forwards use the planned arena
+  static void BeginPlan(MemoryPlan* plan, const vector<vector<int64_t> >& shapes) {
+    if (!Strategy()["static_buffer"]) return;
+    CurrentPlan() = plan;
+    plan->Begin(shapes);
+  }
+
+  static void EndPlan() {
+    MemoryPlan* plan = CurrentPlan();
+    if (plan == nullptr) return;
+    CurrentPlan() = nullptr;
+    MemoryBuffer& memory_buffer = Buffer();
+    bool recording = plan->state() == MemoryPlan::kRecording;
+    vector<void*> alive_buffers;
+    for (auto iter = memory_buffer.begin(); iter != memory_buffer.end(); ++iter) {
+      if (iter->second[0] != 0) alive_buffers.push_back(iter->first);
+    }
+    plan->End(alive_buffers);
+    // the arena buffers are only registered during a Forward
+    for (auto iter = memory_buffer.begin(); iter != memory_buffer.end();) {
+      if (iter->second.size() > 2) {
+        iter = memory_buffer.erase(iter);
+      } else {
+        ++iter;
+      }
+    }
+    // the cycle buffers used by the recording are not needed any more
+    if (recording && plan->state() == MemoryPlan::kPlanned) {
+      std::set<void*> recorded(plan->recorded_buffers().begin(),
+                               plan->recorded_buffers().end());
+      for (auto data : recorded) {
+        auto iter = memory_buffer.find(data);
+        if (iter != memory_buffer.end() && iter->second[0] == 0) {
+          free(data);
+          memory_buffer.erase(iter);
+        }
+      }
+    }
+  }
+
+  static void* StaticBufferGetMemory(size_t size, const int life_count) {
+    MemoryPlan* plan = CurrentPlan();
+    if (plan->state() == MemoryPlan::kPlanned) {
+      void* buf = plan->Next(size);
+      if (buf != nullptr) {
+        // the third value marks an arena buffer, which is never freed or cycled
+        Buffer()[buf] = vector<size_t>({static_cast<size_t>(life_count), size, 1});
+        return buf;
+      }
+    }
+    void* buf = CycleBufferGetMemory(size, life_count);
+    if (plan->state() == MemoryPlan::kRecording) plan->RecordRequest(buf, size);
+    return buf;
+  }
+
   static int CheckMemory(void* data) {
     MemoryBuffer& memory_buffer = Buffer();
     auto iter = memory_buffer.find(data);
@@ -134,6 +234,7 @@ class MemoryAllocator {
     auto iter = memory_buffer.find(data);
     if (iter != memory_buffer.end()) {
       iter->second[0] = life_count;
+      if (life_count == 0 && CurrentPlan() != nullptr) CurrentPlan()->RecordRelease(data);
     } else {
       LOG(WARNING) << "reset a not existing memory pointer...";
     }
@@ -154,6 +255,7 @@ class MemoryAllocator {
         (iter->second[0])--;
         status = iter->second[0];
       }
+      if (status == 0 && CurrentPlan() != nullptr) CurrentPlan()->RecordRelease(data);
       if (status == 0 && inplace == false) {
         if (strategy_list["direct_buffer"]) {
           auto free_ptr = iter->first;
@@ -161,7 +263,10 @@ class MemoryAllocator {
           memory_buffer.erase(free_ptr);
         } else if (strategy_list["unified_buffer"]) {
           auto free_ptr = iter->first;
-          i_free(free_ptr);
+          {
+            std::lock_guard<std::mutex> lock(UnifiedMutex());
+            i_free(free_ptr);
+          }
           memory_buffer.erase(free_ptr);
         }
       }
@@ -182,9 +287,11 @@ class MemoryAllocator {
       return nullptr;
     }
     StrategyList& strategy_list = Strategy();
-    if (strategy_list["direct_buffer"]) {
+    if (strategy_list["static_buffer"] && CurrentPlan() != nullptr) {
+      return StaticBufferGetMemory(size, life_count);
+    } else if (strategy_list["direct_buffer"]) {
       return DirectBufferGetMemory(size, life_count);
-    } else if (strategy_list["cycle_buffer"]) {
+    } else if (strategy_list["cycle_buffer"] || strategy_list["static_buffer"]) {
       return CycleBufferGetMemory(size, life_count);
     } else if (strategy_list["unified_buffer"]) {
       return UnifiedBufferGetMemory(size, life_count);
@@ -199,6 +306,8 @@ class MemoryAllocator {
     for (auto iter = memory_buffer.begin(); iter != memory_buffer.end(); ++iter) {
       auto buffer_count = iter->second[0];
       auto buffer_size = iter->second[1];
+      // skip the arena buffers of static buffer strategy
+      if (iter->second.size() > 2) continue;
       if (buffer_count == 0) {
         if (size > buffer_size) {
           auto free_ptr = iter->first;
@@ -206,17 +315,20 @@ class MemoryAllocator {
           memory_buffer.erase(free_ptr);
           // allocate new buffer
           void* buf = reinterpret_cast<void*>(malloc(size));
+          CountAlloc(size);
           memory_buffer.insert({buf, vector<size_t>({static_cast<size_t>(life_count), size})});
           return buf;
         } else {
           memory_buffer[iter->first] = vector<size_t>(
             {static_cast<size_t>(life_count), buffer_size});
+          Stats().reuse_count++;
           return iter->first;
         }
       }
     }
     // allocate new buffer
     void* buf = reinterpret_cast<void*>(malloc(size));
+    CountAlloc(size);
     memory_buffer.insert({buf, vector<size_t>({static_cast<size_t>(life_count), size})});
     return buf;
   }
@@ -225,6 +337,7 @@ class MemoryAllocator {
     MemoryBuffer& memory_buffer = Buffer();
     LOG(INFO) << "direct buffer tensor size is " << memory_buffer.size();
     void* buf = reinterpret_cast<void*>(malloc(size));
+    CountAlloc(size);
     memory_buffer.insert({buf, vector<size_t>({static_cast<size_t>(life_count), size})});
     return buf;
   }
@@ -232,7 +345,12 @@ class MemoryAllocator {
   static void* UnifiedBufferGetMemory(size_t size, const int life_count) {
     MemoryBuffer& memory_buffer = Buffer(); 
     LOG(INFO) << "unified buffer tensor size is " << memory_buffer.size();
-    void* buf = (void*) i_malloc(size);
+    void* buf = nullptr;
+    {
+      std::lock_guard<std::mutex> lock(UnifiedMutex());
+      buf = (void*) i_malloc(size);
+    }
+    CountAlloc(size);
     memory_buffer.insert({buf, vector<size_t>({static_cast<size_t>(life_count), size})});
     return buf;
   }
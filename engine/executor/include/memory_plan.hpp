@@ -0,0 +1,218 @@
+//  Copyright (c) 2022 Intel Corporation
+//
+//  Licensed under the Apache License, Version 2.0 (the "License");
+//  you may not use this file except in compliance with the License.
+//  You may obtain a copy of the License at
+//
+//    http://www.apache.org/licenses/LICENSE-2.0
+//
+//  Unless required by applicable law or agreed to in writing, software
+//  distributed under the License is distributed on an "AS IS" BASIS,
+//  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//  See the License for the specific language governing permissions and
+//  limitations under the License.
+
+#ifndef DEEP_ENGINE_EXECUTOR_INCLUDE_MEMORY_PLAN_HPP_
+#define DEEP_ENGINE_EXECUTOR_INCLUDE_MEMORY_PLAN_HPP_
+
+#include <algorithm>
+#include <cstdlib>
+#include <map>
+#include <vector>
+#include "glog/logging.h"
+#include "primitive_cache.hpp"
+
+namespace executor {
+using std::vector;
+using std::map;
+
+/**
+ * @brief A static activation arena planned from the buffer liveness of a Forward.
+ *
+ * The operators decide the inplace buffer reuse at runtime from the buffer life
+ * counts, so the liveness is collected by recording a Forward: every buffer request
+ * opens an interval, which is closed by the last time its life count drops to 0.
+ * As the requests of a Forward are deterministic for the same input shapes, the
+ * following Forward%s get the k-th request served at the planned offset of one
+ * arena, without allocation or scanning of the buffers.
+ *
+ * The plans are kept in a least recently used cache keyed by the input shapes, so
+ * inputs alternating between a few shapes (e.g. the seq_buckets of a server) record
+ * each shape once. All the plans share one arena of the largest planned size. The
+ * capacity is the one of PrimitiveCache, set by ENGINE_PRIMITIVE_CACHE_CAPACITY.
+ */
+class MemoryPlan {
+ public:
+  enum State { kEmpty, kRecording, kPlanned, kInvalid };
+  static const size_t kAlignment = 64;
+
+  MemoryPlan() {}
+  MemoryPlan(const MemoryPlan&) = delete;
+  MemoryPlan& operator=(const MemoryPlan&) = delete;
+  ~MemoryPlan() { free(arena_); }
+
+  inline State state() const { return state_; }
+  inline size_t arena_size() const { return state_ == kPlanned ? plan_->arena_size : 0; }
+  inline const vector<vector<int64_t> >& shapes() const { return shapes_; }
+
+  // start a Forward with the input shapes, return whether the requests are planned
+  bool Begin(const vector<vector<int64_t> >& shapes) {
+    request_id_ = 0;
+    shapes_ = shapes;
+    plan_ = plans_.Find(Key(shapes));
+    if (plan_ != nullptr) {
+      state_ = plan_->valid ? kPlanned : kInvalid;
+      return state_ == kPlanned;
+    }
+    // a new shape, record the requests
+    state_ = kRecording;
+    sizes_.clear();
+    starts_.clear();
+    ends_.clear();
+    live_ids_.clear();
+    recorded_.clear();
+    time_ = 0;
+    return false;
+  }
+
+  // the planned buffer of next request, nullptr if the request mismatches the plan
+  void* Next(size_t size) {
+    if (request_id_ >= plan_->sizes.size() || plan_->sizes[request_id_] != size) {
+      LOG(WARNING) << "buffer request mismatches the memory plan, disable it for the shapes";
+      Invalidate();
+      return nullptr;
+    }
+    return reinterpret_cast<char*>(arena_) + plan_->offsets[request_id_++];
+  }
+
+  void RecordRequest(void* data, size_t size) {
+    live_ids_[data] = sizes_.size();
+    sizes_.push_back(size);
+    starts_.push_back(time_++);
+    ends_.push_back(-1);
+    recorded_.push_back(data);
+  }
+
+  // the life count of a buffer drops to 0
+  void RecordRelease(void* data) {
+    auto iter = live_ids_.find(data);
+    if (iter != live_ids_.end()) ends_[iter->second] = time_++;
+  }
+
+  // finish a Forward, plan the arena if it is a recording Forward. alive_buffers are
+  // the buffers whose life count is not 0 yet, which can not be planned.
+  void End(const vector<void*>& alive_buffers) {
+    if (state_ == kPlanned && request_id_ != plan_->sizes.size()) {
+      LOG(WARNING) << "buffer requests are less than the memory plan, disable it for the shapes";
+      Invalidate();
+    }
+    if (state_ != kRecording) return;
+    for (auto data : alive_buffers) {
+      if (live_ids_.count(data)) {
+        LOG(WARNING) << "activation buffer is still alive after forward, skip memory plan";
+        plan_ = &plans_.Insert(Key(shapes_), Layout());
+        state_ = kInvalid;
+        return;
+      }
+    }
+    plan_ = &plans_.Insert(Key(shapes_), Plan());
+    state_ = kPlanned;
+  }
+
+  // buffers requested by the recording Forward, which can be freed once planned
+  inline const vector<void*>& recorded_buffers() const { return recorded_; }
+
+ private:
+  // the planned offset and size of each request
+  struct Layout {
+    bool valid = false;
+    vector<size_t> sizes;
+    vector<size_t> offsets;
+    size_t arena_size = 0;
+  };
+
+  // the shapes flattened as the rank and the dims of each input
+  static PrimitiveCache<Layout>::Key Key(const vector<vector<int64_t> >& shapes) {
+    PrimitiveCache<Layout>::Key key;
+    for (auto& shape : shapes) {
+      key.push_back(shape.size());
+      key.insert(key.end(), shape.begin(), shape.end());
+    }
+    return key;
+  }
+
+  // the following Forward%s of the shapes fall back to the cycle buffers
+  void Invalidate() {
+    plan_->valid = false;
+    state_ = kInvalid;
+  }
+
+  // greedy by size: place the larger buffers first at the lowest offset which does
+  // not overlap any placed buffer alive at the same time
+  Layout Plan() {
+    size_t num = sizes_.size();
+    for (size_t i = 0; i < num; ++i) {
+      if (ends_[i] < 0) ends_[i] = time_;
+    }
+    vector<size_t> order(num);
+    for (size_t i = 0; i < num; ++i) order[i] = i;
+    std::stable_sort(order.begin(), order.end(),
+      [this](size_t a, size_t b) { return sizes_[a] > sizes_[b]; });
+    vector<size_t> offsets(num, 0);
+    vector<size_t> placed;
+    size_t total = 0;
+    for (auto id : order) {
+      size_t size = (sizes_[id] + kAlignment - 1) / kAlignment * kAlignment;
+      // the address ranges of the placed buffers alive at the same time
+      vector<std::pair<size_t, size_t> > ranges;
+      for (auto other : placed) {
+        if (starts_[other] <= ends_[id] && starts_[id] <= ends_[other]) {
+          size_t other_size = (sizes_[other] + kAlignment - 1) / kAlignment * kAlignment;
+          ranges.push_back({offsets[other], offsets[other] + other_size});
+        }
+      }
+      std::sort(ranges.begin(), ranges.end());
+      size_t offset = 0;
+      for (auto& range : ranges) {
+        if (offset + size <= range.first) break;
+        offset = std::max(offset, range.second);
+      }
+      offsets[id] = offset;
+      total = std::max(total, offset + size);
+      placed.push_back(id);
+    }
+    // no arena buffer is alive between Forward%s, so the arena grows in place
+    if (total > capacity_) {
+      free(arena_);
+      arena_ = aligned_alloc(kAlignment, total);
+      capacity_ = total;
+    }
+    LOG(INFO) << "memory plan has " << num << " buffers in an arena of " << total << " bytes";
+    Layout layout;
+    layout.valid = true;
+    layout.sizes = sizes_;
+    layout.offsets = offsets;
+    layout.arena_size = total;
+    return layout;
+  }
+
+  State state_ = kEmpty;
+  vector<vector<int64_t> > shapes_;
+  PrimitiveCache<Layout> plans_;
+  // the plan of current Forward, nullptr while recording
+  Layout* plan_ = nullptr;
+  // the size, first request time and last release time of each recorded request
+  vector<size_t> sizes_;
+  vector<int64_t> starts_;
+  vector<int64_t> ends_;
+  map<void*, size_t> live_ids_;
+  vector<void*> recorded_;
+  int64_t time_ = 0;
+  size_t request_id_ = 0;
+  void* arena_ = nullptr;
+  size_t capacity_ = 0;
+};
+
+}  // namespace executor
+
+#endif  // DEEP_ENGINE_EXECUTOR_INCLUDE_MEMORY_PLAN_HPP_
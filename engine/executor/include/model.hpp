@@ -20,6 +20,7 @@
 #include <memory>
 #include <map>
 #include <set>
+#include <stdexcept>
 #include <string>
 #include <utility>
 #include <vector>
@@ -29,6 +30,8 @@
 #include "operator.hpp"
 #include "operator_registry.hpp"
 #include "memory_allocator.hpp"
+#include "profiling.hpp"
+#include "weight_cache.hpp"
 #include "common.hpp"
 
 namespace executor {
@@ -42,10 +45,22 @@ class Model {
  public:
   explicit Model(const ModelConfig& conf, const string& weight_root);
   explicit Model(const string& conf_file, const string& weight_root);
-  virtual ~Model() {}
+  // Create an execution stream sharing the weights of weight_model, which has the same
+  // config. The weights are immutable and never released by a model, so a stream has
+  // its own operators and activations but no copy of the weights. Streams can run
+  // concurrently on different threads, while each stream serves one thread at a time.
+  Model(const ModelConfig& conf, const Model& weight_model);
+  Model(const string& conf_file, const Model& weight_model);
+  virtual ~Model() {
+    for (auto& tensor : output_tensors_) free(const_cast<void*>(tensor.raw_data()));
+  }
 
   void Init(const ModelConfig& conf);
+  // the returned tensors are owned by the model and valid until the next Forward
   vector<Tensor>& Forward(vector<Tensor>& input_data);  // NOLINT
+  // write the outputs into the caller owned buffers of output_data, throws
+  // std::invalid_argument when they don't match the dtype and size of the model outputs
+  void Forward(vector<Tensor>& input_data, vector<Tensor>* output_data);  // NOLINT
 
   void SetInput(const vector<OperatorConfig*>& conf, const int operator_id,
     const int tensor_id, map<string, int>* tensor_name_to_idx);
@@ -63,6 +78,18 @@ class Model {
     return tensors_;
   }
 
+  // profiling is disabled by default, set the environment variable ENGINE_PROFILING
+  // before constructing the model to also profile the Prepare calls
+  inline void EnableProfiling(bool enable) { profiling_ = enable; }
+  inline bool profiling() const { return profiling_; }
+  inline void ResetProfiling() { profiler_.Reset(); }
+  inline const vector<OperatorProfile>& profiles() const { return profiler_.profiles(); }
+  inline string ChromeTrace() const { return profiler_.ChromeTrace(); }
+
+  // bytes of the planned activation arena of the last input shapes, 0 if the static
+  // buffer strategy is not enabled or the Forward can not be planned
+  inline size_t activation_memory() const { return memory_plan_.arena_size(); }
+
   inline int num_inputs() const { return model_input_tensors_.size(); }
   inline int num_outputs() const { return model_output_tensors_.size(); }
 
@@ -70,23 +97,24 @@ class Model {
     return model_input_configs_;
   }
 
+  // Copy the model outputs into the buffers of output_tensors_, which are owned by the
+  // model and overwritten by the next Forward. Use DetachOutputs to take over them.
   inline vector<Tensor>& output_tensors() {
     LOG(INFO) << "Output tensor size is "<< model_output_tensors_.size();
     for (int i = 0; i < model_output_tensors_.size(); ++i) {
       auto data_buffer = model_output_tensors_[i]->data();
-      auto size = model_output_tensors_[i]->size();
-      // copy the data from memory to an output buffer
-      if (size > output_tensors_[i].size() ||
-	      output_tensors_[i].size() < size * type2bytes[output_tensors_[i].dtype()]) {
-        free(output_tensors_[i].mutable_data());
-        void* out_buffer = malloc(size * type2bytes[output_tensors_[i].dtype()]);
-        output_tensors_[i].set_data(out_buffer);
-        output_tensors_[i].set_shape(model_output_tensors_[i]->shape());
-        memcpy(out_buffer, data_buffer, size * type2bytes[output_tensors_[i].dtype()]);
-      } else {
-        void* out_buffer = output_tensors_[i].mutable_data();
-        memcpy(out_buffer, data_buffer, size * type2bytes[output_tensors_[i].dtype()]);
+      auto& shape = model_output_tensors_[i]->shape();
+      auto& dtype = model_output_tensors_[i]->dtype();
+      size_t bytes = model_output_tensors_[i]->size() * type2bytes[dtype];
+      void* out_buffer = const_cast<void*>(output_tensors_[i].raw_data());
+      if (out_buffer == nullptr || output_capacity_[i] < bytes) {
+        free(out_buffer);
+        out_buffer = malloc(bytes);
+        output_capacity_[i] = bytes;
       }
+      // re-construct the tensor so the malloc-ed buffer never goes to MemoryAllocator
+      output_tensors_[i] = Tensor(out_buffer, shape, dtype);
+      memcpy(out_buffer, data_buffer, bytes);
     }
 
     for (auto& tensor_ptr : model_output_tensors_) tensor_ptr->unref_data();
@@ -94,9 +122,23 @@ class Model {
     return output_tensors_;
   }
 
+  // Copy the model outputs into the caller owned buffers, which should have the same
+  // dtype and size with the model outputs, and release the model outputs.
+  void CopyOutputs(vector<Tensor>* output_data);
+  // the mismatch between the caller owned buffers and the model outputs, empty if none
+  string CheckOutputs(const vector<Tensor>& output_data);
+
+  // Hand over the output buffers of the last Forward to the caller, who should free()
+  // them. The next Forward will allocate new output buffers.
+  vector<Tensor> DetachOutputs();
+
  protected:
   string name_;
   string weight_root_;
+  // the model whose weights are shared by this stream
+  const Model* weight_model_ = nullptr;
+  // the reordered weights, shared by the model and its streams
+  shared_ptr<ReorderedWeightCache> weight_cache_;
   vector<shared_ptr<Operator> > operators_;
   vector<string> operator_names_;
   map<string, int> operator_name_index_;
@@ -112,6 +154,14 @@ class Model {
   vector<TensorConfig*> model_input_configs_;
   vector<Tensor*> model_output_tensors_;
   vector<Tensor> output_tensors_;
+  vector<size_t> output_capacity_;
+
+  bool profiling_ = false;
+  Profiler profiler_;
+  MemoryPlan memory_plan_;
+
+  void RunOperators(vector<Tensor>& input_data);  // NOLINT
+  void BeginMemoryPlan(const vector<Tensor>& input_data);
 };
 
 }  // namespace executor
@@ -16,6 +16,7 @@
 #define DEEP_ENGINE_EXECUTOR_INCLUDE_OPERATOR_HPP_
 
 #include <algorithm>
+#include <memory>
 #include <string>
 #include <vector>
 
@@ -24,6 +25,8 @@
 
 namespace executor {
 
+class ReorderedWeightCache;
+
 /**
  * @brief An interface for the units of computation which can be composed into a
  *        Model.
@@ -63,11 +66,17 @@ class Operator {
 
   const OperatorConfig& operator_conf() const { return operator_conf_; }
 
+  // the cache of the reordered weights of the model this operator belongs to
+  void set_weight_cache(const std::shared_ptr<ReorderedWeightCache>& weight_cache) {
+    weight_cache_ = weight_cache;
+  }
+
  protected:
   /** The conf that stores the operator configurations */
   string name_;
   string type_;
   OperatorConfig operator_conf_;
+  std::shared_ptr<ReorderedWeightCache> weight_cache_;
 };  // class Operator
 
 
@@ -20,6 +20,8 @@
 #include "oneapi/dnnl/dnnl.hpp"
 #include "../operator.hpp"
 #include "../common.hpp"
+#include "../weight_cache.hpp"
+#include "../primitive_cache.hpp"
 
 namespace executor {
 
@@ -110,6 +112,23 @@ class InnerProductOperator : public Operator {
 
   Tensor* dst_min_ = nullptr;
   Tensor* dst_max_ = nullptr;
+
+  // the primitives and memory objects created by Reshape for an input shape
+  struct ReshapeCache {
+    dnnl::inner_product_forward::primitive_desc inner_product_pd;
+    dnnl::inner_product_forward inner_product_p;
+    dnnl::eltwise_forward::primitive_desc gelu_pd;
+    dnnl::eltwise_forward gelu_p;
+    memory src0_m;
+    memory dst_m;
+    memory gelu_m;
+    memory binary_m;
+    memory weight_m;
+    memory bias_m;
+  };
+  PrimitiveCache<ReshapeCache> primitive_cache_;
+
+  void RestoreReshapeCache(const ReshapeCache& cache);
 };
 }  // namespace executor
 #endif  // DEEP_ENGINE_EXECUTOR_INCLUDE_OPERATORS_INNER_PRODUCT_HPP_
@@ -20,6 +20,8 @@
 #include "oneapi/dnnl/dnnl.hpp"
 #include "../operator.hpp"
 #include "../common.hpp"
+#include "../weight_cache.hpp"
+#include "../primitive_cache.hpp"
 
 namespace executor {
 
@@ -87,6 +89,21 @@ class MatmulOperator : public Operator {
 
   Tensor* dst_min_ = nullptr;
   Tensor* dst_max_ = nullptr;
+
+  // the primitives and memory objects created by Reshape for the input shapes
+  struct ReshapeCache {
+    dnnl::matmul::primitive_desc matmul_pd;
+    dnnl::matmul matmul_p;
+    memory src0_m;
+    memory src1_m;
+    memory dst_m;
+    memory binary_m;
+    memory weight_m;
+    memory bias_m;
+  };
+  PrimitiveCache<ReshapeCache> primitive_cache_;
+
+  void RestoreReshapeCache(const ReshapeCache& cache, bool has_bias);
 };
 }  // namespace executor
 #endif  // DEEP_ENGINE_EXECUTOR_INCLUDE_OPERATORS_MATMUL_HPP_
@@ -0,0 +1,82 @@
+//  Copyright (c) 2022 Intel Corporation
+//
+//  Licensed under the Apache License, Version 2.0 (the "License");
+//  you may not use this file except in compliance with the License.
+//  You may obtain a copy of the License at
+//
+//    http://www.apache.org/licenses/LICENSE-2.0
+//
+//  Unless required by applicable law or agreed to in writing, software
+//  distributed under the License is distributed on an "AS IS" BASIS,
+//  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//  See the License for the specific language governing permissions and
+//  limitations under the License.
+
+#ifndef DEEP_ENGINE_EXECUTOR_INCLUDE_PRIMITIVE_CACHE_HPP_
+#define DEEP_ENGINE_EXECUTOR_INCLUDE_PRIMITIVE_CACHE_HPP_
+
+#include <cstdlib>
+#include <list>
+#include <map>
+#include <utility>
+#include <vector>
+
+namespace executor {
+using std::vector;
+
+/**
+ * @brief A least recently used cache of the primitives an Operator creates in Reshape,
+ *        keyed by the input shapes. With variable-length inputs an Operator only
+ *        creates the primitives of a shape once, and switches back to them when the
+ *        shape comes again. The capacity is set by the environment variable
+ *        ENGINE_PRIMITIVE_CACHE_CAPACITY, 16 by default.
+ *
+ */
+template <typename Value>
+class PrimitiveCache {
+ public:
+  typedef vector<int64_t> Key;
+
+  PrimitiveCache() : capacity_(DefaultCapacity()) {}
+
+  static size_t DefaultCapacity() {
+    const char* capacity = getenv("ENGINE_PRIMITIVE_CACHE_CAPACITY");
+    int value = capacity != NULL ? atoi(capacity) : 16;
+    return value > 1 ? value : 1;
+  }
+
+  // the cached value of key, nullptr if not cached
+  Value* Find(const Key& key) {
+    auto iter = index_.find(key);
+    if (iter == index_.end()) return nullptr;
+    entries_.splice(entries_.begin(), entries_, iter->second);
+    return &(iter->second->second);
+  }
+
+  // cache the value of key, evict the least recently used one when the cache is full
+  Value& Insert(const Key& key, const Value& value) {
+    auto iter = index_.find(key);
+    if (iter != index_.end()) {
+      entries_.erase(iter->second);
+      index_.erase(iter);
+    }
+    if (entries_.size() >= capacity_) {
+      index_.erase(entries_.back().first);
+      entries_.pop_back();
+    }
+    entries_.push_front(std::make_pair(key, value));
+    index_[key] = entries_.begin();
+    return entries_.front().second;
+  }
+
+  inline size_t size() const { return entries_.size(); }
+
+ private:
+  size_t capacity_;
+  std::list<std::pair<Key, Value> > entries_;
+  std::map<Key, typename std::list<std::pair<Key, Value> >::iterator> index_;
+};
+
+}  // namespace executor
+
+#endif  // DEEP_ENGINE_EXECUTOR_INCLUDE_PRIMITIVE_CACHE_HPP_
@@ -0,0 +1,191 @@
+//  Copyright (c) 2022 Intel Corporation
+//
+//  Licensed under the Apache License, Version 2.0 (the "License");
+//  you may not use this file except in compliance with the License.
+//  You may obtain a copy of the License at
+//
+//    http://www.apache.org/licenses/LICENSE-2.0
+//
+//  Unless required by applicable law or agreed to in writing, software
+//  distributed under the License is distributed on an "AS IS" BASIS,
+//  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//  See the License for the specific language governing permissions and
+//  limitations under the License.
+
+#ifndef DEEP_ENGINE_EXECUTOR_INCLUDE_PROFILING_HPP_
+#define DEEP_ENGINE_EXECUTOR_INCLUDE_PROFILING_HPP_
+
+#include <chrono>  // NOLINT
+#include <cstdlib>
+#include <memory>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include "tensor.hpp"
+#include "operator.hpp"
+#include "memory_allocator.hpp"
+
+namespace executor {
+
+/**
+ * @brief The statistics of an Operator accumulated over the profiled calls.
+ *
+ */
+struct OperatorProfile {
+  string name;
+  string type;
+  int64_t prepare_count = 0;
+  int64_t reshape_count = 0;
+  int64_t forward_count = 0;
+  // total wall time in milliseconds
+  double prepare_ms = 0;
+  double reshape_ms = 0;
+  double forward_ms = 0;
+  // tensor shapes of the last Forward call
+  vector<vector<int64_t> > input_shapes;
+  vector<vector<int64_t> > output_shapes;
+  // memory allocator activities during the calls
+  int64_t alloc_count = 0;
+  int64_t alloc_bytes = 0;
+  int64_t reuse_count = 0;
+};
+
+/**
+ * @brief Records the wall time of the Prepare, Reshape and Forward calls of each
+ *        Operator of a Model, together with the tensor shapes and the memory
+ *        allocator activities. The events can be dumped as Chrome trace JSON, only
+ *        the latest ones are kept, 100000 by default, set the environment variable
+ *        ENGINE_PROFILING_EVENTS to change it.
+ *
+ */
+class Profiler {
+ public:
+  struct Event {
+    int operator_id;
+    const char* phase;
+    int64_t start_us;
+    int64_t duration_us;
+  };
+
+  Profiler() : capacity_(DefaultCapacity()) {}
+
+  static size_t DefaultCapacity() {
+    const char* capacity = getenv("ENGINE_PROFILING_EVENTS");
+    int value = capacity != NULL ? atoi(capacity) : 100000;
+    return value > 1 ? value : 1;
+  }
+
+  void Init(const vector<shared_ptr<Operator> >& operators) {
+    origin_ = std::chrono::steady_clock::now();
+    profiles_.clear();
+    for (auto& op : operators) {
+      OperatorProfile profile;
+      profile.name = op->name();
+      profile.type = op->type();
+      profiles_.push_back(profile);
+    }
+    events_.clear();
+    head_ = 0;
+  }
+
+  void Reset() {
+    for (auto& profile : profiles_) {
+      OperatorProfile empty;
+      empty.name = profile.name;
+      empty.type = profile.type;
+      profile = empty;
+    }
+    events_.clear();
+    head_ = 0;
+  }
+
+  // start timing a call and take a snapshot of the allocator statistics
+  inline void Start() {
+    stats_ = MemoryAllocator::Stats();
+    start_ = std::chrono::steady_clock::now();
+  }
+
+  // phase should be one of "Prepare", "Reshape" and "Forward"
+  void End(int operator_id, const char* phase, const vector<Tensor*>& input,
+           const vector<Tensor*>& output) {
+    auto end = std::chrono::steady_clock::now();
+    auto& stats = MemoryAllocator::Stats();
+    double duration_ms = std::chrono::duration<double, std::milli>(end - start_).count();
+    OperatorProfile& profile = profiles_[operator_id];
+    string phase_str(phase);
+    if (phase_str == "Prepare") {
+      profile.prepare_count++;
+      profile.prepare_ms += duration_ms;
+    } else if (phase_str == "Reshape") {
+      profile.reshape_count++;
+      profile.reshape_ms += duration_ms;
+    } else {
+      profile.forward_count++;
+      profile.forward_ms += duration_ms;
+      profile.input_shapes.clear();
+      for (auto tensor : input) profile.input_shapes.push_back(tensor->shape());
+      profile.output_shapes.clear();
+      for (auto tensor : output) profile.output_shapes.push_back(tensor->shape());
+    }
+    profile.alloc_count += stats.alloc_count - stats_.alloc_count;
+    profile.alloc_bytes += stats.alloc_bytes - stats_.alloc_bytes;
+    profile.reuse_count += stats.reuse_count - stats_.reuse_count;
+    Event event = {operator_id, phase, MicroSeconds(start_),
+                   MicroSeconds(end) - MicroSeconds(start_)};
+    // a ring buffer overwriting the oldest event once it is full
+    if (events_.size() < capacity_) {
+      events_.push_back(event);
+    } else {
+      events_[head_] = event;
+      head_ = (head_ + 1) % capacity_;
+    }
+  }
+
+  inline const vector<OperatorProfile>& profiles() const { return profiles_; }
+
+  // dump the events in the Chrome trace event format, which can be loaded by
+  // chrome://tracing or Perfetto
+  string ChromeTrace() const {
+    std::ostringstream trace;
+    trace << "{\"traceEvents\": [";
+    for (size_t i = 0; i < events_.size(); ++i) {
+      const Event& event = events_[(head_ + i) % events_.size()];
+      const OperatorProfile& profile = profiles_[event.operator_id];
+      if (i != 0) trace << ", ";
+      trace << "{\"name\": \"" << Escape(profile.name) << "\", \"cat\": \"" << event.phase
+            << "\", \"ph\": \"X\", \"ts\": " << event.start_us << ", \"dur\": "
+            << event.duration_us << ", \"pid\": 0, \"tid\": 0, \"args\": {\"type\": \""
+            << Escape(profile.type) << "\"}}";
+    }
+    trace << "]}";
+    return trace.str();
+  }
+
+ private:
+  inline int64_t MicroSeconds(const std::chrono::steady_clock::time_point& time) const {
+    return std::chrono::duration_cast<std::chrono::microseconds>(time - origin_).count();
+  }
+
+  static string Escape(const string& str) {
+    string escaped;
+    for (auto c : str) {
+      if (c == '"' || c == '\\') escaped.push_back('\\');
+      escaped.push_back(c);
+    }
+    return escaped;
+  }
+
+  std::chrono::steady_clock::time_point origin_;
+  std::chrono::steady_clock::time_point start_;
+  MemoryAllocator::Statistics stats_;
+  vector<OperatorProfile> profiles_;
+  size_t capacity_;
+  // the recorded events and the index of the oldest one
+  vector<Event> events_;
+  size_t head_ = 0;
+};
+
+}  // namespace executor
+
+#endif  // DEEP_ENGINE_EXECUTOR_INCLUDE_PROFILING_HPP_
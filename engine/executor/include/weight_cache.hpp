@@ -0,0 +1,73 @@
+//  Copyright (c) 2022 Intel Corporation
+//
+//  Licensed under the Apache License, Version 2.0 (the "License");
+//  you may not use this file except in compliance with the License.
+//  You may obtain a copy of the License at
+//
+//    http://www.apache.org/licenses/LICENSE-2.0
+//
+//  Unless required by applicable law or agreed to in writing, software
+//  distributed under the License is distributed on an "AS IS" BASIS,
+//  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//  See the License for the specific language governing permissions and
+//  limitations under the License.
+
+#ifndef DEEP_ENGINE_EXECUTOR_INCLUDE_WEIGHT_CACHE_HPP_
+#define DEEP_ENGINE_EXECUTOR_INCLUDE_WEIGHT_CACHE_HPP_
+
+#include <map>
+#include <mutex>  // NOLINT
+#include <vector>
+#include "oneapi/dnnl/dnnl.hpp"
+
+namespace executor {
+
+/**
+ * @brief A cache of the weights reordered to the primitive preferred layout. It is
+ *        owned by a model and shared with the streams created from it, so the streams
+ *        only reorder and keep a weight once. The weights of the owner model are never
+ *        released while it lives, so their buffers are the keys of the cache, and the
+ *        reordered weights are released with the owner model and its last stream.
+ *
+ */
+class ReorderedWeightCache {
+ public:
+  // get the weight memory of src_m reordered to desc, src_m should be a constant weight
+  dnnl::memory Get(const dnnl::memory& src_m, const dnnl::memory::desc& desc,
+                   const dnnl::engine& eng, dnnl::stream& eng_stream) {  // NOLINT
+    void* key = src_m.get_data_handle();
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto& cached = cache_[key];
+    for (auto& weight_m : cached) {
+      if (weight_m.get_desc() == desc) return weight_m;
+    }
+    dnnl::memory weight_m = Reorder(src_m, desc, eng, eng_stream);
+    cached.push_back(weight_m);
+    return weight_m;
+  }
+
+  // reorder the weight through the cache if any, an operator created out of a model
+  // has no cache and keeps its own reordered weight
+  static dnnl::memory Get(ReorderedWeightCache* cache, const dnnl::memory& src_m,
+                          const dnnl::memory::desc& desc, const dnnl::engine& eng,
+                          dnnl::stream& eng_stream) {  // NOLINT
+    if (cache != nullptr) return cache->Get(src_m, desc, eng, eng_stream);
+    return Reorder(src_m, desc, eng, eng_stream);
+  }
+
+ private:
+  static dnnl::memory Reorder(const dnnl::memory& src_m, const dnnl::memory::desc& desc,
+                              const dnnl::engine& eng, dnnl::stream& eng_stream) {  // NOLINT
+    dnnl::memory weight_m(desc, eng);
+    dnnl::reorder(src_m, weight_m).execute(eng_stream, src_m, weight_m);
+    eng_stream.wait();
+    return weight_m;
+  }
+
+  std::map<void*, std::vector<dnnl::memory> > cache_;
+  std::mutex mutex_;
+};
+
+}  // namespace executor
+
+#endif  // DEEP_ENGINE_EXECUTOR_INCLUDE_WEIGHT_CACHE_HPP_
@@ -26,7 +26,81 @@ PYBIND11_MODULE(engine_py, m) {
   py::class_<executor::Model>(m, "Model")
   .def(py::init<std::string, std::string>())
   .def(py::init<executor::ModelConfig, std::string>())
-  .def("forward", &executor::Model::Forward, py::arg("input"));
+  // an execution stream sharing the weights of the given model
+  .def(py::init<std::string, const executor::Model&>(), py::keep_alive<1, 3>())
+  .def(py::init<executor::ModelConfig, const executor::Model&>(), py::keep_alive<1, 3>())
+  // without output, the returned arrays take over the output buffers of the model
+  // without copy and free them when garbage collected.
+  // with output, the model outputs are written into the given C-contiguous writeable
+  // arrays, which should match the dtype and size of the model outputs, otherwise
+  // ValueError is raised.
+  .def("forward", [](executor::Model& model, std::vector<executor::Tensor>& input,
+                     py::object output) -> py::object {
+    if (output.is_none()) {
+      {
+        // release the GIL, so the streams of a model can run in python threads
+        py::gil_scoped_release release;
+        model.Forward(input);
+      }
+      py::list outputs;
+      for (auto& tensor : model.DetachOutputs()) outputs.append(executor::MoveToNumpy(tensor));
+      return std::move(outputs);
+    }
+    std::vector<executor::Tensor> output_tensors;
+    for (auto item : output) {
+      if (!py::isinstance<py::array>(item)) throw py::type_error("output should be arrays");
+      auto array = py::reinterpret_borrow<py::array>(item);
+      if (!array.writeable() || !(array.flags() & py::array::c_style)) {
+        throw py::value_error("output array should be C-contiguous and writeable");
+      }
+      std::vector<int64_t> shape(array.shape(), array.shape() + array.ndim());
+      std::string dtype;
+      if (py::isinstance<py::array_t<float>>(array)) {
+        dtype = "fp32";
+      } else if (py::isinstance<py::array_t<int32_t>>(array)) {
+        dtype = "int32";
+      } else if (py::isinstance<py::array_t<int8_t>>(array)) {
+        dtype = "s8";
+      } else if (py::isinstance<py::array_t<uint8_t>>(array)) {
+        dtype = "u8";
+      } else {
+        throw py::type_error("unsupported output dtype " + std::string(py::str(array.dtype())));
+      }
+      output_tensors.push_back(executor::Tensor(array.mutable_data(), shape, dtype));
+    }
+    {
+      py::gil_scoped_release release;
+      model.Forward(input, &output_tensors);
+    }
+    return output;
+  }, py::arg("input"), py::arg("output") = py::none())
+  .def("enable_profiling", &executor::Model::EnableProfiling, py::arg("enable") = true)
+  .def("reset_profiling", &executor::Model::ResetProfiling)
+  // a list of dicts, one for each operator in execution order, the time is in ms
+  .def("profiling_report", [](const executor::Model& model) {
+    py::list report;
+    for (auto& profile : model.profiles()) {
+      py::dict item;
+      item["name"] = profile.name;
+      item["type"] = profile.type;
+      item["prepare_count"] = profile.prepare_count;
+      item["reshape_count"] = profile.reshape_count;
+      item["forward_count"] = profile.forward_count;
+      item["prepare_ms"] = profile.prepare_ms;
+      item["reshape_ms"] = profile.reshape_ms;
+      item["forward_ms"] = profile.forward_ms;
+      item["input_shapes"] = profile.input_shapes;
+      item["output_shapes"] = profile.output_shapes;
+      item["alloc_count"] = profile.alloc_count;
+      item["alloc_bytes"] = profile.alloc_bytes;
+      item["reuse_count"] = profile.reuse_count;
+      report.append(item);
+    }
+    return report;
+  })
+  // the profiled calls in Chrome trace event JSON
+  .def("chrome_trace", &executor::Model::ChromeTrace)
+  .def("activation_memory", &executor::Model::activation_memory);
 
   py::class_<executor::TensorConfig>(m, "tensor_config")
   .def(py::init<std::string, const std::vector<int64_t> &,
@@ -18,6 +18,7 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <pybind11/numpy.h>
+#include <cstdlib>
 #include <vector>
 #include <string>
 #include <utility>
@@ -25,6 +26,26 @@
 
 namespace py = pybind11;
 
+namespace executor {
+// the NumPy dtype of an executor tensor dtype
+inline py::dtype ToNumpyDtype(const string& dtype) {
+  if (dtype == "fp32") return py::dtype::of<float>();
+  if (dtype == "int32" || dtype == "s32") return py::dtype::of<int32_t>();
+  if (dtype == "u8") return py::dtype::of<uint8_t>();
+  if (dtype == "s8" || dtype == "int8") return py::dtype::of<int8_t>();
+  throw py::type_error("executor tensor dtype " + dtype + " has no NumPy dtype");
+}
+
+// hand over a malloc-ed tensor buffer to a NumPy array without copy,
+// the buffer will be freed when the array is garbage collected
+inline py::array MoveToNumpy(const Tensor& tensor) {
+  void* data = const_cast<void*>(tensor.raw_data());
+  if (data == nullptr) return py::array(ToNumpyDtype(tensor.dtype()), tensor.shape());
+  py::capsule owner(data, [](void* ptr) { free(ptr); });
+  return py::array(ToNumpyDtype(tensor.dtype()), tensor.shape(), {}, data, owner);
+}
+}  // namespace executor
+
 // type caster: executor::Tensor <-> NumPy-array
 namespace pybind11 { namespace detail {
 template <>
@@ -33,27 +54,46 @@ struct type_caster <executor::Tensor> {
     PYBIND11_TYPE_CASTER(executor::Tensor, _("executor::Tensor"));
 
     // Conversion part 1 (Python -> C++)
+    // The tensor shares the memory of the C-contiguous array without copy. Arrays of
+    // int64 and float64 are converted to int32 and fp32, other dtypes are rejected.
+    // A converted array is kept alive by loader_life_support until the call returns.
     bool load(py::handle src, bool convert) {
       if (!convert) {
         return false;
       }
 
-      auto buf = py::array::ensure(src);
+      auto buf = py::array::ensure(src, py::array::c_style);
 
       if (!buf) {
         return false;
       }
 
+      string dtype;
+      if (py::isinstance<py::array_t<int64_t>>(buf)) {
+        buf = py::array_t<int32_t, py::array::c_style | py::array::forcecast>::ensure(buf);
+      } else if (py::isinstance<py::array_t<double>>(buf)) {
+        buf = py::array_t<float, py::array::c_style | py::array::forcecast>::ensure(buf);
+      }
+      loader_life_support::add_patient(buf);
+      if (py::isinstance<py::array_t<float>>(buf)) {
+        dtype = "fp32";
+      } else if (py::isinstance<py::array_t<int32_t>>(buf)) {
+        dtype = "int32";
+      } else if (py::isinstance<py::array_t<int8_t>>(buf)) {
+        dtype = "s8";
+      } else if (py::isinstance<py::array_t<uint8_t>>(buf)) {
+        dtype = "u8";
+      } else {
+        throw py::type_error("unsupported input dtype " +
+                             std::string(py::str(buf.dtype())) +
+                             ", engine supports float32, int32, int8 and uint8");
+      }
+
       std::vector<int64_t> shape(buf.ndim());
 
       for (int i = 0 ; i < buf.ndim() ; i++) {
         shape[i] = buf.shape()[i];
       }
-      string dtype = "fp32";
-      if (py::isinstance<py::array_t<int32_t>>(buf)) dtype = "int32";
-      if (py::isinstance<py::array_t<float>>(buf)) dtype = "fp32";
-      if (py::isinstance<py::array_t<char>>(buf)) dtype = "s8";
-      if (py::isinstance<py::array_t<unsigned char>>(buf)) dtype = "u8";
 
       value = executor::Tensor(const_cast<void*>(buf.data()), shape, dtype);
 
@@ -61,18 +101,10 @@ struct type_caster <executor::Tensor> {
     }
 
     // Conversion part 2 (C++ -> Python)
+    // The data is copied, use executor::MoveToNumpy to hand over a buffer without copy.
     static py::handle cast(const executor::Tensor& src,
       py::return_value_policy policy, py::handle parent) {
-      py::array a;
-      if (src.dtype() == "fp32") {
-        a = py::array(std::move(src.shape()), reinterpret_cast<const float*>(src.raw_data()));
-      } else if (src.dtype() == "int32") {
-        a = py::array(std::move(src.shape()), reinterpret_cast<const int32_t*>(src.raw_data()));
-      } else if (src.dtype() == "u8") {
-        a = py::array(std::move(src.shape()), reinterpret_cast<const uint8_t*>(src.raw_data()));
-      } else if (src.dtype() == "s8") {
-        a = py::array(std::move(src.shape()), reinterpret_cast<const int8_t*>(src.raw_data()));
-      }
+      py::array a(executor::ToNumpyDtype(src.dtype()), src.shape(), {}, src.raw_data());
       return a.release();
     }
 };
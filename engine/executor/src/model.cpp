@@ -16,13 +16,31 @@
 
 namespace executor {
 
+// the int32 tensors are tagged either "int32" or "s32" in the executor
+static const string& CanonicalDtype(const string& dtype) {
+  static const string s32 = "s32";
+  return dtype == "int32" ? s32 : dtype;
+}
+
 Model::Model(const ModelConfig& conf, const string& weight_root):
-  weight_root_(weight_root) {
+  weight_root_(weight_root), weight_cache_(new ReorderedWeightCache) {
   Init(conf);
 }
 
 Model::Model(const string& conf_file, const string& weight_root):
-  weight_root_(weight_root) {
+  weight_root_(weight_root), weight_cache_(new ReorderedWeightCache) {
+  ModelConfig conf = ModelConfig(conf_file);
+  CHECK_EQ(conf.CheckConfig(), true) << "model config not right....";
+  Init(conf);
+}
+
+Model::Model(const ModelConfig& conf, const Model& weight_model):
+  weight_model_(&weight_model), weight_cache_(weight_model.weight_cache_) {
+  Init(conf);
+}
+
+Model::Model(const string& conf_file, const Model& weight_model):
+  weight_model_(&weight_model), weight_cache_(weight_model.weight_cache_) {
   ModelConfig conf = ModelConfig(conf_file);
   CHECK_EQ(conf.CheckConfig(), true) << "model config not right....";
   Init(conf);
@@ -40,6 +58,7 @@ void Model::Init(const ModelConfig& conf) {
     auto op_conf = op_configs[operator_id];
     auto operator_name = op_conf->name();
     operators_.push_back(OperatorRegistry::CreateOperator(*op_conf));
+    operators_.back()->set_weight_cache(weight_cache_);
     operator_names_.push_back(operator_name);
     operator_name_index_[operator_name] = operator_id;
     // handle the input/output tensors to the model
@@ -65,9 +84,13 @@ void Model::Init(const ModelConfig& conf) {
     LOG(INFO) << "tensor name is " << tensors_[i]->name() <<
       " tensor life is  " << tensors_[i]->life();
   }
+  profiling_ = getenv("ENGINE_PROFILING") != NULL;
+  profiler_.Init(operators_);
   // prepare the operator like cache weight
   for (int i = 0; i < operators_.size(); ++i) {
+    if (profiling_) profiler_.Start();
     operators_[i]->Prepare(input_vecs_[i], output_vecs_[i]);
+    if (profiling_) profiler_.End(i, "Prepare", input_vecs_[i], output_vecs_[i]);
   }
 }
 
@@ -90,6 +113,7 @@ void Model::SetInput(const vector<OperatorConfig*>& conf, const int operator_id,
   if (op_type == "Output") {
     model_output_tensors_.push_back(tensors_[id]);
     output_tensors_.push_back(Tensor(nullptr, tensors_[id]->shape(), tensors_[id]->dtype()));
+    output_capacity_.push_back(0);
   }
 }
 
@@ -113,6 +137,20 @@ void Model::SetOutput(const vector<OperatorConfig*>& conf, const int operator_id
   const string& op_type = op_conf->type();
   if (op_type == "Input") {
     // parse weight here
+    if (tensor_config->location().size() != 0 && weight_model_ != nullptr) {
+      // share the weight loaded by the weight model
+      auto iter = weight_model_->tensor_name_index_.find(tensor_name);
+      CHECK(iter != weight_model_->tensor_name_index_.end()) << "weight " << tensor_name
+        << " not found in the shared weight model...";
+      const Tensor* weight = weight_model_->tensors_[iter->second];
+      // the operators of the weight model may have changed the shape of the weight,
+      // e.g. the transposed weight of InnerProduct, so compare where it is loaded from
+      CHECK(weight->location() == tensor_config->location() &&
+        weight->dtype() == tensor_config->dtype()) << "weight " << tensor_name
+        << " mismatches the shared weight model...";
+      tensor_ptr->set_data(const_cast<void*>(weight->raw_data()));
+      return;
+    }
     if (tensor_config->location().size() != 0) {
       void* weight_ptr = read_file_to_type(
         weight_root_,
@@ -128,7 +166,75 @@ void Model::SetOutput(const vector<OperatorConfig*>& conf, const int operator_id
   }
 }
 
+void Model::BeginMemoryPlan(const vector<Tensor>& input_data) {
+  vector<vector<int64_t> > shapes;
+  for (auto& tensor : input_data) shapes.push_back(tensor.shape());
+  MemoryAllocator::BeginPlan(&memory_plan_, shapes);
+}
+
 vector<Tensor>& Model::Forward(vector<Tensor>& input_data) {
+  BeginMemoryPlan(input_data);
+  RunOperators(input_data);
+  auto& outputs = this->output_tensors();
+  MemoryAllocator::EndPlan();
+  return outputs;
+}
+
+void Model::Forward(vector<Tensor>& input_data, vector<Tensor>* output_data) {
+  // the buffers come from the caller, so a mismatch is reported instead of aborting
+  if (output_data->size() != model_output_tensors_.size()) {
+    throw std::invalid_argument("the model has " + std::to_string(
+      model_output_tensors_.size()) + " outputs, got " + std::to_string(output_data->size()));
+  }
+  BeginMemoryPlan(input_data);
+  RunOperators(input_data);
+  string error = CheckOutputs(*output_data);
+  if (error.empty()) {
+    CopyOutputs(output_data);
+  } else {
+    for (auto& tensor_ptr : model_output_tensors_) tensor_ptr->unref_data();
+  }
+  MemoryAllocator::EndPlan();
+  if (!error.empty()) throw std::invalid_argument(error);
+}
+
+string Model::CheckOutputs(const vector<Tensor>& output_data) {
+  for (int i = 0; i < model_output_tensors_.size(); ++i) {
+    auto& dtype = model_output_tensors_[i]->dtype();
+    auto& output = output_data[i];
+    if (CanonicalDtype(output.dtype()) != CanonicalDtype(dtype)) {
+      return "output " + std::to_string(i) + " should be " + dtype + " instead of " +
+        output.dtype();
+    }
+    if (output.size() != model_output_tensors_[i]->size()) {
+      return "output " + std::to_string(i) + " has " + std::to_string(output.size()) +
+        " elements, the model output has " + std::to_string(model_output_tensors_[i]->size());
+    }
+  }
+  return "";
+}
+
+void Model::CopyOutputs(vector<Tensor>* output_data) {
+  for (int i = 0; i < model_output_tensors_.size(); ++i) {
+    auto& dtype = model_output_tensors_[i]->dtype();
+    auto& output = (*output_data)[i];
+    memcpy(output.mutable_data(), model_output_tensors_[i]->data(),
+      model_output_tensors_[i]->size() * type2bytes[dtype]);
+    output.set_shape(model_output_tensors_[i]->shape());
+  }
+  for (auto& tensor_ptr : model_output_tensors_) tensor_ptr->unref_data();
+}
+
+vector<Tensor> Model::DetachOutputs() {
+  vector<Tensor> outputs(output_tensors_);
+  for (int i = 0; i < output_tensors_.size(); ++i) {
+    output_tensors_[i] = Tensor(nullptr, output_tensors_[i].shape(), output_tensors_[i].dtype());
+    output_capacity_[i] = 0;
+  }
+  return outputs;
+}
+
+void Model::RunOperators(vector<Tensor>& input_data) {
   CHECK_EQ(input_data.size(), model_input_tensors_.size()) <<
     "input data size not equal with model input tensor size....";
   // if we want use dynamic input data shape at run time, we should check the input data shape
@@ -163,16 +269,18 @@ vector<Tensor>& Model::Forward(vector<Tensor>& input_data) {
     for (int i = 0; i < operators_.size(); ++i) {
       LOG(INFO) << "operator " << operators_[i]->name()
         << " gonna reshape with type " << operators_[i]->type();
+      if (profiling_) profiler_.Start();
       operators_[i]->Reshape(input_vecs_[i], output_vecs_[i]);
+      if (profiling_) profiler_.End(i, "Reshape", input_vecs_[i], output_vecs_[i]);
     }
   }
   for (int i = 0; i < operators_.size(); ++i) {
     LOG(INFO) << "operator " << operators_[i]->name()
       << " gonna forward with type " << operators_[i]->type();
+    if (profiling_) profiler_.Start();
     operators_[i]->Forward(input_vecs_[i], output_vecs_[i]);
+    if (profiling_) profiler_.End(i, "Forward", input_vecs_[i], output_vecs_[i]);
   }
-
-  return this->output_tensors();
 }
 
 }  // namespace executor
@@ -266,6 +266,18 @@ void InnerProductOperator::Reshape(const vector<Tensor*>& input, const vector<Te
   // 1.5 Set dst shape and strides
   dst_->set_shape(dst_shape);
 
+  // 2.1 Reuse the primitives created for the same shapes
+  vector<int64_t> cache_key = src0_shape_origin;
+  if (binary_add_) {
+    cache_key.push_back(-1);
+    cache_key.insert(cache_key.end(), post_->shape().begin(), post_->shape().end());
+  }
+  ReshapeCache* cached = primitive_cache_.Find(cache_key);
+  if (cached != nullptr) {
+    RestoreReshapeCache(*cached);
+    return;
+  }
+
   // 2.2 Prepare op descriptors
   dnnl::inner_product_forward::desc inner_product_d = has_bias_ ?
     dnnl::inner_product_forward::desc(
@@ -320,23 +332,46 @@ void InnerProductOperator::Reshape(const vector<Tensor*>& input, const vector<Te
   // 2.5 Prepare memory objects (cached)
   src0_m_ = memory(src0_md, eng_);
   dst_m_ = memory(dst_md, eng_);
-  if (!weight_cached_) {
-    memory any_src1_m = src1_m_;
-    if (inner_product_pd_.weights_desc() != src1_m_.get_desc()) {
-      any_src1_m = memory(inner_product_pd_.weights_desc(), eng_);
-      dnnl::reorder(src1_m_, any_src1_m).execute(eng_stream_, src1_m_, any_src1_m);
-    }
-    memory_args_[DNNL_ARG_WEIGHTS] = any_src1_m;
-    if (has_bias_) {
-      memory any_bias_m = bias_m_;
-      if (inner_product_pd_.bias_desc() != bias_m_.get_desc()) {
-        any_bias_m = memory(inner_product_pd_.bias_desc(), eng_);
-        dnnl::reorder(bias_m_, any_bias_m).execute(eng_stream_, bias_m_, any_bias_m);
-      }
-      memory_args_[DNNL_ARG_BIAS] = any_bias_m;
+  // the preferred weight layout may differ between shapes, the reordered weights are
+  // shared by the shapes with the same layout
+  ReshapeCache cache;
+  cache.weight_m = src1_m_;
+  if (inner_product_pd_.weights_desc() != src1_m_.get_desc()) {
+    cache.weight_m = ReorderedWeightCache::Get(weight_cache_.get(), src1_m_,
+                                               inner_product_pd_.weights_desc(),
+                                               eng_, eng_stream_);
+  }
+  if (has_bias_) {
+    cache.bias_m = bias_m_;
+    if (inner_product_pd_.bias_desc() != bias_m_.get_desc()) {
+      cache.bias_m = ReorderedWeightCache::Get(weight_cache_.get(), bias_m_,
+                                               inner_product_pd_.bias_desc(),
+                                               eng_, eng_stream_);
     }
-    weight_cached_ = true;
   }
+  weight_cached_ = true;
+  cache.inner_product_pd = inner_product_pd_;
+  cache.inner_product_p = inner_product_p_;
+  cache.gelu_pd = gelu_pd_;
+  cache.gelu_p = gelu_p_;
+  cache.src0_m = src0_m_;
+  cache.dst_m = dst_m_;
+  cache.gelu_m = gelu_m_;
+  cache.binary_m = binary_m_;
+  RestoreReshapeCache(primitive_cache_.Insert(cache_key, cache));
+}
+
+void InnerProductOperator::RestoreReshapeCache(const ReshapeCache& cache) {
+  inner_product_pd_ = cache.inner_product_pd;
+  inner_product_p_ = cache.inner_product_p;
+  gelu_pd_ = cache.gelu_pd;
+  gelu_p_ = cache.gelu_p;
+  src0_m_ = cache.src0_m;
+  dst_m_ = cache.dst_m;
+  gelu_m_ = cache.gelu_m;
+  binary_m_ = cache.binary_m;
+  memory_args_[DNNL_ARG_WEIGHTS] = cache.weight_m;
+  if (has_bias_) memory_args_[DNNL_ARG_BIAS] = cache.bias_m;
 }
 
 // 2. inference kernel(for int8 and f32)
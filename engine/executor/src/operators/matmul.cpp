@@ -227,6 +227,20 @@ void MatmulOperator::Reshape(const vector<Tensor*>& input, const vector<Tensor*>
     src1_md = dnnl::memory::desc(src1_shape, type2mem[src1_->dtype()], memory::format_tag::any);
   }
 
+  // 2.1 Reuse the primitives created for the same shapes
+  vector<int64_t> cache_key = src0_shape_origin;
+  cache_key.push_back(-1);
+  cache_key.insert(cache_key.end(), src1_shape_origin.begin(), src1_shape_origin.end());
+  if (binary_add_) {
+    cache_key.push_back(-1);
+    cache_key.insert(cache_key.end(), post_->shape().begin(), post_->shape().end());
+  }
+  ReshapeCache* cached = primitive_cache_.Find(cache_key);
+  if (cached != nullptr) {
+    RestoreReshapeCache(*cached, has_bias);
+    return;
+  }
+
   // 2.2 Prepare op descriptors
   dnnl::matmul::desc matmul_d = has_bias ?
     dnnl::matmul::desc(src0_md, src1_md, bias_md, dst_md) :
@@ -317,27 +331,45 @@ void MatmulOperator::Reshape(const vector<Tensor*>& input, const vector<Tensor*>
   // 2.5 Prepare memory objects (cached)
   src0_m_ = memory(src0_md, eng_);
   dst_m_ = memory(dst_md, eng_);
+  ReshapeCache cache;
   if (has_bias) {
     bias_m_ = memory(bias_md, eng_, const_cast<void*>(bias_->data()));
-    memory any_bias_m = bias_m_;
+    cache.bias_m = bias_m_;
     if (matmul_pd_.bias_desc() != bias_m_.get_desc()) {
-      any_bias_m = memory(matmul_pd_.bias_desc(), eng_);
-      dnnl::reorder(bias_m_, any_bias_m).execute(eng_stream_, bias_m_, any_bias_m);
+      cache.bias_m = memory(matmul_pd_.bias_desc(), eng_);
+      dnnl::reorder(bias_m_, cache.bias_m).execute(eng_stream_, bias_m_, cache.bias_m);
     }
-    memory_args_[DNNL_ARG_BIAS] = any_bias_m;
   }
   if (cache_weight_) {
     memory::desc user_src1_md = memory::desc(src1_shape, type2mem[src1_->dtype()], memory::format_tag::ab);
     src1_m_ = memory(user_src1_md, eng_, const_cast<void*>(src1_->data()));
-    memory any_src1_m = src1_m_;
+    cache.weight_m = src1_m_;
     if (matmul_pd_.weights_desc() != src1_m_.get_desc()) {
-      any_src1_m = memory(matmul_pd_.weights_desc(), eng_);
-      dnnl::reorder(src1_m_, any_src1_m).execute(eng_stream_, src1_m_, any_src1_m);
+      cache.weight_m = ReorderedWeightCache::Get(weight_cache_.get(), src1_m_,
+                                                 matmul_pd_.weights_desc(),
+                                                 eng_, eng_stream_);
     }
-    memory_args_[DNNL_ARG_WEIGHTS] = any_src1_m;
   } else {
     src1_m_ = memory(src1_md, eng_);
   }
+  cache.matmul_pd = matmul_pd_;
+  cache.matmul_p = matmul_p_;
+  cache.src0_m = src0_m_;
+  cache.src1_m = src1_m_;
+  cache.dst_m = dst_m_;
+  cache.binary_m = binary_m_;
+  RestoreReshapeCache(primitive_cache_.Insert(cache_key, cache), has_bias);
+}
+
+void MatmulOperator::RestoreReshapeCache(const ReshapeCache& cache, bool has_bias) {
+  matmul_pd_ = cache.matmul_pd;
+  matmul_p_ = cache.matmul_p;
+  src0_m_ = cache.src0_m;
+  src1_m_ = cache.src1_m;
+  dst_m_ = cache.dst_m;
+  binary_m_ = cache.binary_m;
+  if (has_bias) memory_args_[DNNL_ARG_BIAS] = cache.bias_m;
+  if (cache_weight_) memory_args_[DNNL_ARG_WEIGHTS] = cache.weight_m;
 }
 
 // 2. inference kernel(for int8 and f32)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process dynamic batching of the inference requests of an engine model."""
+
+import bisect
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from neural_compressor.utils import logger
+
+_STOP = object()
+_LAYOUTS = ('batch_seq', 'batch', 'flat_seq', 'shared')
+
+
+class _Request(object):
+    def __init__(self, inputs, seq_len, deadline):
+        self.inputs = inputs
+        self.rows = inputs[0].shape[0]
+        self.seq_len = seq_len
+        self.deadline = deadline
+        self.future = Future()
+
+
+def _pad(array, length, axis, value):
+    pad = length - array.shape[axis]
+    if pad <= 0:
+        return array
+    widths = [(0, 0)] * array.ndim
+    widths[axis] = (0, pad)
+    return np.pad(array, widths, mode='constant', constant_values=value)
+
+
+class BatchingServer(object):
+    """Queue the single inference requests and run them in coalesced batches.
+
+       A batch is dispatched when it reaches max_batch_size rows, or when its oldest
+       request has waited max_wait_ms. The inputs with a sequence axis are padded to the
+       longest sequence in the batch, or to the nearest of seq_buckets when given, so
+       the requests with different lengths share one forward and the model only sees a
+       few distinct shapes. The requests are grouped by bucket, and the outputs are
+       sliced back to the rows and the sequence length of each request as told by
+       output_layouts. An output which doesn't match its layout fails the requests of
+       the batch, it is never handed whole to the requests.
+
+       example:
+            from engine.serving import BatchingServer
+            model = Model(config_path, weight_path)
+            with BatchingServer(model, max_batch_size=16, max_wait_ms=5,
+                                seq_buckets=[32, 64, 128]) as server:
+                out = server.infer([input_ids, segment_ids, input_mask])
+
+    Args:
+        model (object or list): the engine model whose forward takes and returns a list
+                                of numpy arrays, or a list of model streams. The
+                                batches are formed by one dispatcher thread and run by
+                                a worker thread of each stream.
+        max_batch_size (int): the maximum number of rows of a batch.
+        max_wait_ms (float): the maximum time a request waits for the batch to fill.
+        seq_buckets (list): the sequence lengths the inputs are padded to, the requests
+                            longer than all the buckets run at their own length.
+        seq_axis (int): the sequence axis of the inputs and outputs.
+        pad_values (list): the padding value of each input, 0 by default.
+        output_layouts (list): the layout of each output, 'batch_seq' by default:
+                               'batch_seq': the rows in axis 0 and the sequence in
+                                            seq_axis if the output has the axis,
+                               'batch': the rows in axis 0 without sequence axis,
+                               'flat_seq': the rows and the sequence flattened in axis 0,
+                                           such as [batch * seq_len, hidden],
+                               'shared': the same output for all the requests.
+    """
+
+    def __init__(self, model, max_batch_size=16, max_wait_ms=5, seq_buckets=None,
+                 seq_axis=1, pad_values=None, output_layouts=None):
+        assert max_batch_size >= 1, "max_batch_size should be at least 1"
+        assert seq_axis >= 1, "seq_axis should not be the batch axis"
+        assert output_layouts is None or all(layout in _LAYOUTS for layout in output_layouts), \
+            "output_layouts should be in {}".format(_LAYOUTS)
+        self.models = model if isinstance(model, (list, tuple)) else [model]
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.
+        self.seq_buckets = sorted(seq_buckets) if seq_buckets else None
+        self.seq_axis = seq_axis
+        self.pad_values = pad_values
+        self.output_layouts = output_layouts
+        self.stats = {'requests': 0, 'batches': 0, 'rows': 0, 'padded_rows': 0}
+        self._stats_lock = threading.Lock()
+        # guards the closed flag, so no request is queued after the stop of the dispatcher
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._batches = queue.Queue()
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._coalesce, daemon=True)
+        self._dispatcher.start()
+        self._workers = []
+        for model in self.models:
+            worker = threading.Thread(target=self._serve, args=(model,), daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def submit(self, inputs):
+        """Queue a request and return a Future of its outputs.
+
+        Args:
+            inputs (list): the numpy arrays of the model inputs, which have the same
+                           number of rows in the batch axis.
+        """
+        inputs = [np.asarray(data) for data in inputs]
+        assert len(inputs) > 0 and inputs[0].ndim > 0, "inputs should be batched arrays"
+        rows = inputs[0].shape[0]
+        for data in inputs:
+            if data.ndim == 0 or data.shape[0] != rows:
+                raise ValueError("all the inputs of a request should have {} rows".format(rows))
+        seq_len = inputs[0].shape[self.seq_axis] if inputs[0].ndim > self.seq_axis else None
+        request = _Request(inputs, seq_len, time.perf_counter() + self.max_wait)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("the batching server is closed")
+            self._queue.put(request)
+        return request.future
+
+    def infer(self, inputs, timeout=None):
+        """Run a request and wait for its outputs."""
+        return self.submit(inputs).result(timeout)
+
+    def close(self):
+        """Run the queued requests and stop the workers."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._dispatcher.join()
+        for worker in self._workers:
+            worker.join()
+        # a request left behind by a dead dispatcher or worker shouldn't wait forever
+        error = RuntimeError("the batching server is closed")
+        for pending in (self._queue, self._batches):
+            while True:
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    continue
+                for request in (item[1] if isinstance(item, tuple) else [item]):
+                    if not request.future.done():
+                        request.future.set_exception(error)
+
+    def _bucket(self, seq_len):
+        if seq_len is None or self.seq_buckets is None:
+            return None
+        idx = bisect.bisect_left(self.seq_buckets, seq_len)
+        return self.seq_buckets[idx] if idx < len(self.seq_buckets) else seq_len
+
+    def _coalesce(self):
+        # all the requests are batched here, so a batch isn't split across the streams
+        pending = {}
+        while True:
+            timeout = None
+            if pending:
+                deadline = min(requests[0].deadline for requests in pending.values())
+                timeout = max(0., deadline - time.perf_counter())
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                request = None
+            if request is _STOP:
+                for bucket in list(pending):
+                    while pending.get(bucket):
+                        self._dispatch(bucket, pending)
+                for _ in self._workers:
+                    self._batches.put(_STOP)
+                return
+            if request is not None:
+                bucket = self._bucket(request.seq_len)
+                requests = pending.setdefault(bucket, [])
+                requests.append(request)
+                if sum(r.rows for r in requests) >= self.max_batch_size:
+                    self._dispatch(bucket, pending)
+            now = time.perf_counter()
+            for bucket in [b for b, requests in pending.items() if requests[0].deadline <= now]:
+                self._dispatch(bucket, pending)
+
+    def _dispatch(self, bucket, pending):
+        requests = pending[bucket]
+        batch, rows = [], 0
+        for request in requests:
+            if batch and rows + request.rows > self.max_batch_size:
+                break
+            batch.append(request)
+            rows += request.rows
+        del requests[:len(batch)]
+        if not requests:
+            del pending[bucket]
+        self._batches.put((bucket, batch))
+
+    def _serve(self, model):
+        while True:
+            item = self._batches.get()
+            if item is _STOP:
+                return
+            bucket, batch = item
+            try:
+                self._run(model, batch, bucket)
+            except Exception as e:
+                logger.warning("Failed to run a batch of {} requests: {}".format(len(batch), e))
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _run(self, model, batch, bucket):
+        seq_lens = [r.seq_len for r in batch if r.seq_len is not None]
+        length = bucket if bucket is not None else (max(seq_lens) if seq_lens else None)
+        if len(batch) == 1 and batch[0].seq_len == length:
+            inputs = batch[0].inputs
+        else:
+            inputs = []
+            for idx in range(len(batch[0].inputs)):
+                value = self.pad_values[idx] if self.pad_values else 0
+                arrays = []
+                for request in batch:
+                    data = request.inputs[idx]
+                    # only the inputs with the sequence length of the request are padded
+                    if length is not None and data.ndim > self.seq_axis and \
+                       data.shape[self.seq_axis] == request.seq_len:
+                        data = _pad(data, length, self.seq_axis, value)
+                    arrays.append(data)
+                inputs.append(np.concatenate(arrays, axis=0))
+        outputs = [np.asarray(output) for output in model.forward(inputs)]
+        total = sum(r.rows for r in batch)
+        if self.output_layouts is not None and len(self.output_layouts) != len(outputs):
+            raise ValueError("the model has {} outputs but {} output_layouts".format(
+                len(outputs), len(self.output_layouts)))
+        results = [[] for _ in batch]
+        for idx, output in enumerate(outputs):
+            layout = self.output_layouts[idx] if self.output_layouts else 'batch_seq'
+            for i, result in enumerate(self._scatter(output, layout, batch, total, length)):
+                results[i].append(result)
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+        with self._stats_lock:
+            self.stats['requests'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['rows'] += total
+            self.stats['padded_rows'] += sum(r.rows for r in batch if r.seq_len != length)
+
+    def _scatter(self, output, layout, batch, total, length):
+        """Split an output of the batch into the outputs of the requests."""
+        if layout == 'shared':
+            return [output] * len(batch)
+        if layout == 'flat_seq' and length is not None:
+            if output.ndim == 0 or output.shape[0] != total * length:
+                raise ValueError("the flat_seq output of shape {} should have {} x {} "
+                                 "rows".format(output.shape, total, length))
+            output = output.reshape((total, length) + output.shape[1:])
+        elif output.ndim == 0 or output.shape[0] != total:
+            raise ValueError("the {} output of shape {} should have {} rows, set "
+                             "output_layouts for the other outputs".format(
+                                 layout, output.shape, total))
+        seq_axis = 1 if layout == 'flat_seq' else self.seq_axis
+        sliced = layout != 'batch' and length is not None and output.ndim > seq_axis
+        if sliced and output.shape[seq_axis] != length:
+            raise ValueError("the {} output of shape {} should have the sequence length {} "
+                             "in axis {}, set output_layouts for the other outputs".format(
+                                 layout, output.shape, length, seq_axis))
+        results = []
+        begin = 0
+        for request in batch:
+            result = output[begin:begin + request.rows]
+            begin += request.rows
+            seq_len = request.seq_len if request.seq_len is not None else length
+            if sliced and seq_len != length:
+                index = [slice(None)] * result.ndim
+                index[seq_axis] = slice(0, seq_len)
+                result = result[tuple(index)]
+            if layout == 'flat_seq' and length is not None:
+                result = result.reshape((-1,) + result.shape[2:])
+            results.append(result)
+        return results
@@ -0,0 +1,87 @@
+//  Copyright (c) 2022 Intel Corporation
+//
+//  Licensed under the Apache License, Version 2.0 (the "License");
+//  you may not use this file except in compliance with the License.
+//  You may obtain a copy of the License at
+//
+//    http://www.apache.org/licenses/LICENSE-2.0
+//
+//  Unless required by applicable law or agreed to in writing, software
+//  distributed under the License is distributed on an "AS IS" BASIS,
+//  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+//  See the License for the specific language governing permissions and
+//  limitations under the License.
+
+#include <cstdio>
+#include <fstream>
+#include <string>
+#include <vector>
+#include "gtest/gtest.h"
+#include "../../include/model.hpp"
+using executor::Model;
+using executor::ModelConfig;
+using executor::Tensor;
+
+// an InnerProduct with a [K, N] weight transposed by src1_perm, as the compiler
+// emits for the weights of Gemm and MatMul
+static const char kModelConf[] = R"(
+model:
+  name: ip_model
+  operator:
+    input_data:
+      type: Input
+      output:
+        src:
+          dtype: fp32
+          shape: [-1, 4]
+        weight:
+          dtype: fp32
+          shape: [4, 3]
+          location: [0, 48]
+    ip:
+      type: InnerProduct
+      input:
+        src: {}
+        weight: {}
+      output:
+        dst: {}
+      attr:
+        src1_perm: 1,0
+    output_data:
+      type: Output
+      input:
+        dst: {}
+)";
+
+TEST(ModelTests, StreamSharesTransposedWeight) {
+  const int M = 2, K = 4, N = 3;
+  std::vector<float> weight(K * N);
+  for (int i = 0; i < K * N; ++i) weight[i] = i * 0.5f - 2;
+  const std::string weight_root = "./test_model_weight.bin";
+  std::ofstream weight_file(weight_root, std::ios::out | std::ios::binary);
+  weight_file.write(reinterpret_cast<const char*>(weight.data()), weight.size() * sizeof(float));
+  weight_file.close();
+
+  ModelConfig conf(YAML::Load(kModelConf));
+  Model model(conf, weight_root);
+  std::remove(weight_root.c_str());
+  // InnerProduct Prepare of the model has transposed the shape of its weight, the stream
+  // still shares the weight without reading the file
+  Model stream(conf, model);
+
+  std::vector<float> src(M * K);
+  for (int i = 0; i < M * K; ++i) src[i] = i + 1;
+  for (Model* m : {&model, &stream}) {
+    std::vector<Tensor> input = {Tensor(src.data(), {M, K}, "fp32")};
+    std::vector<Tensor>& output = m->Forward(input);
+    ASSERT_EQ(output[0].shape(), (std::vector<int64_t>{M, N}));
+    const float* dst = static_cast<const float*>(output[0].raw_data());
+    for (int i = 0; i < M; ++i) {
+      for (int j = 0; j < N; ++j) {
+        float expected = 0;
+        for (int k = 0; k < K; ++k) expected += src[i * K + k] * weight[k * N + j];
+        EXPECT_NEAR(dst[i * N + j], expected, 1e-4);
+      }
+    }
+  }
+}
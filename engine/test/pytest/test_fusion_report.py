@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+from engine.compile.ops.op import OPERATORS
+from engine.compile.ops.tensor import Tensor
+from engine.compile.graph import Graph
+from engine.compile.report import infer_shapes, coverage_report
+
+
+class FakeMatcher(object):
+    pattern_stats = {'InnerproductWithBiasGelu': {'created': 1, 'removed': 3}}
+    fused_nodes = set(['ip'])
+
+
+def build_graph():
+    graph = Graph()
+    input_node = OPERATORS['Input']()
+    input_node.construct('input_data', 'Input', input_tensors=[], output_tensors=[
+        Tensor(name='input:0', dest_op=['reshape'], shape=[-1, -1, 4], dtype='fp32')])
+    reshape_node = OPERATORS['Reshape']()
+    reshape_node.construct('reshape', 'Reshape', input_tensors=[
+        Tensor(name='input:0', source_op=['input_data'], dest_op=['reshape'])],
+        output_tensors=[Tensor(name='reshape:0', source_op=['reshape'], dest_op=['ip'])],
+        attr={'dst_shape': '-1,4'})
+    ip_node = OPERATORS['InnerProduct']()
+    ip_node.construct('ip', 'InnerProduct', input_tensors=[
+        Tensor(name='reshape:0', source_op=['reshape'], dest_op=['ip']),
+        Tensor(name='weight:0', source_op=[], dest_op=['ip'], shape=[4, 3],
+               data=np.ones((4, 3), dtype=np.float32), dtype='fp32'),
+        Tensor(name='bias:0', source_op=[], dest_op=['ip'], shape=[3],
+               data=np.ones(3, dtype=np.float32), dtype='fp32')],
+        output_tensors=[Tensor(name='ip:0', source_op=['ip'], dest_op=['softmax'])],
+        attr={'src1_perm': '1,0'})
+    softmax_node = OPERATORS['Softmax']()
+    softmax_node.construct('softmax', 'Softmax', input_tensors=[
+        Tensor(name='ip:0', source_op=['ip'], dest_op=['softmax'])],
+        output_tensors=[Tensor(name='softmax:0', source_op=['softmax'])])
+    erf_node = OPERATORS['Erf']()
+    erf_node.construct('erf', 'Erf', input_tensors=[
+        Tensor(name='softmax:0', source_op=['softmax'], dest_op=['erf'])],
+        output_tensors=[Tensor(name='erf:0', source_op=['erf'])])
+    graph.insert_nodes(0, [input_node, reshape_node, ip_node, softmax_node, erf_node])
+    return graph
+
+
+class TestFusionReport(unittest.TestCase):
+    def test_infer_shapes(self):
+        graph = build_graph()
+        shapes = infer_shapes(graph, [[2, 5, 4]])
+        self.assertEqual(shapes['reshape:0'], [10, 4])
+        self.assertEqual(shapes['ip:0'], [10, 3])
+        self.assertEqual(shapes['softmax:0'], [10, 3])
+        self.assertIsNone(shapes['erf:0'])
+        # the dynamic dimensions are unknown without the input shapes
+        self.assertIsNone(infer_shapes(graph)['ip:0'])
+
+    def test_coverage_report(self):
+        report = coverage_report(build_graph(), FakeMatcher(), [[2, 5, 4]])
+        ip_flops = 2 * 10 * 3 * 4 + 10 * 3
+        self.assertEqual(report['total_flops'], ip_flops + 5 * 10 * 3)
+        self.assertEqual(report['patterns'], FakeMatcher.pattern_stats)
+        self.assertEqual(report['op_types']['InnerProduct']['fused'], 1)
+        self.assertAlmostEqual(report['op_types']['InnerProduct']['flops_share'],
+                               ip_flops / report['total_flops'])
+        unfused = report['unfused']
+        self.assertEqual([node['name'] for node in unfused], ['softmax', 'reshape', 'erf'])
+        self.assertFalse(unfused[-1]['supported'])
+        self.assertEqual(report['unknown_shape_nodes'], 1)
+        self.assertEqual(unfused[1]['bytes'], 2 * 40 * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
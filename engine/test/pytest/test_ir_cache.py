@@ -0,0 +1,75 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+import numpy as np
+from engine.compile import compile as engine_compile
+from engine.compile.ir_cache import IRCache
+from engine.compile.ops.op import OPERATORS
+from engine.compile.ops.tensor import Tensor
+from engine.compile.graph import Graph
+
+
+def build_graph():
+    graph = Graph()
+    input_node = OPERATORS['Input']()
+    input_node.construct('input_data', 'Input', input_tensors=[],
+                         output_tensors=[Tensor(name='input:0', dest_op=['matmul'],
+                                                shape=[-1, 4], dtype='fp32')])
+    matmul_node = OPERATORS['MatMul']()
+    matmul_node.construct('matmul', 'InnerProduct', input_tensors=[
+        Tensor(name='input:0', source_op=['input_data'], dest_op=['matmul']),
+        Tensor(name='weight:0', source_op=[], dest_op=['matmul'], shape=[4, 3],
+               data=np.arange(12, dtype=np.float32).reshape(4, 3), dtype='fp32')],
+        output_tensors=[Tensor(name='matmul:0', source_op=['matmul'])])
+    graph.insert_nodes(0, [input_node, matmul_node])
+    return graph
+
+
+class TestIRCache(unittest.TestCase):
+    cache_dir = './ir_cache_test'
+    model_file = './ir_cache_test_model.bin'
+
+    def setUp(self):
+        with open(self.model_file, 'wb') as f:
+            f.write(b'model')
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.remove(self.model_file)
+
+    def test_key(self):
+        cache = IRCache(self.cache_dir)
+        key = cache.key(self.model_file)
+        self.assertEqual(cache.key(self.model_file), key)
+        # the digest is reused while the file is not changed
+        with mock.patch('engine.compile.ir_cache._hash_files') as hash_files:
+            self.assertEqual(cache.key(self.model_file), key)
+            hash_files.assert_not_called()
+        with open(self.model_file, 'wb') as f:
+            f.write(b'another model')
+        self.assertNotEqual(cache.key(self.model_file), key)
+        self.assertIsNone(cache.key('./not_existing_model'))
+        self.assertIsNone(cache.key(object()))
+
+    def test_prepare_ir(self):
+        with mock.patch.object(engine_compile, 'start_pipeline',
+                               side_effect=lambda model, config=None: build_graph()) as pipeline:
+            graph = engine_compile.prepare_ir(self.model_file, cache_dir=self.cache_dir)
+            cached = engine_compile.prepare_ir(self.model_file, cache_dir=self.cache_dir)
+            self.assertEqual(pipeline.call_count, 1)
+            self.assertEqual([n.name for n in cached.nodes], [n.name for n in graph.nodes])
+            self.assertEqual(cached.weight_data, graph.weight_data)
+
+            # a broken IR is compiled again
+            key = IRCache(self.cache_dir).key(self.model_file)
+            with open(os.path.join(self.cache_dir, key, 'model.bin'), 'wb') as f:
+                f.write(b'broken')
+            engine_compile.prepare_ir(self.model_file, cache_dir=self.cache_dir)
+            self.assertEqual(pipeline.call_count, 2)
+            engine_compile.prepare_ir(self.model_file, cache_dir=self.cache_dir)
+            self.assertEqual(pipeline.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
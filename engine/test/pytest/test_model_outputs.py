@@ -0,0 +1,70 @@
+import os
+import shutil
+import unittest
+import numpy as np
+from engine_py import Model
+
+model_conf = """
+model:
+  name: ip_model
+  operator:
+    input_data:
+      type: Input
+      output:
+        src:
+          dtype: fp32
+          shape: [-1, 4]
+        weight:
+          dtype: fp32
+          shape: [4, 3]
+          location: [0, 48]
+    ip:
+      type: InnerProduct
+      input:
+        src: {}
+        weight: {}
+      output:
+        dst: {}
+      attr:
+        src1_perm: 1,0
+    output_data:
+      type: Output
+      input:
+        dst: {}
+"""
+
+
+class TestModelOutputs(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.makedirs('./model_outputs', exist_ok=True)
+        cls.weight = (np.arange(12, dtype=np.float32) * 0.5 - 2).reshape(4, 3)
+        cls.weight.tofile('./model_outputs/weight.bin')
+        with open('./model_outputs/conf.yaml', 'w') as f:
+            f.write(model_conf)
+        cls.model = Model('./model_outputs/conf.yaml', './model_outputs/weight.bin')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree('./model_outputs', ignore_errors=True)
+
+    def test_preallocated_outputs(self):
+        src = np.arange(8, dtype=np.float32).reshape(2, 4)
+        output = [np.zeros((2, 3), dtype=np.float32)]
+        self.model.forward([src], output=output)
+        self.assertTrue(np.allclose(output[0], src.dot(self.weight), atol=1e-4))
+
+    def test_mismatched_outputs(self):
+        src = np.arange(8, dtype=np.float32).reshape(2, 4)
+        for output in [[np.zeros((2, 4), dtype=np.float32)],
+                       [np.zeros((2, 3), dtype=np.int8)],
+                       [np.zeros((2, 3), dtype=np.float32)] * 2]:
+            with self.assertRaises(ValueError):
+                self.model.forward([src], output=output)
+        # the model is still usable after the mismatch
+        output = self.model.forward([src])
+        self.assertTrue(np.allclose(output[0], src.dot(self.weight), atol=1e-4))
+
+
+if __name__ == "__main__":
+    unittest.main()
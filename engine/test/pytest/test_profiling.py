@@ -0,0 +1,98 @@
+import os
+import json
+import shutil
+import unittest
+import numpy as np
+from engine_py import Model
+
+model_conf = """
+model:
+  name: ip_model
+  operator:
+    input_data:
+      type: Input
+      output:
+        src:
+          dtype: fp32
+          shape: [-1, 4]
+        weight:
+          dtype: fp32
+          shape: [4, 3]
+          location: [0, 48]
+    ip:
+      type: InnerProduct
+      input:
+        src: {}
+        weight: {}
+      output:
+        dst: {}
+      attr:
+        src1_perm: 1,0
+    output_data:
+      type: Output
+      input:
+        dst: {}
+"""
+
+
+class TestProfiling(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.makedirs('./profiling', exist_ok=True)
+        weight = (np.arange(12, dtype=np.float32) * 0.5 - 2).reshape(4, 3)
+        weight.tofile('./profiling/weight.bin')
+        with open('./profiling/conf.yaml', 'w') as f:
+            f.write(model_conf)
+        os.environ['ENGINE_PROFILING_EVENTS'] = '8'
+        cls.model = Model('./profiling/conf.yaml', './profiling/weight.bin')
+        del os.environ['ENGINE_PROFILING_EVENTS']
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree('./profiling', ignore_errors=True)
+
+    def setUp(self):
+        self.model.enable_profiling()
+        self.model.reset_profiling()
+
+    def tearDown(self):
+        self.model.enable_profiling(False)
+
+    def test_profiling_report(self):
+        self.model.forward([np.ones((2, 4), dtype=np.float32)])
+        self.model.forward([np.ones((5, 4), dtype=np.float32)])
+        report = {op['name']: op for op in self.model.profiling_report()}
+        self.assertEqual(report['ip']['type'], 'InnerProduct')
+        self.assertEqual(report['ip']['forward_count'], 2)
+        self.assertEqual(report['ip']['input_shapes'][0], [5, 4])
+        self.assertEqual(report['ip']['output_shapes'], [[5, 3]])
+        self.assertGreaterEqual(report['ip']['forward_ms'], 0)
+
+        self.model.reset_profiling()
+        report = {op['name']: op for op in self.model.profiling_report()}
+        self.assertEqual(report['ip']['forward_count'], 0)
+        self.assertEqual(json.loads(self.model.chrome_trace())['traceEvents'], [])
+
+    def test_chrome_trace(self):
+        src = np.ones((2, 4), dtype=np.float32)
+        self.model.forward([src])
+        events = json.loads(self.model.chrome_trace())['traceEvents']
+        ip_events = [event for event in events if event['name'] == 'ip']
+        self.assertIn('Forward', [event['cat'] for event in ip_events])
+        for event in events:
+            self.assertEqual(event['ph'], 'X')
+            self.assertGreaterEqual(event['dur'], 0)
+
+        # only the latest events are kept, in the order they were recorded
+        for _ in range(20):
+            self.model.forward([src])
+        events = json.loads(self.model.chrome_trace())['traceEvents']
+        self.assertEqual(len(events), 8)
+        timestamps = [event['ts'] for event in events]
+        self.assertEqual(timestamps, sorted(timestamps))
+        report = {op['name']: op for op in self.model.profiling_report()}
+        self.assertEqual(report['ip']['forward_count'], 21)
+
+
+if __name__ == "__main__":
+    unittest.main()
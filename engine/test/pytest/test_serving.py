@@ -0,0 +1,133 @@
+import threading
+import unittest
+import numpy as np
+from engine.serving import BatchingServer
+
+
+class SumModel(object):
+    """Returns the per token values and the per sequence sum of input_ids * input_mask"""
+
+    def __init__(self):
+        self.shapes = []
+        self.lock = threading.Lock()
+
+    def forward(self, inputs):
+        input_ids, input_mask = inputs
+        with self.lock:
+            self.shapes.append(input_ids.shape)
+        tokens = (input_ids * input_mask).astype(np.float32)
+        return [tokens[..., None], tokens.sum(axis=1)]
+
+
+class TestBatchingServer(unittest.TestCase):
+    def request(self, seq_len, value):
+        return [np.full((1, seq_len), value, dtype=np.int32),
+                np.ones((1, seq_len), dtype=np.int32)]
+
+    def test_coalesce_and_scatter(self):
+        model = SumModel()
+        with BatchingServer(model, max_batch_size=4, max_wait_ms=200) as server:
+            futures = [server.submit(self.request(3 + i, i + 1)) for i in range(4)]
+            results = [future.result(5) for future in futures]
+        self.assertEqual(model.shapes, [(4, 6)])
+        for i, (tokens, total) in enumerate(results):
+            self.assertEqual(tokens.shape, (1, 3 + i, 1))
+            self.assertEqual(total.tolist(), [(i + 1) * (3 + i)])
+        self.assertEqual(server.stats['batches'], 1)
+        self.assertEqual(server.stats['requests'], 4)
+
+    def test_buckets(self):
+        model = SumModel()
+        with BatchingServer(model, max_batch_size=8, max_wait_ms=50,
+                            seq_buckets=[4, 8]) as server:
+            futures = [server.submit(self.request(seq_len, 1)) for seq_len in [2, 3, 6, 10]]
+            results = [future.result(5) for future in futures]
+        self.assertEqual(sorted(model.shapes), [(1, 8), (1, 10), (2, 4)])
+        self.assertEqual([r[1].tolist() for r in results], [[2], [3], [6], [10]])
+
+    def test_max_batch_size(self):
+        model = SumModel()
+        with BatchingServer(model, max_batch_size=2, max_wait_ms=200) as server:
+            futures = [server.submit(self.request(4, i)) for i in range(5)]
+            for future in futures:
+                future.result(5)
+        self.assertEqual(sorted(s[0] for s in model.shapes), [1, 2, 2])
+
+    def test_multiple_streams(self):
+        models = [SumModel(), SumModel()]
+        with BatchingServer(models, max_batch_size=4, max_wait_ms=1) as server:
+            results = [server.infer(self.request(4, i), timeout=5) for i in range(6)]
+        self.assertEqual([r[1].tolist() for r in results], [[4 * i] for i in range(6)])
+        self.assertEqual(sum(len(m.shapes) for m in models), 6)
+
+    def test_streams_share_batches(self):
+        models = [SumModel(), SumModel()]
+        with BatchingServer(models, max_batch_size=4, max_wait_ms=200) as server:
+            futures = [server.submit(self.request(4, i)) for i in range(4)]
+            for future in futures:
+                future.result(5)
+        self.assertEqual(models[0].shapes + models[1].shapes, [(4, 4)])
+
+    def test_submit_while_closing(self):
+        server = BatchingServer(SumModel(), max_batch_size=4, max_wait_ms=1)
+        futures = []
+
+        def submit():
+            for i in range(50):
+                try:
+                    futures.append(server.submit(self.request(4, i)))
+                except RuntimeError:
+                    return
+
+        threads = [threading.Thread(target=submit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        server.close()
+        for thread in threads:
+            thread.join()
+        for future in futures:
+            self.assertEqual(future.result(5)[1].shape, (1,))
+
+    def test_output_layouts(self):
+        class FlatModel(object):
+            """Returns the flattened per token values, the pooled first tokens and the
+               number of rows of the batch"""
+
+            def forward(self, inputs):
+                input_ids, input_mask = inputs
+                tokens = (input_ids * input_mask).astype(np.float32)
+                return [tokens.reshape(-1, 1), tokens[:, :1].repeat(8, axis=1),
+                        np.array(input_ids.shape[0])]
+
+        with BatchingServer(FlatModel(), max_batch_size=2, max_wait_ms=200,
+                            output_layouts=['flat_seq', 'batch', 'shared']) as server:
+            futures = [server.submit(self.request(seq_len, seq_len))
+                       for seq_len in [3, 8]]
+            results = [future.result(5) for future in futures]
+        self.assertEqual([r[0].shape for r in results], [(3, 1), (8, 1)])
+        self.assertEqual(results[0][0].ravel().tolist(), [3] * 3)
+        self.assertEqual([r[1].tolist() for r in results], [[[3] * 8], [[8] * 8]])
+        self.assertEqual([int(r[2]) for r in results], [2, 2])
+
+        # the outputs not matching their layout fail the requests instead of leaking
+        # the rows of the others
+        with BatchingServer(FlatModel(), max_batch_size=2, max_wait_ms=200) as server:
+            futures = [server.submit(self.request(4, i)) for i in range(2)]
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result(5)
+
+    def test_exception(self):
+        class BrokenModel(object):
+            def forward(self, inputs):
+                raise RuntimeError('broken model')
+
+        with BatchingServer(BrokenModel(), max_wait_ms=1) as server:
+            with self.assertRaises(RuntimeError):
+                server.infer(self.request(4, 1), timeout=5)
+        with self.assertRaises(RuntimeError):
+            server.submit(self.request(4, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
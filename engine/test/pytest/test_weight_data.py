@@ -0,0 +1,61 @@
+import os
+import shutil
+import unittest
+import numpy as np
+from engine.compile.ops.op import OPERATORS
+from engine.compile.ops.tensor import Tensor
+from engine.compile.graph import Graph
+from engine.compile.graph_utils import parallel_map
+
+
+class TestWeightData(unittest.TestCase):
+    @classmethod
+    def tearDownClass(self):
+        shutil.rmtree('./weight_ir', ignore_errors=True)
+
+    def build_graph(self):
+        graph = Graph()
+        input_node = OPERATORS['Input']()
+        input_node.construct('input_data', 'Input', input_tensors=[],
+                             output_tensors=[Tensor(name='input:0', dest_op=['matmul'])])
+        weight = np.arange(12, dtype=np.float32).reshape(3, 4).T
+        bias = np.array([1, 2, 3], dtype=np.int32)
+        matmul_node = OPERATORS['MatMul']()
+        matmul_node.construct('matmul', 'InnerProduct', input_tensors=[
+            Tensor(name='input:0', source_op=['input_data'], dest_op=['matmul']),
+            Tensor(name='weight:0', source_op=[], dest_op=['matmul'], shape=[4, 3],
+                   data=weight, dtype='fp32'),
+            Tensor(name='bias:0', source_op=[], dest_op=['matmul'], shape=[3],
+                   data=bias, dtype='s32')],
+            output_tensors=[Tensor(name='matmul:0', source_op=['matmul'])])
+        graph.insert_nodes(0, [input_node, matmul_node])
+        return graph, weight, bias
+
+    def test_weight_data(self):
+        graph, weight, bias = self.build_graph()
+        weight_data = graph.weight_data
+        self.assertEqual(weight_data, weight.tobytes() + bias.tobytes())
+        tensors = graph.nodes[1].input_tensors
+        self.assertEqual(tensors[1].location, [0, weight.nbytes])
+        self.assertEqual(tensors[2].location, [weight.nbytes, bias.nbytes])
+        self.assertEqual([t.name for t in graph.nodes[0].output_tensors],
+                         ['input:0', 'weight:0', 'bias:0'])
+        # the const tensors are not appended to the input node twice
+        self.assertEqual(graph.weight_data, weight_data)
+        self.assertEqual(len(graph.nodes[0].output_tensors), 3)
+
+    def test_save(self):
+        graph, weight, bias = self.build_graph()
+        graph.save('./weight_ir')
+        with open(os.path.join('./weight_ir', 'model.bin'), 'rb') as f:
+            self.assertEqual(f.read(), weight.tobytes() + bias.tobytes())
+
+    def test_parallel_map(self):
+        items = list(range(100))
+        for workers in [1, 4]:
+            self.assertEqual(parallel_map(lambda x: x * x, items, workers),
+                             [x * x for x in items])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -152,6 +152,21 @@ class Adaptor(object):
         '''
         raise NotImplementedError
 
+    def quantization_sensitivity(self, model, dataloader, op_list, iterations=1):
+        '''The function is used by tune strategy class for ranking the fallback of ops
+           by a cheap estimate of their quantization error on the fp32 model.
+
+           Args:
+               model (object): The fp32 model.
+               dataloader (object): The calibration dataloader.
+               op_list (list): The (op name, op type) of the ops to estimate.
+               iterations (int): The number of calibration batches.
+
+           Return:
+               dict or None: The error of each op, None if not supported by the framework.
+        '''
+        return None
+
     def quantize_input(self, model):
         ''' quantize the model to be able to take quantized input
 
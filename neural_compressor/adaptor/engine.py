@@ -213,7 +213,7 @@ class EngineAdaptor(Adaptor):
                 predictions, labels = postprocess((predictions, labels))
             if metric is not None and not self.fp32_preds_as_label:
                 metric.update(predictions, labels)
-            if idx + 1 == iteration:
+            if idx + 1 == iteration or (measurer is not None and measurer.converged):
                 break
 
         if self.fp32_preds_as_label:
@@ -22,6 +22,7 @@
 # --------------------------------------------------------------------------
 import os
 import pickle
+import re
 import struct
 from pathlib import Path
 from engine.compile.ops.op import OPERATORS, Tensor
@@ -59,11 +60,6 @@ class EngineQuantizer:
 
     def _get_tensors_min_max(self):
         self._matmul_node_input_fp32()
-        net = self.model.graph.dump_tensor()
-        output_tensors = [content['input'] for content in \
-            net['model']['operator'].values() if content['type'] == 'Output'][0]
-        for output_tensor_name in output_tensors:
-            self._tensors_min_max[output_tensor_name] = [float('inf'), float('-inf')]
         # get min/max of const tensors
         for node in self.model.nodes:
             weight_perm = node.attr['src1_perm'] if node.op_type == "InnerProduct" else None
@@ -76,36 +72,58 @@ class EngineQuantizer:
                     self._get_min_max(input_tensor, weight_perm, quantize_mode,
                                       self._tensors_min_max[input_tensor.name])
 
+        # only expose the activations whose ranges are used by quantization
+        calib_tensors = self._calib_tensor_names()
+        for tensor_name in calib_tensors:
+            self._tensors_min_max[tensor_name] = [np.array(np.inf, dtype=np.float32),
+                                                  np.array(-np.inf, dtype=np.float32)]
+        net = self.model.graph.dump_tensor(
+            ['^' + re.escape(tensor_name) + '$' for tensor_name in calib_tensors])
         self.model.graph.engine_init(net)
         for idx, (inputs, labels) in enumerate(self.dataloader):
             if idx > self.iterations:
                 break
             else:
-                # inference and put the tensors data to graph
+                # reduce the activations of the batch into the running min/max, the
+                # activations are per_tensor quantized
                 results = self.model.graph.inference(inputs)
                 for tensor_name, tensor_data in results.items():
-                    for node in self.model.nodes:
-                        for input_tensor in node.input_tensors:
-                            if tensor_name == input_tensor.name:
-                                input_tensor.data = tensor_data
-                                if input_tensor.dtype == None:
-                                    input_tensor.dtype = 'fp32'
-                        for output_tensor in node.output_tensors:
-                            if tensor_name == output_tensor.name:
-                                output_tensor.data = tensor_data
-                                if output_tensor.dtype == None:
-                                    output_tensor.dtype = 'fp32'
-
-                # get min/max of output tensors
-                for node in self.model.nodes:
-                    for output_tensor in node.output_tensors:
-                        if output_tensor.name in self._tensors_min_max and output_tensor.source_op:
-                            quantize_mode = 'per_tensor' if node.name not in self.config or \
-                                self.config[node.name] =='fp32' else\
-                                self.config[node.name]['weight']['granularity']
-                            self._get_min_max(output_tensor, None,
-                                              quantize_mode,
-                                              self._tensors_min_max[output_tensor.name])
+                    if tensor_name in calib_tensors and np.size(tensor_data) > 0:
+                        tensor_min_max = self._tensors_min_max[tensor_name]
+                        np.minimum(tensor_min_max[0], np.min(tensor_data), out=tensor_min_max[0])
+                        np.maximum(tensor_min_max[1], np.max(tensor_data), out=tensor_min_max[1])
+                del results
+        # the ranges always contain 0
+        for tensor_name in calib_tensors:
+            tensor_min_max = self._tensors_min_max[tensor_name]
+            np.minimum(tensor_min_max[0], 0., out=tensor_min_max[0])
+            np.maximum(tensor_min_max[1], 0., out=tensor_min_max[1])
+        self._mark_fp32_tensors()
+
+    def _calib_tensor_names(self):
+        """Get the activation tensors whose ranges are used by _insert_quantize_info,
+           _insert_quantize_op and _quant_bias.
+        """
+        tensor_names = OrderedDict()
+        for node in self.model.nodes:
+            if node.op_type not in (self._quantize_op + self._part_quantize_op):
+                continue
+            if node.op_type not in self._quantize_output_op:
+                for tensor in node.input_tensors[:2]:
+                    if tensor.source_op:
+                        tensor_names[tensor.name] = True
+            if node.op_type not in self._quantize_input_op:
+                for tensor in node.output_tensors:
+                    if tensor.source_op:
+                        tensor_names[tensor.name] = True
+        return tensor_names
+
+    def _mark_fp32_tensors(self):
+        # the activations of the fp32 model are fp32 tensors
+        for node in self.model.nodes:
+            for tensor in node.input_tensors + node.output_tensors:
+                if tensor.source_op and tensor.dtype == None:
+                    tensor.dtype = 'fp32'
 
     def _get_min_max(self, tensor, weight_perm, quantize_mode, tensor_min_max):
         tensor_name = tensor.name
@@ -22,7 +22,8 @@ import logging
 from neural_compressor.adaptor.adaptor import adaptor_registry, Adaptor
 from neural_compressor.adaptor.query import QueryBackendCapability
 from neural_compressor.utils.utility import dump_elapsed_time, LazyImport, singleton, \
-                                            GLOBAL_STATE, MODE
+                                            GLOBAL_STATE, MODE, Prefetcher, AsyncRunner
+from neural_compressor.utils import options
 from collections import OrderedDict
 from neural_compressor.adaptor.mxnet_utils.util import *
 from collections import OrderedDict
@@ -214,42 +215,48 @@ class MxNetAdaptor(Adaptor):
             for _ in range(iteration):
                 yield True
 
+        pipeline = options.evaluation.pipeline
+
         def pre_batch(net, batch):
             if measurer is not None:
                 measurer.start()
 
-        def post_batch(net, batch, outs):
-            if measurer is not None:
-                measurer.end()
-            _, labels = batch
-            outs = ensure_list(outs)
-            labels = ensure_list(labels)
-            assert len(labels) == len(outs) == 1
-
-            out = outs[0].asnumpy()
-            label = labels[0].asnumpy()
+        def update_metric(out, label):
             if postprocess is not None:
                 out, label = postprocess((out, label))
             if metric is not None:
                 metric.update(out, label)
 
+        def eval_func(data_x):
+            sym_model, dataloader = prepare_model_data(nc_model, self.ctx, data_x)
+            with Prefetcher(dataloader.dataloader, pipeline.prefetch_depth) as batches, \
+                 AsyncRunner(update_metric, pipeline.postprocess_depth) as runner:
+
+                def post_batch(net, batch, outs):
+                    if measurer is not None:
+                        measurer.end()
+                    _, labels = batch
+                    outs = ensure_list(outs)
+                    labels = ensure_list(labels)
+                    assert len(labels) == len(outs) == 1
+                    # outputs are copied to numpy here since the executor reuses
+                    # its output buffers on the next forward
+                    runner.submit(outs[0].asnumpy(), labels[0].asnumpy())
+
+                run_forward(sym_model, self.ctx, DataLoaderWrap(batches, dataloader.input_desc),
+                            b_filter(), pre_batch=pre_batch, post_batch=post_batch)
+
         if isinstance(data_x, BaseDataLoader) and not self.benchmark:
             try:
-                sym_model, dataloader = prepare_model_data(nc_model, self.ctx, data_x)
-                run_forward(sym_model, self.ctx, dataloader, b_filter(),
-                            pre_batch=pre_batch, post_batch=post_batch)
+                eval_func(data_x)
             except Exception:  # pragma: no cover
                 logger.warning(
                     "Fail to forward with batch size={}, set to {} now.".
                     format(data_x.batch_size, 1))
                 data_x.batch(1)
-                sym_model, dataloader = prepare_model_data(nc_model, self.ctx, data_x)
-                run_forward(sym_model, self.ctx, dataloader, b_filter(),
-                            pre_batch=pre_batch, post_batch=post_batch)
+                eval_func(data_x)
         else:  # pragma: no cover
-            sym_model, dataloader = prepare_model_data(nc_model, self.ctx, data_x)
-            run_forward(sym_model, self.ctx, dataloader, b_filter(),
-                        pre_batch=pre_batch, post_batch=post_batch)
+            eval_func(data_x)
         return metric.result() if metric is not None else 0
 
     @dump_elapsed_time('Query quantizable operators')
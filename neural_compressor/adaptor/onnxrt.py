@@ -28,7 +28,8 @@ from neural_compressor.adaptor.adaptor import adaptor_registry, Adaptor
 from neural_compressor.adaptor.query import QueryBackendCapability
 from neural_compressor.utils.utility import LazyImport, dump_elapsed_time, \
                                             GLOBAL_STATE, MODE
-from ..utils.utility import OpPrecisionStatistics
+from ..utils.utility import OpPrecisionStatistics, Prefetcher, AsyncRunner
+from ..utils import options
 from ..experimental.data.dataloaders.base_dataloader import BaseDataLoader
 import math
 
@@ -53,6 +54,8 @@ class ONNXRTAdaptor(Adaptor):
         self.backend = framework_specific_info["backend"]
         self.work_space = framework_specific_info["workspace_path"]
         self.graph_optimization = framework_specific_info["graph_optimization"]
+        # the opt-in activation calibration algorithms besides the default capability
+        self.activation_algorithms = framework_specific_info.get("activation_algorithms", [])
         self.benchmark = (GLOBAL_STATE.STATE == MODE.BENCHMARK)
         os.makedirs(self.work_space, exist_ok=True)
         self.pre_optimized_model = None
@@ -63,6 +66,8 @@ class ONNXRTAdaptor(Adaptor):
         self.fp32_preds_as_label = False
         self.quantize_config = {} # adaptor should know current configs at any time
         self.quantize_params = {} # adaptor should know current params at any time
+        # quantized weights of the pre-optimized model, reused by the following trials
+        self.weight_cache = {}
 
     @dump_elapsed_time("Pass quantize model")
     def quantize(self, tune_cfg, model, data_loader, q_func=None):
@@ -141,7 +146,8 @@ class ONNXRTAdaptor(Adaptor):
             backend,
             self.static,
             quantize_params,
-            self.quantizable_op_types)
+            self.quantizable_op_types,
+            self.weight_cache if model is self.pre_optimized_model else None)
         quantizer.quantize_model()
         tmp_model.q_config = self._generate_qconfig(model.model, tune_cfg, quantize_params)
         tmp_model.model = quantizer.model.model
@@ -292,17 +298,21 @@ class ONNXRTAdaptor(Adaptor):
 
     def _get_quantize_params(self, model, data_loader, quantize_config, iterations):
         from neural_compressor.adaptor.ox_utils.onnxrt_mid import ONNXRTAugment
+        from neural_compressor.adaptor.ox_utils.calibration import CALIB_MODES
         from neural_compressor.model.onnx_model import ONNXModel
         if not isinstance(model, ONNXModel):
             model = ONNXModel(model)
         black_nodes = [node for node in quantize_config if quantize_config[node]=='fp32']
         white_nodes = [node for node in quantize_config if quantize_config[node]!='fp32']
+        node_calib_modes = {node: CALIB_MODES[quantize_config[node]['activation']['algorithm']] \
+                            for node in white_nodes if isinstance(quantize_config[node], dict) \
+                            and 'activation' in quantize_config[node]}
         augment = ONNXRTAugment(model, \
                   data_loader, self.quantizable_op_types, \
                   os.path.join(self.work_space, 'augmented_model.onnx'), \
                   black_nodes=black_nodes, white_nodes=white_nodes, \
                   iterations=list(range(0, quantize_config['calib_iteration'])))
-        quantize_params = augment.dump_calibration()
+        quantize_params = augment.dump_calibration(node_calib_modes=node_calib_modes)
         return quantize_params
 
     def inspect_tensor(self, model, data_loader, op_list=[],
@@ -404,14 +414,20 @@ class ONNXRTAdaptor(Adaptor):
         sess_options.graph_optimization_level = level
         sess_options.optimized_model_filepath = os.path.join(self.work_space, \
             "Optimized_model.onnx")
-        _ = ort.InferenceSession(model.model.SerializeToString(), sess_options)
+        if model.is_large_model:
+            sess_options.add_session_config_entry(
+                "session.optimized_model_external_initializers_file_name",
+                "Optimized_model.onnx.data")
+        _ = model.create_session(sess_options, os.path.join(self.work_space, "split_model.onnx"))
         tmp_model = onnx.load(sess_options.optimized_model_filepath)
         model.model = self._replace_gemm_with_matmul(tmp_model).model \
             if self.graph_optimization.gemm2matmul else tmp_model
         model.model = self._rename_node(model.model)
         self.pre_optimized_model = model
+        self.weight_cache = {}
 
     def _rename_node(self, model):
+        from neural_compressor.model.onnx_model import save_model
         node_names = [i.name for i in model.graph.node]
         if len(set(node_names)) < len(node_names):
             logger.warning("This model has nodes with the same name, please check \
@@ -420,7 +436,7 @@ class ONNXRTAdaptor(Adaptor):
         for idx, node in enumerate(model.graph.node):
             if node_names.count(node.name) > 1:
                 node.name = node.op_type + '_nc_rename_' + str(idx)
-        onnx.save(model, os.path.join(self.work_space, "renamed_model.onnx")) 
+        save_model(model, os.path.join(self.work_space, "renamed_model.onnx"))
         return model
 
     def _replace_gemm_with_matmul(self, model):
@@ -524,6 +540,8 @@ class ONNXRTAdaptor(Adaptor):
                 op_capability = \
                     self.query_handler.get_quantization_capability()[\
                                    'int8'][op.op_type]  # pylint: disable=no-member
+            if self.static and self.activation_algorithms:
+                op_capability = self._add_activation_algorithms(op_capability)
             if op.op_type not in optype_wise.keys():
                 optype_wise[op.op_type] = copy.deepcopy(op_capability)
 
@@ -532,6 +550,18 @@ class ONNXRTAdaptor(Adaptor):
 
         return {'optypewise': optype_wise, 'opwise': op_wise}
 
+    def _add_activation_algorithms(self, op_capability):
+        """Add the histogram calibrations the user asked for to the activation algorithms
+           of the capability, they are not tuned by default."""
+        from neural_compressor.adaptor.ox_utils.calibration import CALIB_MODES
+        op_capability = copy.deepcopy(op_capability)
+        activation = op_capability.get('activation', {})
+        if 'algorithm' in activation:
+            for algorithm in self.activation_algorithms:
+                if algorithm in CALIB_MODES and algorithm not in activation['algorithm']:
+                    activation['algorithm'].append(algorithm)
+        return op_capability
+
     def _cfg_to_quantize_config(self, tune_cfg):
         quantize_config = {}
         quantize_config['calib_iteration'] = tune_cfg['calib_iteration']
@@ -601,7 +631,8 @@ class ONNXRTAdaptor(Adaptor):
             cores_per_instance = int(os.environ.get('CORES_PER_INSTANCE'))
             assert cores_per_instance > 0, "benchmark cores_per_instance should greater than 0"
             sess_options.intra_op_num_threads = cores_per_instance
-        session = ort.InferenceSession(input_graph.model.SerializeToString(), sess_options)
+        session = input_graph.create_session(sess_options,
+                                             os.path.join(self.work_space, "eval_model.onnx"))
         if metric:
             metric.reset()
             if hasattr(metric, "compare_label") and not metric.compare_label:
@@ -612,40 +643,47 @@ class ONNXRTAdaptor(Adaptor):
         len_inputs = len(session.get_inputs())
         inputs_names = [session.get_inputs()[i].name for i in range(len_inputs)]
 
+        pipeline = options.evaluation.pipeline
+
+        def update_metric(predictions, labels):
+            if postprocess is not None:
+                predictions, labels = postprocess((predictions, labels))
+            if metric is not None and not self.fp32_preds_as_label:
+                metric.update(predictions, labels)
+
         def eval_func(dataloader):
-            for idx, (inputs, labels) in enumerate(dataloader):
-                if not isinstance(labels, list):
-                    labels = [labels]
-                if len_inputs == 1:
-                    ort_inputs.update({inputs_names[0]: inputs})
-                else:
-                    assert len_inputs == len(inputs), \
-                        'number of input tensors must align with graph inputs'  
+            with Prefetcher(dataloader, pipeline.prefetch_depth) as batches, \
+                 AsyncRunner(update_metric, pipeline.postprocess_depth) as runner:
+                for idx, (inputs, labels) in enumerate(batches):
+                    if not isinstance(labels, list):
+                        labels = [labels]
+                    if len_inputs == 1:
+                        ort_inputs.update({inputs_names[0]: inputs})
+                    else:
+                        assert len_inputs == len(inputs), \
+                            'number of input tensors must align with graph inputs'
+
+                        for i in range(len_inputs):
+                            # in case dataloader contains non-array input
+                            if not isinstance(inputs[i], np.ndarray):
+                                ort_inputs.update({inputs_names[i]: np.array(inputs[i])})
+                            else:
+                                ort_inputs.update({inputs_names[i]: inputs[i]})
+
+                    if measurer is not None:
+                        measurer.start()
+                        predictions = session.run(None, ort_inputs)
+                        measurer.end()
+                    else:
+                        predictions = session.run(None, ort_inputs)
 
-                    for i in range(len_inputs):
-                        # in case dataloader contains non-array input
-                        if not isinstance(inputs[i], np.ndarray):
-                            ort_inputs.update({inputs_names[i]: np.array(inputs[i])})
-                        else:
-                            ort_inputs.update({inputs_names[i]: inputs[i]})   
+                    if self.fp32_preds_as_label:
+                        self.fp32_results.append(predictions) if fp32_baseline else \
+                            results.append(predictions)
 
-                if measurer is not None:
-                    measurer.start()
-                    predictions = session.run(None, ort_inputs)
-                    measurer.end()
-                else:
-                    predictions = session.run(None, ort_inputs)
-
-                if self.fp32_preds_as_label:
-                    self.fp32_results.append(predictions) if fp32_baseline else \
-                        results.append(predictions)
-
-                if postprocess is not None:
-                    predictions, labels = postprocess((predictions, labels))
-                if metric is not None and not self.fp32_preds_as_label:
-                    metric.update(predictions, labels)
-                if idx + 1 == iteration:
-                    break
+                    runner.submit(predictions, labels)
+                    if idx + 1 == iteration or (measurer is not None and measurer.converged):
+                        break
 
         if isinstance(dataloader, BaseDataLoader) and not self.benchmark:
             try:
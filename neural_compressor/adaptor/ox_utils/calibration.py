@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming collectors of calibration statistics for ONNX Runtime models.
+
+The collectors reduce each calibration iteration into running statistics, so the
+memory they hold does not depend on the number of calibration iterations.
+"""
+
+import numpy as np
+
+# map from the activation algorithm in tuning config to the calibration mode
+CALIB_MODES = {'minmax': 'naive', 'percentile': 'percentile', 'kl': 'kl'}
+
+
+class MinMaxCollector(object):
+    """Keep the running min and max of a tensor."""
+
+    def __init__(self):
+        self.min = None
+        self.max = None
+
+    def collect(self, data):
+        rmin, rmax = float(np.min(data)), float(np.max(data))
+        self.min = rmin if self.min is None else min(self.min, rmin)
+        self.max = rmax if self.max is None else max(self.max, rmax)
+
+    def get_range(self):
+        return self.min, self.max
+
+
+class HistogramCollector(object):
+    """Keep a fixed-bin histogram of a tensor over a symmetric range [-threshold, threshold].
+
+       When a new iteration exceeds the current range, the collected histogram is
+       re-binned into the wider range, so the number of bins never grows.
+
+    Args:
+        num_bins (int): number of histogram bins.
+    """
+
+    def __init__(self, num_bins=2048):
+        self.num_bins = num_bins
+        self.hist = None
+        self.threshold = None
+        self.minmax = MinMaxCollector()
+
+    def collect(self, data):
+        data = np.asarray(data)
+        if data.size == 0:
+            return
+        rmin, rmax = float(data.min()), float(data.max())
+        self.minmax.collect((rmin, rmax))
+        # a tiny positive range avoids degenerated bins for all-zero tensors
+        threshold = max(abs(rmin), abs(rmax), np.finfo(np.float32).tiny)
+        if self.hist is None:
+            self.threshold = threshold
+            self.hist = np.zeros(self.num_bins, dtype=np.float64)
+        elif threshold > self.threshold:
+            old_edges = np.linspace(-self.threshold, self.threshold, self.num_bins + 1)
+            old_centers = (old_edges[:-1] + old_edges[1:]) / 2
+            self.hist, _ = np.histogram(old_centers, bins=self.num_bins,
+                                        range=(-threshold, threshold), weights=self.hist)
+            self.threshold = threshold
+        hist, _ = np.histogram(data, bins=self.num_bins,
+                               range=(-self.threshold, self.threshold))
+        self.hist += hist
+
+    @property
+    def bin_width(self):
+        return 2 * self.threshold / self.num_bins
+
+    def get_range(self):
+        return self.minmax.get_range()
+
+    def get_percentile_range(self, percentile=99.999):
+        """Get the range covering the central `percentile` of the collected values."""
+        rmin, rmax = self.minmax.get_range()
+        total = self.hist.sum()
+        if total == 0:
+            return rmin, rmax
+        cdf = np.cumsum(self.hist) / total
+        tail = (100. - percentile) / 200.
+        low_idx = int(np.searchsorted(cdf, tail, side='left'))
+        high_idx = int(np.searchsorted(cdf, 1. - tail, side='left'))
+        low = -self.threshold + low_idx * self.bin_width
+        high = -self.threshold + (min(high_idx, self.num_bins - 1) + 1) * self.bin_width
+        return max(rmin, low), min(rmax, high)
+
+    def get_entropy_range(self, num_quantized_bins=255):
+        """Get the symmetric range whose quantized distribution has the minimal KL divergence
+           to the collected distribution.
+        """
+        rmin, rmax = self.minmax.get_range()
+        hist = self.hist
+        zero_bin = self.num_bins // 2
+        start = (num_quantized_bins + 1) // 2
+        if hist.sum() == 0 or start >= zero_bin:
+            return rmin, rmax
+
+        best_divergence, best_bins = None, zero_bin
+        for i in range(start, zero_bin + 1):
+            sliced = hist[zero_bin - i:zero_bin + i]
+            reference = sliced.copy()
+            # outliers are clipped into the boundary bins
+            reference[0] += hist[:zero_bin - i].sum()
+            reference[-1] += hist[zero_bin + i:].sum()
+            nonzeros = (sliced != 0).astype(np.float64)
+            edges = np.linspace(0, sliced.size, num_quantized_bins + 1).astype(np.int64)[:-1]
+            quantized = np.add.reduceat(sliced, edges)
+            counts = np.add.reduceat(nonzeros, edges)
+            expanded = np.divide(quantized, counts, out=np.zeros_like(quantized),
+                                 where=counts != 0)
+            candidate = np.repeat(expanded, np.diff(np.append(edges, sliced.size))) * nonzeros
+            divergence = _kl_divergence(reference, candidate)
+            if best_divergence is None or divergence < best_divergence:
+                best_divergence, best_bins = divergence, i
+        threshold = best_bins * self.bin_width
+        return max(rmin, -threshold), min(rmax, threshold)
+
+
+def _kl_divergence(reference, candidate):
+    reference = reference / reference.sum()
+    candidate_sum = candidate.sum()
+    if candidate_sum == 0:
+        return np.inf
+    candidate = candidate / candidate_sum
+    mask = reference != 0
+    # bins only present in the reference distribution get a small probability
+    candidate = np.maximum(candidate[mask], np.finfo(np.float64).eps)
+    return float(np.sum(reference[mask] * np.log(reference[mask] / candidate)))
@@ -32,7 +32,7 @@ from onnx import onnx_pb as onnx_proto
 from onnxruntime import SessionOptions, InferenceSession, GraphOptimizationLevel
 
 from onnxruntime.quantization.quant_utils import QuantizationMode, QuantizedValueType
-from onnxruntime.quantization.quant_utils import find_by_name, get_elem_index, get_mul_node, \
+from onnxruntime.quantization.quant_utils import get_elem_index, get_mul_node, \
                                 generate_identified_filename, attribute_to_kwarg, type_to_name
 from onnxruntime.quantization.quant_utils import onnx_domain, __producer__, __version__
 
@@ -60,7 +60,7 @@ def _get_qrange_for_qType(qType, reduce_range=False):
 
 class ONNXQuantizer:
     def __init__(self, model, q_config, mode, static, quantization_params,
-                 op_types_to_quantize):
+                 op_types_to_quantize, weight_cache=None):
         self.model = ONNXModel(model)
         self.config = q_config
         self.reduce_range = False if CpuInfo().vnni else True
@@ -88,6 +88,9 @@ class ONNXQuantizer:
         self._quantized_weights = []
         # Map of all original value names to quantized value names
         self.quantized_value_map = {}
+        # Quantized data of the weights shared by the quantizers of the tuning trials,
+        # keyed by the weight name and its quantization parameters
+        self.weight_cache = weight_cache
 
     def check_opset_version(self):
         ai_onnx_domain = [
@@ -151,8 +154,8 @@ class ONNXQuantizer:
                 # TODO: convert it to the specified input_type
                 scale_tensor_name = curr_node.input[1]
                 zp_tensor_name = curr_node.input[2]
-                initializer_scale = find_by_name(scale_tensor_name, self.model.initializer())
-                initializer_zp = find_by_name(zp_tensor_name, self.model.initializer())
+                initializer_scale = self.model.get_initializer(scale_tensor_name)
+                initializer_zp = self.model.get_initializer(zp_tensor_name)
                 zp_and_scale = [
                     onnx.numpy_helper.to_array(initializer_zp),
                     onnx.numpy_helper.to_array(initializer_scale)
@@ -211,6 +214,7 @@ class ONNXQuantizer:
         # /python-generated?csw=1#fields
         self.model.graph().ClearField('node')
         self.model.graph().node.extend(self.new_nodes)
+        self.model.update()
 
         # Remove weights which are already quantized from graph.
         self._remove_quantized_weights()
@@ -230,11 +234,11 @@ class ONNXQuantizer:
         return weights
 
     def is_input_a_weight(self, input_name):
-        initializer = find_by_name(input_name, self.model.initializer())
+        initializer = self.model.get_initializer(input_name)
         return initializer is not None
 
     def is_valid_quantize_weight(self, weight_name):
-        weight = find_by_name(weight_name, self.model.initializer())
+        weight = self.model.get_initializer(weight_name)
         return weight is not None and weight.data_type == onnx_proto.TensorProto.FLOAT
 
     def _remove_quantized_weights(self):
@@ -243,19 +247,15 @@ class ONNXQuantizer:
                 - use output from DequantizeLinear as input if they do not support quantization.
                 - use quantized weight if they support quantization.
         '''
-        for weight in self._quantized_weights:
-            # Remove existing weight initializer
-            self.model.initializer().remove(weight.initializer)
-
-            # Removing input weight to a convolution
-            try:
-                weight_input = next(val for val in self.model.graph().input \
-                                     if val.name == weight.name)
-                self.model.graph().input.remove(weight_input)
-            except StopIteration:
-                if self.model.ir_version() < 4:
-                    print("Warning: invalid weight name {} found in the graph \
-                          (not a graph input)".format(weight.name))
+        # Remove existing weight initializers
+        self.model.remove_initializers([weight.initializer for weight in self._quantized_weights])
+
+        # Removing input weights to a convolution
+        not_found = self.model.remove_inputs([weight.name for weight in self._quantized_weights])
+        if self.model.ir_version() < 4:
+            for name in not_found:
+                print("Warning: invalid weight name {} found in the graph \
+                      (not a graph input)".format(name))
 
     def _update_weight(self, weight):
         '''
@@ -283,17 +283,34 @@ class ONNXQuantizer:
             zero_scale_shape = [weight.initializer.dims[weight.axis]]
         else:  # scale and zero point must be scalar
             zero_scale_shape = []
-        zero_point_type = weight.qType
-        scale_initializer = onnx.helper.make_tensor(scale_name, onnx_proto.TensorProto.FLOAT, 
-                                                    zero_scale_shape, weight.scales)
-        zero_initializer = onnx.helper.make_tensor(zero_point_name, zero_point_type, 
-                                                    zero_scale_shape, weight.zero_points)
+        zero_point_type = onnx.mapping.TENSOR_TYPE_TO_NP_TYPE[weight.qType]
+        scale_initializer = onnx.numpy_helper.from_array(np.asarray(weight.scales,
+            dtype=np.float32).reshape(zero_scale_shape), scale_name)
+        zero_initializer = onnx.numpy_helper.from_array(np.asarray(weight.zero_points,
+            dtype=zero_point_type).reshape(zero_scale_shape), zero_point_name)
 
-        self.model.initializer().extend([packed_weight_initializer, scale_initializer, 
-                                                    zero_initializer])
+        self.model.add_initializers([packed_weight_initializer, scale_initializer,
+                                     zero_initializer])
 
         self._quantized_weights.append(weight)
 
+    def _quantize_weight_data(self, initializer, qType, scheme, axis=None):
+        '''
+            Quantize the data of the initializer, or reuse the result of a previous
+            quantizer from weight_cache if the weight is quantized with the same parameters.
+            :return: minimum, maximum, zero point, scale, and quantized weights
+        '''
+        key = (initializer.name, tuple(initializer.dims), qType, scheme, axis,
+               self.reduce_range)
+        if self.weight_cache is not None and key in self.weight_cache:
+            return self.weight_cache[key]
+        weights = self.tensor_proto_to_array(initializer)
+        result = quantize_data(weights, _get_qrange_for_qType(qType, self.reduce_range),
+                               qType, scheme, axis=axis)
+        if self.weight_cache is not None:
+            self.weight_cache[key] = result
+        return result
+
     def _get_quantized_weight(self, initializer, qType, scheme):
         '''
             :param initializer: TensorProto initializer
@@ -301,13 +318,11 @@ class ONNXQuantizer:
             :param qType: type to quantize to
             :return: Weight class with quantization information
         '''
-        weights_data = self.tensor_proto_to_array(initializer)
-        rmin, rmax, zero_point, scale, quantized_weights_data = quantize_data(
-            weights_data.flatten().tolist(), _get_qrange_for_qType(qType, \
-            self.reduce_range), qType, scheme)
+        rmin, rmax, zero_point, scale, quantized_weights_data = self._quantize_weight_data(
+            initializer, qType, scheme)
         weight = QuantizedInitializer(initializer.name,
                                       initializer, [rmin], [rmax], [zero_point], [scale],
-                                      weights_data,
+                                      None,
                                       quantized_weights_data,
                                       axis=None,
                                       qType=qType)
@@ -582,7 +597,7 @@ class ONNXQuantizer:
             return: the name of output
         '''
         # Add tensors for the shape to be reshaped to
-        weight = find_by_name(node.input[1], self.model.initializer())
+        weight = self.model.get_initializer(node.input[1])
         if weight is None:
             raise ValueError("Expected {} to be an initializer".format(node.input[1]))
 
@@ -654,12 +669,12 @@ class ONNXQuantizer:
 
         # get scale for weight
         weight_scale_name = self.quantized_value_map[node.input[1]].scale_name
-        weight_initializer = find_by_name(weight_scale_name, self.model.initializer())
+        weight_initializer = self.model.get_initializer(weight_scale_name)
         weight_scale = self.tensor_proto_to_array(weight_initializer)
 
         # get bias
         bias_name = node.input[2]
-        bias_initializer = find_by_name(bias_name, self.model.initializer())
+        bias_initializer = self.model.get_initializer(bias_name)
         bias_data = self.tensor_proto_to_array(bias_initializer)
         quantized_bias_name = bias_name + "_quantized"
 
@@ -680,7 +695,7 @@ class ONNXQuantizer:
                 raise ValueError("Expected {} to be in quantized value map \
                                   for static quantization".format(node.input[0]))
 
-            inputscale_initializer = find_by_name(input_scale_name, self.model.initializer())
+            inputscale_initializer = self.model.get_initializer(input_scale_name)
             input_scale = self.tensor_proto_to_array(inputscale_initializer)
 
             # calcuate scale for bias
@@ -695,7 +710,7 @@ class ONNXQuantizer:
                            bias_initializer.dims)
             packed_bias_initializer = onnx.numpy_helper.from_array(bias_np_data, 
                                                                    quantized_bias_name)
-            self.model.initializer().extend([packed_bias_initializer])
+            self.model.add_initializer(packed_bias_initializer)
 
             # log entries for this quantized bias value
             quantized_bias_entry = QuantizedInitializer(bias_name,
@@ -745,7 +760,7 @@ class ONNXQuantizer:
                 continue
 
             # Quantize the input
-            initializer = find_by_name(node_input, self.model.initializer())
+            initializer = self.model.get_initializer(node_input)
             if initializer is not None:
                 weight = self._get_quantized_weight(initializer, 
                                                     self.config[node.name]['weight']['dtype'] if \
@@ -790,40 +805,17 @@ class ONNXQuantizer:
             quantized_value = self.quantized_value_map[weight_name]
             return (quantized_value.q_name, quantized_value.zp_name, quantized_value.scale_name)
         
-        initializer = find_by_name(weight_name, self.model.initializer())
+        initializer = self.model.get_initializer(weight_name)
         if initializer is None:
             raise ValueError("{} is not an initializer", weight_name)
 
-        weights = self.tensor_proto_to_array(initializer)
-        channel_count = weights.shape[channel_axis]
-        rmin_list = []
-        rmax_list = []
-        zero_point_list = []
-        scale_list = []
-        quantized_per_channel_data_list = []
-        for i in range(channel_count):
-            per_channel_data = weights.take(i, channel_axis)
-            rmin, rmax, zero_point, scale, quantized_per_channel_data = quantize_data(
-                per_channel_data.flatten().tolist(), _get_qrange_for_qType(weight_qType, 
-                self.reduce_range), weight_qType, scheme)
-            rmin_list.append(rmin)
-            rmax_list.append(rmax)
-            zero_point_list.append(zero_point)
-            scale_list.append(scale)
-            quantized_per_channel_data_list.append(quantized_per_channel_data)
-
-        # combine per_channel_data into one
-        reshape_dims = list(weights.shape)  # deep copy
-        reshape_dims[channel_axis] = 1  # only one per channel for reshape
-        quantized_weights = np.asarray(quantized_per_channel_data_list[0]).reshape(reshape_dims)
-        for i in range(1, len(quantized_per_channel_data_list)):
-            channel_weights = np.asarray(quantized_per_channel_data_list[i]).reshape(reshape_dims)
-            quantized_weights = np.concatenate((quantized_weights, channel_weights), channel_axis)
-
-        weight = QuantizedInitializer(initializer.name, initializer, rmin_list, rmax_list, 
-                                      zero_point_list, scale_list,
-                                      weights,
-                                      quantized_weights.flatten().tolist(), 
+        rmin, rmax, zero_point, scale, quantized_weights = self._quantize_weight_data(
+            initializer, weight_qType, scheme, channel_axis)
+
+        weight = QuantizedInitializer(initializer.name, initializer, rmin, rmax,
+                                      zero_point, scale,
+                                      None,
+                                      quantized_weights,
                                       channel_axis, weight_qType)
 
         # Make entry for this quantized weight
@@ -22,7 +22,6 @@
 # --------------------------------------------------------------------------
 
 
-import copy
 import logging
 
 import numpy as np
@@ -31,7 +30,8 @@ import onnxruntime
 import onnx.numpy_helper as numpy_helper
 from onnx import helper, TensorProto, shape_inference
 from distutils.version import StrictVersion
-from neural_compressor.model.onnx_model import ONNXModel
+from neural_compressor.model.onnx_model import ONNXModel, copy_with_external_data
+from neural_compressor.adaptor.ox_utils.calibration import MinMaxCollector, HistogramCollector
 
 logger = logging.getLogger()
 ONNX18_VERSION = StrictVersion("1.8.0")
@@ -66,6 +66,9 @@ class ONNXRTAugment:
         self.iterations = iterations
         self.augment_nodes = []
         self.dequantized_output = {}
+        self.calib_mode = 'naive'
+        self.tensor_calib_modes = {}
+        self.calib_outputs = {}
         self.already_quantized = 'DequantizeLinear' in \
                                  [node.op_type for node in self.model.graph.node]
 
@@ -78,11 +81,14 @@ class ONNXRTAugment:
         :return: augmented ONNX model
         '''
         self.dequantized_output.clear()
+        self.calib_outputs.clear()
         onnx_version = StrictVersion(onnx.__version__)
         if onnx_version < ONNX18_VERSION:
             logger.warning("Static quantization for NLP model is supported " \
                            "at onnx 1.8.0 and newer.")  
-        model = copy.deepcopy(self.model)
+        # the initializers are written to the external data of the augmented model once,
+        # instead of copied in memory and serialized again for the session
+        model = copy_with_external_data(self.model, self.augmented_model_path)
         model_nodes_names = [node.name for node in model.graph.node]
 
         added_nodes = []
@@ -104,7 +110,7 @@ class ONNXRTAugment:
                 new_white_nodes.append(new_white_node)
             self.white_nodes = new_white_nodes
 
-        initializers = {i.name: i.data_type for i in model.graph.initializer}
+        initializers = {i.name: i.data_type for i in self.model.graph.initializer}
         for node in model.graph.node: # pylint: disable=no-member
             should_be_dump = ((node.op_type in self.dump_op_types) and
                                    (node.name not in self.black_nodes)) or \
@@ -145,6 +151,7 @@ class ONNXRTAugment:
             value_info[input.name] = input.type.tensor_type.elem_type
         for output in model.graph.output:
             value_info[output.name] = output.type.tensor_type.elem_type
+        model_output_names = [t.name for t in model.graph.output]
         for tensor in tensors_to_dump:
             if self.augment_nodes:
                 for augment_node_type in self.augment_nodes:
@@ -164,6 +171,16 @@ class ONNXRTAugment:
                         added_outputs.append(helper.make_tensor_value_info(
                                                augment_node.output[0], # pylint: disable=no-member
                                                TensorProto.FLOAT, ())) # pylint: disable=no-member
+                        self.calib_outputs[augment_node_name] = (tensor, 'minmax')
+                        # histogram based calibration needs the whole activation tensor
+                        if tensor not in initializers and \
+                            self._get_calib_mode(tensor) != 'naive' and \
+                            tensor not in self.calib_outputs:
+                            if tensor not in model_output_names:
+                                added_tensor = helper.ValueInfoProto()
+                                added_tensor.name = tensor
+                                added_outputs.append(added_tensor)
+                            self.calib_outputs[tensor] = (tensor, 'histogram')
                     else:
                         # insert DequantizeLinear node as output
                         augment_node_name = tensor + "_new_" + augment_node_type
@@ -177,12 +194,12 @@ class ONNXRTAugment:
                                                TensorProto.FLOAT, ())) # pylint: disable=no-member
                         else:
                             # the tensor is in FP32 dtype
-                            if tensor not in [t.name for t in model.graph.output]:
+                            if tensor not in model_output_names:
                                 added_tensor = helper.ValueInfoProto()
                                 added_tensor.name = tensor
                                 added_outputs.append(added_tensor)
             else:
-                if tensor not in [t.name for t in model.graph.output]:
+                if tensor not in model_output_names:
                     added_tensor = helper.ValueInfoProto()
                     added_tensor.name = tensor
                     added_outputs.append(added_tensor)
@@ -194,19 +211,21 @@ class ONNXRTAugment:
         self.augmented_model = model
         onnx.save(model, self.augmented_model_path)
 
-    def get_intermediate_outputs(self):
+    def _inference(self, session, output_names=None):
         '''
-            Gather intermediate model outputs after running inference
-            :return: dictionary mapping: {node output tensor names: node output tensor }
+            Run the augmented model on the dataloader
+            :param session: onnxruntime session of the augmented model
+            :param output_names: names of the outputs to fetch, None means all outputs
+            :return: generator of the fetched outputs of each collected iteration
         '''
-
-        # conduct inference session and get intermediate outputs
-        session = onnxruntime.InferenceSession(self.augmented_model.SerializeToString(), None)
-
-        intermediate_outputs = []
         len_inputs = len(session.get_inputs())
         inputs_names = [session.get_inputs()[i].name for i in range(len_inputs)]
         for idx, (inputs, labels) in enumerate(self.dataloader):
+            if self.iterations != []:
+                if idx > max(self.iterations):
+                    break
+                if idx not in self.iterations:
+                    continue
             ort_inputs = {}
             if len_inputs == 1:
                 ort_inputs.update({inputs_names[0]: inputs})
@@ -218,13 +237,18 @@ class ONNXRTAugment:
                         ort_inputs.update({inputs_names[i]: np.array(inputs[i])})
                     else:
                         ort_inputs.update({inputs_names[i]: inputs[i]})
-            if self.iterations != []:
-                if idx > max(self.iterations):
-                    break    
-                if idx in self.iterations:
-                    intermediate_outputs.append(session.run(None, ort_inputs))
-            else:
-                intermediate_outputs.append(session.run(None, ort_inputs))
+            yield session.run(output_names, ort_inputs)
+
+    def get_intermediate_outputs(self):
+        '''
+            Gather intermediate model outputs after running inference
+            :return: dictionary mapping: {node output tensor names: node output tensor }
+        '''
+
+        # conduct inference session and get intermediate outputs
+        session = onnxruntime.InferenceSession(self.augmented_model_path, None)
+
+        intermediate_outputs = list(self._inference(session))
         node_output_names = [output.name if output.name not in self.dequantized_output \
                              else self.dequantized_output[output.name] \
                              for output in session.get_outputs()]
@@ -235,6 +259,42 @@ class ONNXRTAugment:
 
         return node_output_names, output_dicts_list
 
+    def _get_calib_mode(self, tensor):
+        return self.tensor_calib_modes.get(tensor, self.calib_mode)
+
+    def get_calibration_ranges(self):
+        '''
+            Run calibration and reduce the augmented outputs of each iteration into
+            running statistics, so memory does not grow with calibration iterations.
+            :return: dictionary mapping: {tensor names: (min, max) pairs}
+        '''
+        session = onnxruntime.InferenceSession(self.augmented_model_path, None)
+        output_names = [output.name for output in session.get_outputs() \
+                        if output.name in self.calib_outputs]
+        minmax_collectors = {}
+        histogram_collectors = {}
+        for outputs in self._inference(session, output_names):
+            for name, output in zip(output_names, outputs):
+                tensor, kind = self.calib_outputs[name]
+                if kind == 'histogram':
+                    histogram_collectors.setdefault(tensor, HistogramCollector()).collect(output)
+                else:
+                    minmax_collectors.setdefault(tensor, MinMaxCollector()).collect(output)
+
+        ranges = {}
+        for tensor, collector in minmax_collectors.items():
+            calib_mode = self._get_calib_mode(tensor)
+            if tensor not in histogram_collectors or calib_mode == 'naive':
+                ranges[tensor] = collector.get_range()
+            elif calib_mode == 'percentile':
+                ranges[tensor] = histogram_collectors[tensor].get_percentile_range()
+            elif calib_mode == 'kl':
+                ranges[tensor] = histogram_collectors[tensor].get_entropy_range()
+            else:
+                raise ValueError('Unknown value for calib_mode {}. Currently only naive, '
+                                 'percentile and kl modes are supported.'.format(calib_mode))
+        return ranges
+
     def _dequantize(self, tensor, scale_tensor, zo_tensor):
         ''' helper function to dequantize tensor
         '''
@@ -304,36 +364,34 @@ class ONNXRTAugment:
         added_nodes = [pre_transpose_node, dequantize_node, post_transpose_node]
         return added_nodes, tensor_name + '_output'
 
-    def _map_calibration(self, node_output_names, output_dicts_list, calib_mode='naive'):
-        model = self.model
-        num_model_outputs = len(model.graph.output)
-        merged_dict = {}
-        for d in output_dicts_list:
-            for k, v in d.items():
-                merged_dict.setdefault(k, []).append(v)
-        added_node_output_names = node_output_names[num_model_outputs:]
-        node_names = [added_node_output_names[i].rpartition('_')[0]
-                      for i in range(0, len(added_node_output_names), 2)]  # output names
-
-        # Characterizing distribution of a node's values across test data sets
-        clean_merged_dict = dict((i, merged_dict[i]) for i in merged_dict
-                                  if i != list(merged_dict.keys())[0])
-        if calib_mode == 'naive':
-            pairs = [
-                tuple([
-                    float(min(clean_merged_dict[added_node_output_names[i]])),
-                    float(max(clean_merged_dict[added_node_output_names[i + 1]]))
-                ]) for i in range(0, len(added_node_output_names), 2)
-            ]
-        else:
-            raise ValueError('Unknown value for calib_mode. \
-                             Currently only naive mode is supported.')
-
-        final_dict = dict(zip(node_names, pairs))
-
-        return final_dict
+    def _resolve_tensor_calib_modes(self, node_calib_modes):
+        '''
+            Map the calib_mode of the nodes to the activation tensors they consume and
+            produce. A tensor takes the mode of the node producing it, or when the
+            producer has no mode, the mode its consumers agree on, minmax otherwise.
+            :return: dictionary mapping: {tensor names: calib_mode}
+        '''
+        producer_modes = {}
+        consumer_modes = {}
+        for node in self.model.graph.node:
+            if node.name not in node_calib_modes:
+                continue
+            mode = node_calib_modes[node.name]
+            for tensor in node.output:
+                producer_modes[tensor] = mode
+            for tensor in node.input:
+                consumer_modes.setdefault(tensor, set()).add(mode)
+        tensor_calib_modes = {}
+        for tensor in set(producer_modes) | set(consumer_modes):
+            if tensor in producer_modes:
+                mode = producer_modes[tensor]
+            else:
+                modes = consumer_modes[tensor]
+                mode = modes.pop() if len(modes) == 1 else 'naive'
+            tensor_calib_modes[tensor] = mode
+        return tensor_calib_modes
 
-    def dump_calibration(self, calib_mode='naive'):
+    def dump_calibration(self, calib_mode='naive', node_calib_modes=None):
         '''
             Gather calibration params for quantization
             parameter calib_mode: type 'naive' gives (ReduceMin, ReduceMax) pairs
@@ -341,14 +399,22 @@ class ONNXRTAugment:
                                 the first element is a minimum of all ReduceMin values
                                 and the second element is a maximum of all ReduceMax
                                 values;
+                                type 'percentile' clips the range to the central
+                                99.999% of the collected histogram;
+                                type 'kl' picks the range minimizing the KL divergence
+                                between the collected and the quantized histograms.
+            parameter node_calib_modes: dictionary mapping {node names: calib_mode}
+                                which overrides calib_mode for the activation tensors
+                                of these nodes.
             :return: dictionary mapping: {added node names: (ReduceMin, ReduceMax) pairs }
         '''
+        self.calib_mode = calib_mode
+        self.tensor_calib_modes = self._resolve_tensor_calib_modes(
+            node_calib_modes if node_calib_modes else {})
 
         self.augment_nodes = ["ReduceMin", "ReduceMax"]
         self.augment_graph()
-        node_output_names, output_dicts_list = self.get_intermediate_outputs()
-        mapped_dict = self._map_calibration(node_output_names, output_dicts_list,
-                                            calib_mode=calib_mode)
+        mapped_dict = self.get_calibration_ranges()
 
         return self.calculate_quantization_params(mapped_dict)
 
@@ -24,7 +24,7 @@ from onnxruntime.quantization.quant_utils import QuantType
 
 def split_shared_input(model):
     for input_name, node_list in model.input_name_to_nodes.items():
-        if len(node_list) > 1 and input_name in [i.name for i in model.model.graph.initializer]:
+        if len(node_list) > 1 and model.get_initializer(input_name) is not None:
             for node in node_list[1:]:
                 for i, node_input_name in enumerate(node.input):
                     if node_input_name == input_name:
@@ -73,12 +73,39 @@ def quantize_data_with_scale_zero(data, qType, scheme, scale, zero_point):
                                                                         qType, scheme))
     return quantized_data
 
-def quantize_data(data, quantize_range, qType, scheme):
+def _channel_shape(tensor_value, axis):
+    shape = [1] * tensor_value.ndim
+    shape[axis] = -1
+    return shape
+
+def calculate_scale_zp(rmin, rmax, quantize_range, qType, scheme):
+    '''
+        :parameter rmin: minimum of the data, an array of the minimum of each channel
+        :parameter rmax: maximum of the data, an array of the maximum of each channel
+        :parameter quantize_range: list of data to weight pack.
+        :parameter qType: data type to quantize to. Supported types UINT8 and INT8
+        :parameter scheme: sym or asym quantization.
+        :return: scale and zero point, in the shape of rmin and rmax
+    '''
+    if scheme == 'sym' and qType == onnx_proto.TensorProto.INT8:
+        max_range = np.maximum(np.abs(rmin), np.abs(rmax))
+        scale = np.where(max_range > 0, max_range * 2. / quantize_range, 1.)
+        zero_point = np.zeros(np.shape(max_range), dtype=np.int64)
+    elif scheme == 'asym' and qType == onnx_proto.TensorProto.UINT8:
+        scale = np.where(rmin != rmax, (rmax - rmin) / quantize_range, 1.)
+        zero_point = np.round((0 - rmin) / scale).astype(np.int64)
+    else:
+        raise ValueError("Unexpected combination of data type {} and scheme {}.".format(
+            qType, scheme))
+    return scale, zero_point
+
+def quantize_data(data, quantize_range, qType, scheme, axis=None):
     '''
         :parameter data: data to quantize
         :parameter quantize_range: list of data to weight pack.
         :parameter qType: data type to quantize to. Supported types UINT8 and INT8
         :param scheme: sym or asym quantization.
+        :param axis: the channel axis of per channel quantization, None for per tensor.
         :return: minimum, maximum, zero point, scale, and quantized weights
         To pack weights, we compute a linear transformation
             - when data type == uint8 mode, from [rmin, rmax] -> [0, 2^{b-1}] and
@@ -90,47 +117,31 @@ def quantize_data(data, quantize_range, qType, scheme):
             q: quantized value
             S: scale
             z: zero point
+        With axis, minimum, maximum, zero point and scale are arrays of each channel,
+        and the quantized weights keep the shape of data.
     '''
-    rmin = min(min(data), 0)
-    rmax = max(max(data), 0)
-
-    if scheme == 'sym' and qType == onnx_proto.TensorProto.INT8:
-        max_range = max(abs(rmin), abs(rmax))
-        scale = (float(max_range) * 2) / quantize_range if max_range > 0 else 1
-        zero_point = 0
-    elif scheme == 'asym' and qType == onnx_proto.TensorProto.UINT8:
-        scale = (float(rmax) - rmin) / quantize_range if rmin != rmax else 1
-        zero_point = round((0 - rmin) / scale)
+    # quantize in double like the python floats, whatever the dtype of data
+    data = np.asarray(data, dtype=np.float64)
+    if axis is None:
+        rmin = min(float(data.min()), 0.) if data.size else 0.
+        rmax = max(float(data.max()), 0.) if data.size else 0.
+        scale, zero_point = calculate_scale_zp(rmin, rmax, quantize_range, qType, scheme)
+        scale, zero_point = float(scale), int(zero_point)
+        quantized_data = quantize_data_with_scale_zero(data, qType, scheme, scale, zero_point)
     else:
-        raise ValueError("Unexpected combination of data type {} and scheme {}.".format(
-            qType, scheme))
-
-    quantized_data = quantize_data_with_scale_zero(data, qType, scheme, scale, zero_point)
+        reduce_axes = tuple(i for i in range(data.ndim) if i != axis % data.ndim)
+        rmin = np.minimum(data.min(axis=reduce_axes), 0.)
+        rmax = np.maximum(data.max(axis=reduce_axes), 0.)
+        scale, zero_point = calculate_scale_zp(rmin, rmax, quantize_range, qType, scheme)
+        shape = _channel_shape(data, axis)
+        quantized_data = quantize_data_with_scale_zero(data, qType, scheme,
+                                scale.reshape(shape), zero_point.reshape(shape))
     return rmin, rmax, zero_point, scale, quantized_data
 
 def quantize_data_per_channel(tensor_value, qType, scheme, scale_value, zo_value):
-    channel_count = tensor_value.shape[0] # TBD, default from axis 0
-    new_per_channel_tensor_values = []
-    for i in range(channel_count):
-        per_channel_tensor_value = tensor_value.take(i, 0)
-        per_channel_scale_value = scale_value.take(i)
-        per_channel_zero_value = zo_value.take(i)
-        new_per_channel_tensor_values.append(quantize_data_with_scale_zero(\
-                                                       per_channel_tensor_value,
-                                                       qType,
-                                                       scheme,
-                                                       per_channel_scale_value,
-                                                       per_channel_zero_value))
-    # combine per_channel_data into one
-    reshape_dims = list(tensor_value.shape)  # deep copy
-    reshape_dims[0] = 1  # only one per channel for reshape
-    new_tensor_value = new_per_channel_tensor_values[0].reshape(reshape_dims)
-    for i in range(1, channel_count):
-        new_per_channel_tensor_value = new_per_channel_tensor_values[i].\
-                                                       reshape(reshape_dims)
-        new_tensor_value = np.concatenate((new_tensor_value, \
-                                           new_per_channel_tensor_value), 0)
-    return new_tensor_value
+    shape = _channel_shape(tensor_value, 0) # TBD, default from axis 0
+    return quantize_data_with_scale_zero(tensor_value, qType, scheme,
+                                         scale_value.reshape(shape), zo_value.reshape(shape))
 
 def dequantize_data_with_scale_zero(tensor_value, scale_value, zo_value):
     return (tensor_value.astype(np.float32) - zo_value.astype(np.float32)) * scale_value
@@ -139,26 +150,9 @@ def dequantize_data(tensor_value, scale_value, zo_value, axis=0):
     if scale_value.size == 1:
         return dequantize_data_with_scale_zero(tensor_value, scale_value, zo_value)
     else:
-        channel_count = tensor_value.shape[axis] # TBD, default from axis 0
-        new_per_channel_tensor_values = []
-        for i in range(channel_count):
-            per_channel_tensor_value = tensor_value.take(i, 0)
-            per_channel_scale_value = scale_value.take(i)
-            per_channel_zero_value = zo_value.take(i)
-            new_per_channel_tensor_values.append(dequantize_data_with_scale_zero(\
-                                                           per_channel_tensor_value,
-                                                           per_channel_scale_value,
-                                                           per_channel_zero_value))
-        # combine per_channel_data into one
-        reshape_dims = list(tensor_value.shape)  # deep copy
-        reshape_dims[0] = 1  # only one per channel for reshape
-        new_tensor_value = new_per_channel_tensor_values[0].reshape(reshape_dims)
-        for i in range(1, channel_count):
-            new_per_channel_tensor_value = new_per_channel_tensor_values[i].\
-                                                           reshape(reshape_dims)
-            new_tensor_value = np.concatenate((new_tensor_value, \
-                                               new_per_channel_tensor_value), 0)
-        return new_tensor_value
+        shape = _channel_shape(tensor_value, axis)
+        return dequantize_data_with_scale_zero(tensor_value, scale_value.reshape(shape),
+                                               zo_value.reshape(shape))
 
 class QuantizedValue:
     '''
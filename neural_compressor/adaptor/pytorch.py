@@ -614,6 +614,104 @@ def _fallback_quantizable_ops_recursively(model, prefix, fallback_ops, white_lis
                 child, op_name + '.', fallback_ops, white_list=white_list)
 
 
+def _copy_module_tree(module, memo=None):
+    """Copy the module hierarchy of a model, the parameters and buffers are shared.
+
+       The qconfig propagation, the observer insertion and the module swapping of
+       `convert` only change the module attributes and the `_modules`, `_parameters`
+       and hook dicts, so they can work on this copy without touching the fp32 model
+       and without duplicating its weights.
+
+    Args:
+        module (object): the torch.nn.Module to be copied
+        memo (dict, optional): the copied modules by id, to keep the shared modules shared
+
+    Returns:
+        (object): the copied module
+    """
+    memo = {} if memo is None else memo
+    if id(module) in memo:
+        return memo[id(module)]
+    new_module = copy.copy(module)
+    memo[id(module)] = new_module
+    for key, value in module.__dict__.items():
+        if isinstance(value, (dict, set)):
+            new_module.__dict__[key] = copy.copy(value)
+    for name, child in module._modules.items():
+        if child is not None:
+            new_module._modules[name] = _copy_module_tree(child, memo)
+    return new_module
+
+
+def _copy_model(model, module=None):
+    """Copy a PyTorchModel for quantization, whose fp32 weights are shared.
+
+    Args:
+        model (object): the PyTorchModel to be copied
+        module (object, optional): the module tree of the copy instead of model.model
+    """
+    new_model = copy.copy(model)
+    new_model.model = _copy_module_tree(model.model if module is None else module)
+    new_model.handles = []
+    return new_model
+
+
+def _observed_tensors(model):
+    """Map the activation observers of a prepared model to the tensors they observe.
+
+       The output of a fallback op is observed by the QuantStub of its
+       DequantQuantWrapper, so it is named by the wrapped op as the int8 op is.
+
+    Args:
+        model (object): the model with observers inserted by `add_observer_`
+
+    Returns:
+        (dict): the observer of each (tensor name, observer config)
+    """
+    observers = {}
+    modules = dict(model.named_modules())
+    for name, module in modules.items():
+        observer = getattr(module, 'activation_post_process', None)
+        if not isinstance(observer, torch.quantization.ObserverBase):
+            continue
+        parent_name, _, child_name = name.rpartition('.')
+        if child_name == 'quant' and \
+           type(modules.get(parent_name)).__name__ == 'DequantQuantWrapper':
+            name = parent_name
+        config = tuple(repr(getattr(observer, attr, None)) for attr in
+                       ('dtype', 'qscheme', 'reduce_range', 'quant_min', 'quant_max',
+                        'ch_axis', 'averaging_constant', 'bins', 'upsample_rate'))
+        observers[(name, type(observer).__name__) + config] = observer
+    return observers
+
+
+def _quantize_dequantize(tensor, axis=None):
+    """Round a float tensor to the int8 grid and back.
+
+       The activations are quantized as per-tensor asymmetric uint8 on their own range,
+       the weights as per-channel symmetric int8 along axis.
+
+    Args:
+        tensor (tensor): the float tensor
+        axis (int, optional): the channel axis of a weight, None for an activation
+
+    Returns:
+        (tensor): the dequantized tensor
+    """
+    if axis is None:
+        min_val = torch.clamp(tensor.min(), max=0.)
+        max_val = torch.clamp(tensor.max(), min=0.)
+        scale = torch.clamp((max_val - min_val) / 255., min=1e-12)
+        zero_point = torch.round(-min_val / scale)
+        return (torch.clamp(torch.round(tensor / scale) + zero_point, 0, 255) - zero_point) * scale
+    shape = [1] * tensor.dim()
+    shape[axis] = -1
+    dims = [dim for dim in range(tensor.dim()) if dim != axis]
+    max_val = tensor.abs().amax(dim=dims) if dims else tensor.abs()
+    scale = torch.clamp(max_val / 127.5, min=1e-12).reshape(shape)
+    return torch.clamp(torch.round(tensor / scale), -128, 127) * scale
+
+
 @adaptor_registry
 class TemplateAdaptor(Adaptor):
     """Tample adaptor of PyTorch framework.
@@ -728,6 +826,69 @@ class TemplateAdaptor(Adaptor):
 
                 self.calib_func(q_model, dataloader, iterations, conf)
 
+    def quantization_sensitivity(self, model, dataloader, op_list, iterations=1):
+        """Estimate the quantization error of each op with the fp32 model.
+
+           A forward hook runs each op again with its input and weight rounded to int8,
+           rounds the output too, and accumulates the squared error against the fp32
+           output. Only the sums are kept, so no tensor is stored across batches.
+
+        Args:
+            model (object): the fp32 PyTorchModel
+            dataloader (object): calibration dataset
+            op_list (list): the (op name, op type) of the ops to estimate
+            iterations (int): the number of calibration batches
+
+        Returns:
+            (dict): the error of each op relative to its fp32 output
+        """
+        modules = dict(model.model.named_modules())
+        errors = OrderedDict()
+        state = {'rerun': False}
+
+        def _sensitivity_hook(op):
+            def hook(module, input, output):
+                # the children of an op run again inside its hook
+                if state['rerun'] or not isinstance(output, torch.Tensor) or \
+                   not output.is_floating_point():
+                    return
+                weight = getattr(module, 'weight', None)
+                if not isinstance(weight, torch.Tensor) or not weight.is_floating_point():
+                    weight = None
+                state['rerun'] = True
+                try:
+                    if weight is not None:
+                        fp32_weight = weight.data
+                        weight.data = _quantize_dequantize(fp32_weight, axis=0)
+                    q_output = module.forward(*[
+                        _quantize_dequantize(item) if isinstance(item, torch.Tensor) and
+                        item.is_floating_point() else item for item in input])
+                finally:
+                    if weight is not None:
+                        weight.data = fp32_weight
+                    state['rerun'] = False
+                q_output = _quantize_dequantize(q_output)
+                error = errors.setdefault(op, [0., 0.])
+                error[0] += torch.sum((q_output - output) ** 2).item()
+                error[1] += torch.sum(output ** 2).item()
+            return hook
+
+        handles = [modules[op[0]].register_forward_hook(_sensitivity_hook(op))
+                   for op in op_list if op[0] in modules]
+        training = model.model.training
+        model.model.eval()
+        try:
+            with torch.no_grad():
+                self.calib_func(model.model, dataloader, iterations)
+        finally:
+            for handle in handles:
+                handle.remove()
+            model.model.train(training)
+        if not errors:
+            return None
+        return OrderedDict((op, error / max(norm, 1e-12)) for op, (error, norm)
+                           in errors.items())
+
     def eval_func(self, model, dataloader, postprocess, metric, measurer, iteration, conf=None):
         results = []
         for idx, (input, label) in enumerate(dataloader):
@@ -753,7 +914,7 @@ class TemplateAdaptor(Adaptor):
             if self.fp32_preds_as_label:
                 self.fp32_results.append(output) if self.is_baseline else \
                     results.append(output)
-            if idx + 1 == iteration:
+            if idx + 1 == iteration or (measurer is not None and measurer.converged):
                 break
         return results
 
@@ -950,6 +1111,10 @@ class PyTorchAdaptor(TemplateAdaptor):
                          'nniqat.ConvBnReLU2d',
                          'nni.LinearReLU']
         self.fused_dict = {}
+        # the calibrated observer states of each (tensor, observer config), which are
+        # shared by the tuning trials on the same model and calibration settings
+        self.calib_stats = {}
+        self.calib_stats_owner = None
 
     @dump_elapsed_time("Pass quantize model")
     def quantize(self, tune_cfg, model, dataloader, q_func=None):
@@ -974,12 +1139,16 @@ class PyTorchAdaptor(TemplateAdaptor):
         self.tune_cfg["framework"] = "pytorch"
         op_cfgs = _cfg_to_qconfig(tune_cfg, self.approach)
 
-        try:
-            q_model = copy.deepcopy(model)
-        except Exception as e:   # pragma: no cover
-            logger.warning("Fail to deep copy the model due to {}, inplace is used now.".
-                           format(repr(e)))
-            q_model = model
+        if self.approach == 'quant_aware_training':
+            # the training updates the weights, so they can't be shared with the fp32 model
+            try:
+                q_model = copy.deepcopy(model)
+            except Exception as e:   # pragma: no cover
+                logger.warning("Fail to deep copy the model due to {}, inplace is used now.".
+                               format(repr(e)))
+                q_model = model
+        else:
+            q_model = _copy_model(model)
         if self.approach == 'quant_aware_training':
             q_model.model.train()
         else:
@@ -997,8 +1166,8 @@ class PyTorchAdaptor(TemplateAdaptor):
         if self.approach == 'post_training_static_quant':
             torch.quantization.add_observer_(q_model.model)
             iterations = tune_cfg.get('calib_iteration', 1)
-            self.model_calibration(
-                q_model.model, dataloader, iterations,
+            self._calibrate_with_stats(
+                q_model.model, model.model, dataloader, iterations,
                 calib_sampling_size=tune_cfg.get('calib_sampling_size', 1))
         elif self.approach == 'quant_aware_training':
             if self.version >= PyTorchVersionMode.PT17.value:
@@ -1032,6 +1201,42 @@ class PyTorchAdaptor(TemplateAdaptor):
 
         return q_model
 
+    def _calibrate_with_stats(self, q_model, fp32_model, dataloader, iterations=1,
+                              calib_sampling_size=1):
+        """Calibrate the observers of a trial with the statistics of the former trials.
+
+           In eager mode the observers only record the fp32 activations and pass them on,
+           so an observer of the same config on the same tensor gets the same statistics
+           in any trial. The calibration only runs when some observer of this trial has
+           no recorded statistics, e.g. the first trial or an op with a new algorithm.
+
+        Args:
+            q_model (object): the torch model with observers inserted
+            fp32_model (object): the fp32 torch model the trial is copied from
+            dataloader (object): calibration dataset
+            iterations (int): calibration iterations
+            calib_sampling_size (int): calibration sampling size
+        """
+        owner = self.calib_stats_owner
+        if owner is None or owner[0] is not fp32_model or owner[1] is not dataloader or \
+           owner[2:] != (iterations, calib_sampling_size):
+            self.calib_stats = {}
+            self.calib_stats_owner = (fp32_model, dataloader, iterations, calib_sampling_size)
+
+        observers = _observed_tensors(q_model)
+        if observers and all(key in self.calib_stats for key in observers):
+            logger.debug("Reuse the calibration statistics of {} observers.".
+                         format(len(observers)))
+            for key, observer in observers.items():
+                observer.load_state_dict(self.calib_stats[key])
+            return
+
+        self.model_calibration(q_model, dataloader, iterations,
+                               calib_sampling_size=calib_sampling_size)
+        for key, observer in observers.items():
+            self.calib_stats[key] = {name: tensor.detach().clone() for name, tensor
+                                     in observer.state_dict().items()}
+
     def evaluate(self, model, dataloader, postprocess=None,
                  metric=None, measurer=None, iteration=-1,
                  tensorboard=False, fp32_baseline=False):
@@ -1486,7 +1691,7 @@ class PyTorchAdaptor(TemplateAdaptor):
         else:
             white_list = torch.quantization.get_default_compare_output_module_list()
 
-        model = model if model.is_quantized else copy.deepcopy(model)
+        model = model if model.is_quantized else _copy_model(model)
         model.model.qconfig = torch.quantization.QConfig(
             weight=torch.quantization.default_debug_observer,
             activation=_RecordingObserver.with_args(iteration_list=iteration_list))
@@ -1672,7 +1877,7 @@ class PyTorchAdaptor(TemplateAdaptor):
                     else:
                         op_list_.append(self.fused_dict[key][-1])
 
-        new_model = model if is_quantized else copy.deepcopy(model)
+        new_model = model if is_quantized else _copy_model(model)
 
         assert min(iteration_list) > 0, \
             "Iteration number should great zero, 1 means first iteration."
@@ -2124,6 +2329,9 @@ class PyTorch_FXAdaptor(TemplateAdaptor):
             tq.quantization_mappings.get_default_dynamic_quant_module_mappings() \
             if self.approach == 'post_training_dynamic_quant' else \
             tq.quantization_mappings.get_default_qconfig_propagation_list()
+        # the traced and fused fp32 model shared by the post training quantization trials
+        self.fx_traced_model = None
+        self.fx_traced_owner = None
 
     @dump_elapsed_time("Pass quantize model")
     def quantize(self, tune_cfg, model, dataloader, q_func=None):
@@ -2154,15 +2362,14 @@ class PyTorch_FXAdaptor(TemplateAdaptor):
         op_cfgs = _cfg_to_qconfig(tune_cfg, self.approach)
 
         from torch.quantization.quantize_fx import prepare_fx, convert_fx, prepare_qat_fx
-        try:
-            q_model = copy.deepcopy(model)
-        except Exception as e:   # pragma: no cover
-            logger.warning("Fail to deep copy the model due to {}, inplace is used now.".
-                           format(repr(e)))
-            q_model = model
-        q_model.model.eval()
         fx_op_cfgs = _cfgs_to_fx_cfgs(op_cfgs, self.approach)
         if self.approach == 'quant_aware_training':
+            try:
+                q_model = copy.deepcopy(model)
+            except Exception as e:   # pragma: no cover
+                logger.warning("Fail to deep copy the model due to {}, inplace is used now.".
+                               format(repr(e)))
+                q_model = model
             q_model.model.train()
             q_model.model = prepare_qat_fx(q_model.model, fx_op_cfgs,
               prepare_custom_config_dict=q_model.kwargs['prepare_custom_config_dict']
@@ -2174,6 +2381,7 @@ class PyTorch_FXAdaptor(TemplateAdaptor):
             q_func(q_model if getattr(q_func, 'builtin', None) else q_model.model)
             q_model.model.eval()
         else:
+            q_model = _copy_model(model, self._fx_traced_model(model))
             q_model.model = prepare_fx(q_model.model, fx_op_cfgs,
               prepare_custom_config_dict=q_model.kwargs['prepare_custom_config_dict']
               if q_model.kwargs is not None and
@@ -2194,6 +2402,54 @@ class PyTorch_FXAdaptor(TemplateAdaptor):
         self._dump_model_op_stastics(q_model.model, q_model.tune_cfg, self.approach)
         return q_model
 
+    def _fx_traced_model(self, model):
+        """Trace and fuse the fp32 model as `prepare_fx` does, once for all the trials.
+
+           The fused GraphModule shares the weights with the fp32 model, and each trial
+           prepares a copy of its module tree with the qconfig of the trial. Tracing the
+           flat graph of the fused GraphModule again in `prepare_fx` is cheap, while the
+           symbolic tracing of the python code of the fp32 model is only done here.
+
+        Args:
+            model (object): the fp32 model which is Neural Compressor model
+
+        Returns:
+            (object): the traced and fused GraphModule in eval mode, which shouldn't be
+                      changed by the callers
+        """
+        if model.kwargs is not None and \
+                model.kwargs.__contains__('prepare_custom_config_dict'):
+            prepare_custom_config_dict = model.kwargs['prepare_custom_config_dict']
+        else:
+            prepare_custom_config_dict = {}
+        owner = self.fx_traced_owner
+        if owner is not None and owner[0] is model.model and \
+                owner[1] == prepare_custom_config_dict:
+            return self.fx_traced_model
+
+        from torch.fx import GraphModule
+        from torch.quantization.quantize_fx import _fuse_fx, _swap_ff_with_fxff, \
+            QuantizationTracer
+        tmp_model = _copy_module_tree(model.model).eval()
+        _swap_ff_with_fxff(tmp_model)
+        skipped_module_names = prepare_custom_config_dict.get(\
+                                            "non_traceable_module_name", [])
+        skipped_module_classes = prepare_custom_config_dict.get(\
+                                            "non_traceable_module_class", [])
+        tracer = QuantizationTracer(
+            skipped_module_names, skipped_module_classes)
+        graph_module = GraphModule(tmp_model, tracer.trace(tmp_model))
+        preserved_attributes = prepare_custom_config_dict.get("preserved_attributes", [])
+        for attr_name in preserved_attributes:
+            setattr(graph_module, attr_name, getattr(tmp_model, attr_name))
+        fused_model = _fuse_fx(graph_module, prepare_custom_config_dict)
+        # the fused GraphModule is a new module, set the attributes again as prepare_fx
+        for attr_name in preserved_attributes:
+            setattr(fused_model, attr_name, getattr(tmp_model, attr_name))
+        self.fx_traced_model = fused_model
+        self.fx_traced_owner = (model.model, copy.deepcopy(prepare_custom_config_dict))
+        return self.fx_traced_model
+
 
     def evaluate(self, model, dataloader, postprocess=None,
                  metric=None, measurer=None, iteration=-1,
@@ -24,6 +24,8 @@ from .query import QueryBackendCapability
 from .adaptor import adaptor_registry, Adaptor
 from ..utils.utility import LazyImport, CpuInfo, singleton, Dequantize, dump_elapsed_time
 from ..utils.utility import OpPrecisionStatistics, GLOBAL_STATE, MODE
+from ..utils.utility import Prefetcher, AsyncRunner
+from ..utils import options
 from ..utils import logger
 from ..conf.dotdict import deep_get
 from ..experimental.data.dataloaders.base_dataloader import BaseDataLoader
@@ -309,51 +311,58 @@ class TensorFlowAdaptor(Adaptor):
                             model.output_tensor[0]
         logger.info("Start to evaluate the TensorFlow model.")
 
+        pipeline = options.evaluation.pipeline
+
+        def update_metric(predictions, labels):
+            if postprocess is not None:
+                predictions, labels = postprocess((predictions, labels))
+            if metric is not None and not self.fp32_preds_as_label:
+                metric.update(predictions, labels)
+
         def eval_func(dataloader):
             results = []
-            for idx, (inputs, labels) in enumerate(dataloader):
-                # dataloader should keep the order and len of inputs same with input_tensor
-                if len(input_tensor) == 1:
-                    feed_dict = {input_tensor[0]: inputs}  # get raw tensor using index [0]
-                else:
-                    assert len(input_tensor) == len(inputs), \
-                        'inputs len must equal with input_tensor'
-                    feed_dict = dict(zip(input_tensor, inputs))
-
-                if model.iter_op:
-                    predictions = iterator_sess_run(model.sess, model.iter_op, \
-                        feed_dict, output_tensor, iteration, measurer)
-                elif measurer is not None:
-                    measurer.start()
-                    predictions = model.sess.run(output_tensor, feed_dict)
-                    measurer.end()
-                else:
-                    predictions = model.sess.run(output_tensor, feed_dict)
-
-                if self.fp32_preds_as_label:
-                    self.fp32_results.append(predictions) if fp32_baseline else \
-                        results.append(predictions)
-
-                # Inspect node output, just get 1st iteration output tensors for now
-                if idx == 0 and tensorboard:
-                    for index, node_name in enumerate(outputs):
-                        tensor = predictions[index]
-                        if node_name in int8_inspect_node_name:
-                            tensor = Dequantize(predictions[index], q_node_scale[node_name])
-                        self.log_histogram(writer, node_name + output_postfix, tensor.astype(
-                                           np.float32), idx)
-                    writer.close()
-                if isinstance(predictions, list):
-                    if len(origin_output_tensor_names) == 1:
-                        predictions = predictions[0]
-                    elif len(origin_output_tensor_names) > 1:
-                        predictions = predictions[:len(origin_output_tensor_names)]
-                if postprocess is not None:
-                    predictions, labels = postprocess((predictions, labels))
-                if metric is not None and not self.fp32_preds_as_label:
-                    metric.update(predictions, labels)
-                if idx + 1 == iteration:
-                    break
+            with Prefetcher(dataloader, pipeline.prefetch_depth) as batches, \
+                 AsyncRunner(update_metric, pipeline.postprocess_depth) as runner:
+                for idx, (inputs, labels) in enumerate(batches):
+                    # dataloader should keep the order and len of inputs same with input_tensor
+                    if len(input_tensor) == 1:
+                        feed_dict = {input_tensor[0]: inputs}  # get raw tensor using index [0]
+                    else:
+                        assert len(input_tensor) == len(inputs), \
+                            'inputs len must equal with input_tensor'
+                        feed_dict = dict(zip(input_tensor, inputs))
+
+                    if model.iter_op:
+                        predictions = iterator_sess_run(model.sess, model.iter_op, \
+                            feed_dict, output_tensor, iteration, measurer)
+                    elif measurer is not None:
+                        measurer.start()
+                        predictions = model.sess.run(output_tensor, feed_dict)
+                        measurer.end()
+                    else:
+                        predictions = model.sess.run(output_tensor, feed_dict)
+
+                    if self.fp32_preds_as_label:
+                        self.fp32_results.append(predictions) if fp32_baseline else \
+                            results.append(predictions)
+
+                    # Inspect node output, just get 1st iteration output tensors for now
+                    if idx == 0 and tensorboard:
+                        for index, node_name in enumerate(outputs):
+                            tensor = predictions[index]
+                            if node_name in int8_inspect_node_name:
+                                tensor = Dequantize(predictions[index], q_node_scale[node_name])
+                            self.log_histogram(writer, node_name + output_postfix, tensor.astype(
+                                               np.float32), idx)
+                        writer.close()
+                    if isinstance(predictions, list):
+                        if len(origin_output_tensor_names) == 1:
+                            predictions = predictions[0]
+                        elif len(origin_output_tensor_names) > 1:
+                            predictions = predictions[:len(origin_output_tensor_names)]
+                    runner.submit(predictions, labels)
+                    if idx + 1 == iteration or (measurer is not None and measurer.converged):
+                        break
             return results
 
         if isinstance(dataloader, BaseDataLoader) and not self.benchmark:
@@ -222,6 +222,8 @@ def iterator_sess_run(sess, iter_op, feed_dict, output_tensor, iteration=-1, mea
                 prediction = sess.run(output_tensor)
             preds.append(prediction)
             idx += 1
+            if measurer and measurer.converged:
+                break
         except tf.errors.OutOfRangeError:
             break
 
@@ -198,7 +198,7 @@ ops_schema = Schema({
             lambda s: all(i in ['int8', 'uint8', 'fp32', 'bf16'] for i in s)),
         Optional('algorithm', default=None): And(
             list,
-            lambda s: all(i in ['minmax', 'kl'] for i in s))
+            lambda s: all(i in ['minmax', 'kl', 'percentile'] for i in s))
     }
 })
 
@@ -638,7 +638,7 @@ schema = Schema({
                 Optional('algorithm', default=None): And(
                     Or(str, list),
                     Use(input_to_list),
-                    lambda s: all(i in ['minmax', 'kl'] for i in s)),
+                    lambda s: all(i in ['minmax', 'kl', 'percentile'] for i in s)),
             }
         },
         Optional('op_wise', default=None): {
@@ -662,7 +662,8 @@ schema = Schema({
             Optional('sigopt_project_id'): str,
             Optional('sigopt_experiment_name', default='nc-tune'): str,
             Optional('accuracy_weight', default=1.0): float,
-            Optional('latency_weight', default=1.0): float
+            Optional('latency_weight', default=1.0): float,
+            Optional('bayesian_batch_size'): And(int, lambda s: s > 0)
         } ,
         Hook('accuracy_criterion', handler=_valid_accuracy_field): object,
         Optional('accuracy_criterion', default={'relative': 0.01}): {
@@ -744,7 +745,7 @@ schema = Schema({
             },
         },
         Optional('performance'): {
-            Optional('warmup', default=5): int,
+            Optional('warmup', default=5): Or(int, 'auto'),
             Optional('iteration', default=-1): int,
             Optional('configs'): configs_schema,
             Optional('dataloader'): dataloader_schema,
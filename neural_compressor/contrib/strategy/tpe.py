@@ -15,13 +15,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import bisect
 import copy
 import os
 from pathlib import Path
-from functools import partial
 import numpy as np
-import hyperopt as hpo
-from hyperopt import fmin, hp, STATUS_OK, Trials
 from neural_compressor.utils import logger
 from neural_compressor.strategy.strategy import strategy_registry, TuneStrategy
 
@@ -81,10 +79,11 @@ class TpeTuneStrategy(TuneStrategy):
                  eval_dataloader=None, eval_func=None, dicts=None, q_hooks=None):
         assert conf.usr_cfg.quantization.approach == 'post_training_static_quant', \
                "TPE strategy is only for post training static quantization!"
-        self.hpopt_search_space = None
+        self.search_space = None
         self.warm_start = False
         self.cfg_evaluated = False
-        self.hpopt_trials = Trials()
+        self.tpe_sampler = None
+        self.trials_results = []
         self.max_trials = conf.usr_cfg.tuning.exit_policy.get('max_trials', 200)
         self.loss_function_config = {
             'acc_th': conf.usr_cfg.tuning.accuracy_criterion.relative if \
@@ -104,7 +103,6 @@ class TpeTuneStrategy(TuneStrategy):
             'best_acc_loss': float('inf'),
             'best_lat_diff': 0.0
         }
-        self._algo = None
 
         super().__init__(
             model,
@@ -125,18 +123,17 @@ class TpeTuneStrategy(TuneStrategy):
         for history in self.tuning_history:
             if self._same_yaml(history['cfg'], self.cfg):
                 history['warm_start'] = True
-                history['hpopt_trials'] = self.hpopt_trials
+                history['tpe_sampler'] = self.tpe_sampler
+                history['trials_results'] = self.trials_results
                 history['loss_function_config'] = self.loss_function_config
                 history['tpe_params'] = self.tpe_params
-                history['hpopt_search_space'] = self.hpopt_search_space
-                history['_algo'] = self._algo
+                history['search_space'] = self.search_space
+                history['best_result'] = self.best_result
         save_dict = super().__getstate__()
         return save_dict
 
-    def _configure_hpopt_search_space_and_params(self, search_space):
-        self.hpopt_search_space = {}
-        for param, configs in search_space.items():
-            self.hpopt_search_space[(param)] = hp.choice((param[0]), configs)
+    def _configure_tpe_sampler(self, search_space):
+        self.search_space = search_space
         # Find minimum number of choices for params with more than one choice
         multichoice_params = [len(configs) for param, configs in search_space.items()
                               if len(configs) > 1]
@@ -145,11 +142,13 @@ class TpeTuneStrategy(TuneStrategy):
         min_param_size = min(multichoice_params) if len(multichoice_params) > 0 else 1
         self.tpe_params['n_EI_candidates'] = min_param_size
         self.tpe_params['prior_weight'] = 1 / min_param_size
-        self._algo = partial(hpo.tpe.suggest,
-                            n_startup_jobs=self.tpe_params['n_initial_point'],
-                            gamma=self.tpe_params['gamma'],
-                            n_EI_candidates=self.tpe_params['n_EI_candidates'],
-                            prior_weight=self.tpe_params['prior_weight'])
+        self.tpe_sampler = TPESampler(
+            {param: len(configs) for param, configs in search_space.items()},
+            n_initial_points=self.tpe_params['n_initial_point'],
+            gamma=self.tpe_params['gamma'],
+            n_ei_candidates=self.tpe_params['n_EI_candidates'],
+            prior_weight=self.tpe_params['prior_weight'],
+            seed=self.cfg.tuning.random_seed)
         return True
 
     def traverse(self):
@@ -164,7 +163,7 @@ class TpeTuneStrategy(TuneStrategy):
                      "best_result_file: {}".format(best_result_file))
         if Path(trials_file).exists():
             os.remove(trials_file)
-        status = True;
+        status = True
         tuning_history = self._find_self_tuning_history()
         if tuning_history and not self.warm_start:
             # prepare loss function scaling (best result from basic can be used)
@@ -181,31 +180,16 @@ class TpeTuneStrategy(TuneStrategy):
                 worse_acc_loss,
                 best_lat,
                 self.loss_function_config)
-            first_run_cfg = self.add_loss_to_tuned_history_and_find_best(tuning_history['history'])
-            # Prepare hpopt config with best cfg from history
-            self._configure_hpopt_search_space_and_params(first_run_cfg)
-            # Run first iteration with best result from history
-            trials_count = len(self.hpopt_trials.trials) + 1
-            fmin(partial(self.object_evaluation, model=self.model),
-                space=self.hpopt_search_space,
-                algo=self._algo,
-                max_evals=trials_count,
-                trials=self.hpopt_trials,
-                show_progressbar=False)
-            if pd is not None:
-                self._save_trials(trials_file)
-                self._update_best_result(best_result_file)
-            # Prepare full hpopt search space
-            new_tune_cfgs = self._prepare_final_searchspace(
-                first_run_cfg,
-                self.opwise_tune_cfgs)
-            status = self._configure_hpopt_search_space_and_params(new_tune_cfgs)
+            status = self._configure_tpe_sampler(self.opwise_tune_cfgs)
+            if status:
+                # the tuned configs seed the densities without being evaluated again
+                self._observe_tuned_history(tuning_history['history'])
         elif not self.warm_start:
             self._calculate_loss_function_scaling_components(0.01, 2, self.loss_function_config)
-            status = self._configure_hpopt_search_space_and_params(self.opwise_tune_cfgs)
+            status = self._configure_tpe_sampler(self.opwise_tune_cfgs)
 
         if status:
-            trials_count = len(self.hpopt_trials.trials) + 1
+            trials_count = len(self.trials_results) + 1
             # get fp32 model baseline
             if self.baseline is None:
                 logger.info("Get FP32 model baseline.")
@@ -227,12 +211,12 @@ class TpeTuneStrategy(TuneStrategy):
                 self.cfg_evaluated = False
                 logger.debug("Trial iteration start: {} / {}.".format(
                     trials_count, self.max_trials))
-                fmin(partial(self.object_evaluation, model=self.model),
-                    space=self.hpopt_search_space,
-                    algo=self._algo,
-                    max_evals=trials_count,
-                    trials=self.hpopt_trials,
-                    show_progressbar=False)
+                trial_id, params = self.tpe_sampler.ask()
+                tune_cfg = {param: self.search_space[param][index]
+                            for param, index in params.items()}
+                result = self.object_evaluation(tune_cfg, self.model)
+                self.tpe_sampler.tell(trial_id, result['loss'])
+                self.trials_results.append(result)
                 trials_count += 1
                 if pd is not None:
                     self._save_trials(trials_file)
@@ -243,27 +227,13 @@ class TpeTuneStrategy(TuneStrategy):
         else:
             logger.warn("Can't create search space for input model.")
 
-    def _prepare_final_searchspace(self, first, second):
-        for key, cfgs in second.items():
-            new_cfg = []
-            for cfg in cfgs:
-                if cfg != first[key][0]:
-                    new_cfg.append(cfg)
-            first[key] = first[key] + new_cfg
-        return first
-
-    def add_loss_to_tuned_history_and_find_best(self, tuning_history_list):
+    def _observe_tuned_history(self, tuning_history_list):
         logger.debug("Number of resumed configs is {}.".format(len(tuning_history_list)))
-        best_loss = None
-        first_run_cfg = None
         for history in tuning_history_list:
             result = self._compute_metrics(
                 history['tune_cfg']['op'],
                 history['tune_result'][0],
                 history['tune_result'][1])
-            if best_loss is None or result['loss'] < best_loss:
-                best_loss = result['loss']
-                first_run_cfg = history['tune_cfg']['op'].copy()
             result['source'] = 'finetune'
             history['result'] = result
             logger.debug(
@@ -272,9 +242,14 @@ class TpeTuneStrategy(TuneStrategy):
                                                    result['acc_loss'],
                                                    result['lat_diff'],
                                                    result['quantization_ratio']))
-        for op, cfg in first_run_cfg.items():
-            first_run_cfg[op] = [cfg,]
-        return first_run_cfg
+            params = {}
+            for param, configs in self.search_space.items():
+                cfg = history['tune_cfg']['op'].get(param)
+                if cfg not in configs:
+                    break
+                params[param] = configs.index(cfg)
+            else:
+                self.tpe_sampler.observe(params, result['loss'])
 
     def object_evaluation(self, tune_cfg, model):
         # check if config was alredy evaluated
@@ -321,8 +296,7 @@ class TpeTuneStrategy(TuneStrategy):
             'lat' : lat,
             'acc_loss': acc_diff,
             'lat_diff': lat_diff,
-            'quantization_ratio': quantization_ratio,
-            'status': STATUS_OK}
+            'quantization_ratio': quantization_ratio}
 
     def _calculate_acc_lat_diff(self, acc, lat):
         int8_acc = acc
@@ -369,29 +343,18 @@ class TpeTuneStrategy(TuneStrategy):
         config['lat_scale'] = 10 / np.abs(lat_max - lat_min)
 
     def _save_trials(self, trials_log):
-        """ save trial result to log file"""
-        tpe_trials_results = pd.DataFrame(self.hpopt_trials.results)
+        """ append the last trial result to log file"""
+        tpe_trials_results = pd.DataFrame(self.trials_results[-1:],
+                                          index=[len(self.trials_results) - 1])
         csv_file = trials_log
-        tpe_trials_results.to_csv(csv_file)
+        tpe_trials_results.to_csv(csv_file, mode='a', header=not Path(csv_file).exists())
 
     def _update_best_result(self, best_result_file):
-        if not self.hpopt_trials:
+        if not self.trials_results:
             raise Exception(
                 'No trials loaded to get best result')
-        trials_results = pd.DataFrame(self.hpopt_trials.results)
-
-        if not trials_results[trials_results.acc_loss <=
-                              self.loss_function_config['acc_th']].empty:
-            # If accuracy threshold reached, choose best latency
-            best_result = trials_results[trials_results.acc_loss <=
-                                         self.loss_function_config['acc_th']] \
-                .reset_index(drop=True).sort_values(by=['lat_diff', 'acc_loss'],
-                                                    ascending=[False, True]) \
-                .reset_index(drop=True).loc[0]
-        else:
-            # If accuracy threshold is not reached, choose based on loss function
-            best_result = \
-                trials_results.sort_values('loss', ascending=True).reset_index(drop=True).loc[0]
+        # the best result so far is kept, so only the last trial is compared with it
+        best_result = pd.Series(self.trials_results[-1])
 
         update_best_result = False
         if not self.best_result['best_loss']:
@@ -414,7 +377,7 @@ class TpeTuneStrategy(TuneStrategy):
 
         logger.info("Trial iteration end is {} / {}, best loss is {}, acc_loss is {}, " \
                     "lat_diff is {}, quantization_ratio is {}.".format(
-                                                        len(self.hpopt_trials.trials),
+                                                        len(self.trials_results),
                                                         self.max_trials,
                                                         self.best_result['best_loss'],
                                                         self.best_result['best_acc_loss'],
@@ -459,3 +422,131 @@ class TpeTuneStrategy(TuneStrategy):
             need_stop = False
 
         return need_stop
+
+
+class TPESampler(object):
+    """The tree-structured parzen estimator over categorical parameters.
+
+    The finished trials are kept sorted by loss, and the choice counts of the good trials
+    (below the gamma quantile) and of the other trials are updated when a trial is told or
+    crosses the quantile, so the cost of a proposal doesn't grow with the number of trials.
+    The proposals not told yet are counted as bad trials (constant liar), which lets several
+    proposals be evaluated in parallel and told in any order. A pickled sampler drops them,
+    so it continues from a checkpoint without replaying the trials.
+
+    Args:
+        space (dict):                   The number of choices of each parameter.
+        n_initial_points (int):         The number of random proposals before modeling.
+        gamma (float):                  The quantile of good trials is gamma * sqrt(n).
+        n_ei_candidates (int):          The number of candidates drawn from the density of
+                                        good trials to maximize the expected improvement.
+        prior_weight (float):           The weight of the uniform prior in the densities.
+        seed (int, optional):           The random seed.
+    """
+    def __init__(self, space, n_initial_points=10, gamma=0.3, n_ei_candidates=24,
+                 prior_weight=1.0, seed=None):
+        self.params = list(space.keys())
+        self.n_initial_points = n_initial_points
+        self.gamma = gamma
+        self.n_ei_candidates = max(int(n_ei_candidates), 1)
+        self.prior_weight = prior_weight
+        self._sizes = np.array([space[param] for param in self.params], dtype=np.int64)
+        self._offsets = np.concatenate([[0], np.cumsum(self._sizes)[:-1]]).astype(np.int64)
+        self._prior = np.repeat(1. / self._sizes, self._sizes)
+        self._below_counts = np.zeros(self._sizes.sum())
+        self._above_counts = np.zeros(self._sizes.sum())
+        self._trials = {}
+        self._below = set()
+        self._order = []
+        self._pending = {}
+        self._next_id = 0
+        self._rng = np.random.RandomState(seed)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_above_counts'] = self._above_counts.copy()
+        for choices in self._pending.values():
+            state['_above_counts'][choices] -= 1
+        state['_pending'] = {}
+        return state
+
+    def __len__(self):
+        return len(self._order)
+
+    def ask(self):
+        """Propose the next trial.
+
+        Returns:
+            tuple: The trial id to tell the loss with, and the dict of the choice index
+                   of each parameter.
+        """
+        if len(self._order) + len(self._pending) < self.n_initial_points:
+            index = (self._rng.random_sample(len(self._sizes)) * self._sizes).astype(np.int64)
+        else:
+            index = self._suggest()
+        choices = self._offsets + index
+        trial_id = self._next_id
+        self._next_id += 1
+        self._pending[trial_id] = choices
+        self._above_counts[choices] += 1
+        return trial_id, dict(zip(self.params, index.tolist()))
+
+    def tell(self, trial_id, loss):
+        """Record the loss of a proposed trial."""
+        self._insert(trial_id, self._pending.pop(trial_id), loss)
+
+    def observe(self, params, loss):
+        """Record the loss of a trial not proposed by this sampler."""
+        choices = self._offsets + np.array([params[param] for param in self.params],
+                                           dtype=np.int64)
+        trial_id = self._next_id
+        self._next_id += 1
+        self._above_counts[choices] += 1
+        self._insert(trial_id, choices, loss)
+
+    def best(self):
+        """The loss and the choice index of each parameter of the best trial."""
+        loss, trial_id = self._order[0]
+        return loss, dict(zip(self.params, (self._trials[trial_id] - self._offsets).tolist()))
+
+    def _insert(self, trial_id, choices, loss):
+        # the new trial is counted as a bad trial until it is moved below the quantile
+        self._trials[trial_id] = choices
+        position = bisect.bisect(self._order, (loss, trial_id))
+        self._order.insert(position, (loss, trial_id))
+        n_below = int(np.ceil(self.gamma * np.sqrt(len(self._order))))
+        # the quantile moves by one position at most, so only the trials around it and
+        # the new trial can change group
+        positions = set(range(max(n_below - 2, 0), min(n_below + 2, len(self._order))))
+        positions.add(position)
+        for pos in positions:
+            trial_id = self._order[pos][1]
+            choices = self._trials[trial_id]
+            if pos < n_below and trial_id not in self._below:
+                self._below.add(trial_id)
+                self._below_counts[choices] += 1
+                self._above_counts[choices] -= 1
+            elif pos >= n_below and trial_id in self._below:
+                self._below.remove(trial_id)
+                self._below_counts[choices] -= 1
+                self._above_counts[choices] += 1
+
+    def _suggest(self):
+        n_below = len(self._below)
+        n_above = len(self._order) - n_below + len(self._pending)
+        below = (self._below_counts + self.prior_weight * self._prior) / \
+                (n_below + self.prior_weight)
+        above = (self._above_counts + self.prior_weight * self._prior) / \
+                (n_above + self.prior_weight)
+        # draw the candidates of all parameters from the good density at once, the
+        # cumulative density of the i-th parameter spans [i, i + 1)
+        cumulative = np.cumsum(below)
+        samples = np.arange(len(self._sizes))[:, None] + \
+                  self._rng.random_sample((len(self._sizes), self.n_ei_candidates))
+        candidates = np.clip(np.searchsorted(cumulative, samples, side='right'),
+                             self._offsets[:, None],
+                             (self._offsets + self._sizes - 1)[:, None])
+        # the expected improvement is monotonic in l(x) / g(x)
+        score = np.log(below[candidates]) - np.log(above[candidates])
+        best = candidates[np.arange(len(self._sizes)), np.argmax(score, axis=1)]
+        return best - self._offsets
@@ -17,6 +17,9 @@
 
 import os
 import sys
+import json
+import shutil
+import tempfile
 import numpy as np
 import subprocess
 import signal
@@ -67,6 +70,75 @@ def set_all_env_var(conf, overwrite_existing=False):
     if conf['num_of_instance'] == 1 and conf['cores_per_instance'] == cpu_counts:
         set_env_var('NC_ENV_CONF', True, overwrite_existing=True)
 
+def summarize_latency(latencies, batch_size=1):
+    """Summarize per-iteration latencies (in seconds) into tail-latency statistics.
+
+       The percentiles, max and jitter are those of the iterations as measured, each of
+       them runs a batch, while the mean latency and the throughput are per sample.
+
+    Args:
+        latencies (list or np.array): latency of each measured iteration in seconds.
+        batch_size (int): the number of samples of each iteration.
+
+    Returns:
+        summary (dict): the per-sample mean and the per-iteration percentiles/max/jitter
+                        in milliseconds, and the throughput in samples/sec. Jitter is
+                        the standard deviation of the latencies.
+    """
+    latencies = np.asarray(latencies, dtype=np.float64) * 1000
+    if latencies.size == 0:
+        return {'count': 0}
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    mean = float(latencies.mean()) / batch_size
+    return {'count': int(latencies.size),
+            'mean': mean,
+            'p50': float(p50),
+            'p90': float(p90),
+            'p99': float(p99),
+            'max': float(latencies.max()),
+            'jitter': float(latencies.std()),
+            'throughput': 1000. / mean if mean > 0 else 0.}
+
+def aggregate_instance_results(instance_results):
+    """Aggregate the results reported by concurrently running benchmark instances.
+
+       The latency distribution is computed over the iterations of all instances, and
+       the throughput is the sum of the instance throughputs as they run in parallel.
+
+    Args:
+        instance_results (list): result dict of each instance, which contains
+                                 'batch_size', 'accuracy' and 'latencies' (per-iteration
+                                 latencies in seconds after warmup).
+
+    Returns:
+        report (dict): {'num_of_instance', 'batch_size', 'accuracy', 'latency',
+                        'throughput', 'instances'}.
+    """
+    instances = []
+    latencies = []
+    batch_size = instance_results[0]['batch_size'] if instance_results else None
+    for result in instance_results:
+        latencies.append(np.asarray(result['latencies'], dtype=np.float64))
+        instances.append({'instance': result.get('instance'),
+                          'accuracy': result.get('accuracy'),
+                          'latency': summarize_latency(result['latencies'],
+                                                       result['batch_size'])})
+    latency = summarize_latency(np.concatenate(latencies) if latencies else [], batch_size)
+    accuracy = [ins['accuracy'] for ins in instances if ins['accuracy'] is not None]
+    return {'num_of_instance': len(instances),
+            'batch_size': batch_size,
+            'accuracy': float(np.mean(accuracy)) if accuracy else None,
+            'latency': latency,
+            'throughput': float(sum(ins['latency'].get('throughput', 0.) \
+                                    for ins in instances)),
+            'instances': instances}
+
+def log_latency_summary(summary):
+    logger.info("Latency: {:.3f} ms".format(summary['mean']))
+    logger.info("Iteration latency p50/p90/p99/max: {:.3f}/{:.3f}/{:.3f}/{:.3f} ms".format(
+        summary['p50'], summary['p90'], summary['p99'], summary['max']))
+    logger.info("Iteration latency jitter: {:.3f} ms".format(summary['jitter']))
+
 class Benchmark(object):
     """Benchmark class can be used to evaluate the model performance, with the objective
        setting, user can get the data of what they configured in yaml
@@ -85,6 +157,7 @@ class Benchmark(object):
         self._model = None
         self._b_dataloader = None
         self._results = {}
+        self._report = {}
         if isinstance(conf_fname_or_obj, Benchmark_Conf):
             self.conf = conf_fname_or_obj
         else:
@@ -106,38 +179,71 @@ class Benchmark(object):
         if os.environ.get('NC_ENV_CONF') == 'True':
             return self.run_instance(mode)
         else:
-            return self.config_instance()
+            return self.config_instance(mode)
 
-    def config_instance(self):
+    def config_instance(self, mode='performance'):
         raw_cmd = sys.executable + ' ' + ' '.join(sys.argv)
-        multi_instance_cmd = ''
         num_of_instance = int(os.environ.get('NUM_OF_INSTANCE'))
         cores_per_instance = int(os.environ.get('CORES_PER_INSTANCE'))
-        for i in range(0, num_of_instance):
-            core_list = np.arange(0, cores_per_instance) + i * cores_per_instance
-            # bind cores only allowed in linux/mac os with numactl enabled
-            prefix = self.generate_prefix(core_list)
-            instance_cmd = '{} {}'.format(prefix, raw_cmd)
-            if sys.platform in ['linux']:
-                instance_log = '{}_{}_{}.log'.format(num_of_instance, cores_per_instance, i)
-                multi_instance_cmd += '{} 2>&1|tee {} & \\\n'.format(
-                    instance_cmd, instance_log)
-            else:  # pragma: no cover
-                # (TODO) should also add log to win32 benchmark
-                multi_instance_cmd += '{} \n'.format(instance_cmd)
-        
-        multi_instance_cmd += 'wait' if sys.platform in ['linux'] else ''
-        logger.info("Running command is\n{}".format(multi_instance_cmd))
+        # each instance dumps its structured result to a file of this folder
+        result_dir = tempfile.mkdtemp(prefix='nc_benchmark_')
         # each instance will execute single instance
         set_env_var('NC_ENV_CONF', True, overwrite_existing=True)
-        if sys.platform in ['linux']:
-            p = subprocess.Popen(multi_instance_cmd, preexec_fn=os.setsid, shell=True) # nosec
-        elif sys.platform in ['win32']:  # pragma: no cover
-            p = subprocess.Popen(multi_instance_cmd, start_new_session=True, shell=True) # nosec
+        processes = []
+        result_files = []
         try:
-            p.communicate()
-        except KeyboardInterrupt:
-            os.killpg(os.getpgid(p.pid), signal.SIGKILL)
+            for i in range(0, num_of_instance):
+                core_list = np.arange(0, cores_per_instance) + i * cores_per_instance
+                # bind cores only allowed in linux/mac os with numactl enabled
+                prefix = self.generate_prefix(core_list)
+                instance_cmd = '{} {}'.format(prefix, raw_cmd)
+                result_file = os.path.join(result_dir, '{}.json'.format(i))
+                result_files.append(result_file)
+                env = dict(os.environ, NC_INSTANCE_ID=str(i), NC_INSTANCE_RESULT=result_file)
+                if sys.platform in ['linux']:
+                    instance_log = '{}_{}_{}.log'.format(num_of_instance, cores_per_instance, i)
+                    instance_cmd = '{} 2>&1|tee {}'.format(instance_cmd, instance_log)
+                    logger.info("Running command is\n{}".format(instance_cmd))
+                    processes.append(subprocess.Popen(instance_cmd, preexec_fn=os.setsid, \
+                                                      shell=True, env=env)) # nosec
+                elif sys.platform in ['win32']:  # pragma: no cover
+                    # (TODO) should also add log to win32 benchmark
+                    logger.info("Running command is\n{}".format(instance_cmd))
+                    processes.append(subprocess.Popen(instance_cmd, start_new_session=True, \
+                                                      shell=True, env=env)) # nosec
+            try:
+                for p in processes:
+                    p.communicate()
+            except KeyboardInterrupt:
+                for p in processes:
+                    if p.poll() is None:
+                        os.killpg(os.getpgid(p.pid), signal.SIGKILL)
+                raise
+
+            instance_results = []
+            for result_file in result_files:
+                if not os.path.exists(result_file):
+                    logger.warning("Benchmark instance result {} is missing, " \
+                                   "the instance may fail.".format(result_file))
+                    continue
+                with open(result_file, 'r') as f:
+                    instance_results.append(json.load(f))
+        finally:
+            shutil.rmtree(result_dir, ignore_errors=True)
+
+        if len(instance_results) == 0:
+            return None
+        report = aggregate_instance_results(instance_results)
+        self._report[mode] = report
+        logger.info("\n{} mode benchmark result of {} instances:".format(
+            mode, report['num_of_instance']))
+        if mode == 'accuracy' and report['accuracy'] is not None:
+            logger.info("Accuracy is {:.4f}".format(report['accuracy']))
+        elif mode == 'performance' and report['latency']['count'] > 0:
+            logger.info("Batch size = {}".format(report['batch_size']))
+            log_latency_summary(report['latency'])
+            logger.info("Throughput sum: {:.3f} images/sec".format(report['throughput']))
+        return report
 
     def generate_prefix(self, core_list):
         if sys.platform in ['linux'] and os.system('numactl --show >/dev/null 2>&1') == 0:
@@ -224,13 +330,20 @@ class Benchmark(object):
         self.objective = OBJECTIVES[objective](cfg.tuning.accuracy_criterion, \
                                                is_measure=True)
 
+        # without a user specified iteration, stop measuring once the latency is stable
+        if mode == 'performance' and iteration == -1:
+            self.objective.measurer.auto_stop = True
         val = self.objective.evaluate(b_func, self._model)
         # measurer contain info not only performance(eg, memory, model_size)
         # also measurer have result list among steps
         acc, _ = val
         batch_size = self._b_dataloader.batch_size
-        warmup =  0 if deep_get(cfg, 'evaluation.{}.warmup'.format(mode)) is None \
-            else deep_get(cfg, 'evaluation.{}.warmup'.format(mode))
+        warmup = deep_get(cfg, 'evaluation.{}.warmup'.format(mode))
+        if warmup is None:
+            warmup = 0
+        elif warmup == 'auto':
+            # use the warmup steps detected from the latency steady state
+            warmup = getattr(self.objective.measurer, 'warmup', 0)
 
         if len(self.objective.measurer.result_list()) < warmup:
             if len(self.objective.measurer.result_list()) > 1 and warmup != 0:
@@ -241,6 +354,14 @@ class Benchmark(object):
         result_list = self.objective.measurer.result_list()[warmup:]
         latency = np.array(result_list).mean() / batch_size
         self._results[mode] = acc, batch_size, result_list
+        instance_result = {'instance': int(os.environ.get('NC_INSTANCE_ID', 0)),
+                           'accuracy': float(acc) if np.isscalar(acc) else None,
+                           'batch_size': batch_size,
+                           'latencies': [float(res) for res in result_list]}
+        self._report[mode] = aggregate_instance_results([instance_result])
+        if os.environ.get('NC_INSTANCE_RESULT'):
+            with open(os.environ.get('NC_INSTANCE_RESULT'), 'w') as f:
+                json.dump(instance_result, f)
 
         logger.info("\n{} mode benchmark result:".format(mode))
         for i, res in enumerate(result_list):
@@ -250,13 +371,25 @@ class Benchmark(object):
             logger.info("Accuracy is {:.4f}".format(acc))
         elif mode == 'performance':
             logger.info("Batch size = {}".format(batch_size))
-            logger.info("Latency: {:.3f} ms".format(latency * 1000))
+            if len(result_list) > 0:
+                log_latency_summary(self._report[mode]['latency'])
+            else:
+                logger.info("Latency: {:.3f} ms".format(latency * 1000))
             logger.info("Throughput: {:.3f} images/sec".format(1. / latency))
 
     @property
     def results(self):
         return self._results
 
+    @property
+    def report(self):
+        """The structured benchmark report of each mode, which contains the latency
+           distribution (per-sample mean, per-iteration p50/p90/p99/max/jitter in ms) and
+           the throughput. In the
+           multi-instance case, it aggregates the results of all instances.
+        """
+        return self._report
+
     @property
     def b_dataloader(self):
         return self._b_dataloader
@@ -15,6 +15,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 from abc import abstractmethod
 from collections import UserDict
 from neural_compressor.utils.utility import LazyImport, singleton
@@ -200,12 +201,121 @@ class KnowledgeDistillationLoss(object):
             targets = tmp
         return self.loss_cal(student_outputs, targets)
 
+class PyTorchTeacherOutputsCache(object):
+    """Memory-mapped store of the teacher model outputs, keyed by the sample index.
+
+       When the training data and augmentation are deterministic, the teacher outputs
+       of a sample are the same in every epoch. They are written to the store in the
+       first epoch, or precomputed offline, and read back in the later epochs instead
+       of running the teacher model. With topk, only the top k logits of the last axis
+       and their positions are stored, and the other logits are restored as -inf, which
+       have zero probability in the distillation loss. Only the logits are stored, the
+       teacher model should return a tensor, or a dict such as the ModelOutput of the
+       transformers models with the logits under 'logits'.
+
+    Args:
+        path (str): the directory of the store, an existing store is reopened.
+        num_samples (int): the number of samples of the training dataset.
+        topk (int, optional): the number of the logits kept in each row of the outputs.
+    """
+    def __init__(self, path, num_samples, topk=None):
+        assert num_samples > 0, 'num_samples should be positive.'
+        self.path = path
+        self.num_samples = num_samples
+        self.topk = topk
+        self.shape = self.values = self.indices = None
+        os.makedirs(path, exist_ok=True)
+        filled_file = os.path.join(path, 'filled.npy')
+        if os.path.exists(filled_file):
+            self.filled = np.load(filled_file, mmap_mode='r+')
+            assert len(self.filled) == num_samples, 'The teacher outputs store in {} ' \
+                'has {} samples instead of {}.'.format(path, len(self.filled), num_samples)
+            if os.path.exists(os.path.join(path, 'values.npy')):
+                self.shape = tuple(np.load(os.path.join(path, 'shape.npy')).tolist())
+                self.values = np.load(os.path.join(path, 'values.npy'), mmap_mode='r+')
+                if os.path.exists(os.path.join(path, 'indices.npy')):
+                    self.indices = np.load(os.path.join(path, 'indices.npy'), mmap_mode='r+')
+                assert (self.indices is not None) == bool(topk) and \
+                    (not topk or self.values.shape[-1] == min(topk, self.shape[-1])), \
+                    'The teacher outputs store in {} has a different topk.'.format(path)
+        else:
+            self.filled = np.lib.format.open_memmap(
+                filled_file, mode='w+', dtype=np.bool_, shape=(num_samples,))
+
+    def _create(self, shape):
+        self.shape = shape
+        np.save(os.path.join(self.path, 'shape.npy'), np.array(shape, dtype=np.int64))
+        if self.topk:
+            shape = shape[:-1] + (min(self.topk, shape[-1]),)
+            self.indices = np.lib.format.open_memmap(
+                os.path.join(self.path, 'indices.npy'), mode='w+', dtype=np.int32,
+                shape=(self.num_samples,) + shape)
+        self.values = np.lib.format.open_memmap(
+            os.path.join(self.path, 'values.npy'), mode='w+', dtype=np.float32,
+            shape=(self.num_samples,) + shape)
+
+    @staticmethod
+    def logits(outputs):
+        """Get the logits tensor from the teacher outputs."""
+        if (isinstance(outputs, dict) or isinstance(outputs, UserDict)) and \
+           'logits' in outputs:
+            outputs = outputs['logits']
+        if not isinstance(outputs, torch.Tensor):
+            raise TypeError('The teacher outputs cache only stores a logits tensor, the '
+                            'teacher model should return a tensor or a dict with the '
+                            '\'logits\' tensor instead of {}.'.format(type(outputs)))
+        return outputs
+
+    def get(self, indices):
+        """Get the teacher outputs of the samples, None if any of them is not stored."""
+        indices = np.asarray(indices)
+        if self.values is None or not self.filled[indices].all():
+            return None
+        values = torch.from_numpy(np.array(self.values[indices]))
+        if not self.topk:
+            return values
+        outputs = torch.full((len(indices),) + self.shape, float('-inf'))
+        return outputs.scatter_(-1, torch.from_numpy(np.array(self.indices[indices])).long(),
+                                values)
+
+    def put(self, indices, outputs):
+        """Store the teacher outputs of the samples, and return them as get returns them,
+           so all the epochs see the same teacher outputs."""
+        indices = np.asarray(indices)
+        outputs = self.logits(outputs).detach().float()
+        if self.values is None:
+            self._create(tuple(outputs.shape[1:]))
+        assert tuple(outputs.shape[1:]) == self.shape, 'The shape of teacher outputs ' \
+            '{} is different from the stored {}.'.format(tuple(outputs.shape[1:]), self.shape)
+        if self.topk:
+            values, topk_indices = outputs.topk(self.values.shape[-1], dim=-1)
+            self.indices[indices] = topk_indices.cpu().numpy()
+            self.values[indices] = values.cpu().numpy()
+            outputs = torch.full_like(outputs, float('-inf')).scatter_(-1, topk_indices, values)
+        else:
+            self.values[indices] = outputs.cpu().numpy()
+        self.filled[indices] = True
+        return outputs
+
+    def flush(self):
+        """Write the stored outputs to disk."""
+        for data in [self.filled, self.values, self.indices]:
+            if data is not None:
+                data.flush()
+
+
 class PyTorchKnowledgeDistillationLoss(KnowledgeDistillationLoss):
     def __init__(self, temperature=1.0, loss_types=['CE', 'CE'], 
-                 loss_weights=[0.5, 0.5]):
+                 loss_weights=[0.5, 0.5], teacher_outputs_cache=None):
         super(PyTorchKnowledgeDistillationLoss, self).__init__(temperature=temperature, 
                                                                loss_types=loss_types,
                                                                loss_weights=loss_weights)
+        # the opt-in PyTorchTeacherOutputsCache, and the index of the next sample in it,
+        # which is reset at the beginning of each epoch. The samples are only counted when
+        # they come in the same order in every epoch.
+        self.teacher_outputs_cache = teacher_outputs_cache
+        self.sample_index = 0
+        self.sequential_samples = True
         if self.student_targets_loss is None:
             if self.loss_types[0] == 'CE':
                 self.student_targets_loss = torch.nn.CrossEntropyLoss()
@@ -235,11 +345,45 @@ class PyTorchKnowledgeDistillationLoss(KnowledgeDistillationLoss):
         targets_prob = torch.nn.functional.softmax(targets, dim=-1)
         return torch.nn.functional.kl_div(log_prob, targets_prob)
     
-    def teacher_model_forward(self, input, teacher_model=None):
+    def _sample_indices(self, input):
+        """The indices of the samples in the input, the samples are assumed to come in
+           the same order in every epoch."""
+        if isinstance(input, dict) or isinstance(input, UserDict):
+            input = list(input.values())
+        while isinstance(input, list) or isinstance(input, tuple):
+            input = input[0]
+        batch_size = input.shape[0]
+        indices = np.arange(self.sample_index, self.sample_index + batch_size) % \
+            self.teacher_outputs_cache.num_samples
+        self.sample_index = (self.sample_index + batch_size) % \
+            self.teacher_outputs_cache.num_samples
+        return indices
+
+    def teacher_model_forward(self, input, teacher_model=None, indices=None):
+        """Get the teacher outputs of the input.
+
+        Args:
+            input (object): the input of the teacher model.
+            teacher_model (object, optional): the teacher model instead of self.teacher_model.
+            indices (list, optional): the sample indices of the input in the teacher outputs
+                                      cache, counted from the order of the samples if None.
+        """
         if self.loss_weights[1] > 0:
             model = self.teacher_model if teacher_model is None else teacher_model
             assert isinstance(model, torch.nn.Module), \
             'Teacher model should be a torch Module instead of {}'.format(type(model))
+            cache = self.teacher_outputs_cache
+            if cache is not None:
+                if indices is None and not self.sequential_samples:
+                    raise ValueError('The samples are not in the same order in every epoch, '
+                                     'pass the indices of the samples to look up the '
+                                     'teacher outputs cache.')
+                indices = self._sample_indices(input) if indices is None else indices
+                outputs = cache.get(indices)
+                if outputs is not None:
+                    device = next(model.parameters(), torch.empty(0)).device
+                    self.teacher_outputs = outputs.to(device)
+                    return
             model.eval()
             with torch.no_grad():
                 if isinstance(input, dict) or isinstance(input, UserDict):
@@ -248,7 +392,10 @@ class PyTorchKnowledgeDistillationLoss(KnowledgeDistillationLoss):
                     outputs = model(*input)
                 else:
                     outputs = model(input)
-                self.teacher_outputs = outputs
+            if cache is not None:
+                # the logits as the cached outputs of the later epochs
+                outputs = cache.put(indices, outputs)
+            self.teacher_outputs = outputs
         
     def teacher_student_loss_cal(self, student_outputs, teacher_outputs):
         assert self.teacher_student_loss, 'teacher_student_loss not specified.'
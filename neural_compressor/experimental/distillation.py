@@ -24,6 +24,9 @@ from .common import Model
 from ..adaptor import FRAMEWORKS
 from neural_compressor.experimental.common import Criterions, Optimizers
 from ..conf.config import Distillation_Conf
+from ..utils.utility import LazyImport
+
+torch = LazyImport('torch')
 
 class Distillation(Component):
     """
@@ -71,6 +74,23 @@ class Distillation(Component):
             else:
                 self.best_model = self._model
 
+    def _on_epoch_begin(self, epoch):
+        """ called on the beginning of epochs """
+        if getattr(self.criterion, 'teacher_outputs_cache', None) is not None:
+            # the samples of the teacher outputs cache are counted from the epoch begin
+            self.criterion.sample_index = 0
+            if self._train_dataloader is not None:
+                self.criterion.sequential_samples = \
+                    self._sequential_samples(self._train_dataloader)
+
+    @staticmethod
+    def _sequential_samples(dataloader):
+        """Whether the dataloader yields the samples in the same order in every epoch."""
+        if getattr(dataloader, 'shuffle', False):
+            return False
+        sampler = getattr(dataloader, 'sampler', None)
+        return sampler is None or isinstance(sampler, torch.utils.data.SequentialSampler)
+
     def on_post_forward(self, input, teacher_output=None):
         """ called after model forward """
         assert self.criterion and hasattr(self.criterion, "teacher_model_forward"), \
@@ -206,6 +226,7 @@ class Distillation(Component):
     def generate_hooks(self):
         # register hooks for distillation
         self.register_hook('pre_epoch_begin', self._pre_epoch_begin)
+        self.register_hook('on_epoch_begin', self._on_epoch_begin)
         self.register_hook('on_epoch_end', self._on_epoch_end)
 
     def __call__(self):
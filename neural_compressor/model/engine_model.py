@@ -50,15 +50,9 @@ class EngineModel(BaseModel):
             graph.graph_init(yaml_path, bin_path)
             # logger.warn("When input yaml and bin, it can not use func in compile.")
         else:
-            from engine.compile.loaders.loader import Loader
-            from engine.compile.extractors.extractor import Extractor
-            from engine.compile.sub_graph.subgraph_matcher import SubGraphMatcher
-            loader = Loader()
-            extractor = Extractor()
-            sub_graph_matcher = SubGraphMatcher()
-            graph = loader(model)
-            graph = extractor(graph)
-            graph = sub_graph_matcher(graph)
+            # the compiled IR is cached when ENGINE_IR_CACHE is set
+            from engine.compile import prepare_ir
+            graph = prepare_ir(model)
         return graph
 
     @property
@@ -120,11 +120,11 @@ def get_model_fwk_name(model):
     """
     def _is_onnxruntime(model):
         try:
-            ort.InferenceSession(model.SerializeToString())
+            # a model over 2GB can not be serialized, so check the type first
+            if isinstance(model, onnx.ModelProto):
+                return 'onnxruntime'
         except:
             pass
-        else:
-            return 'onnxruntime'
         try:
             ort.InferenceSession(model)
         except:
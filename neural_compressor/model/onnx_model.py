@@ -16,6 +16,7 @@
 # limitations under the License.
 
 import os
+import copy
 import logging
 from pathlib import Path
 from neural_compressor.utils.utility import LazyImport
@@ -26,6 +27,9 @@ ort = LazyImport("onnxruntime")
 
 logger = logging.getLogger()
 
+# the size limit of a serialized protobuf message
+MAXIMUM_PROTOBUF = 2147483648
+
 
 def find_by_name(item_name, item_list):
     '''
@@ -38,18 +42,115 @@ def find_by_name(item_name, item_list):
     return items[0] if len(items) > 0 else None
 
 
+def _remove_by_names(items, name_to_item, names):
+    '''
+    Helper function to remove the items of the names from a repeated field in one pass,
+    and from its name-indexed map.
+    '''
+    names = set(names)
+    if not names:
+        return
+    for idx in reversed([idx for idx, item in enumerate(items) if item.name in names]):
+        del items[idx]
+    for name in names:
+        name_to_item.pop(name, None)
+
+
+def _copy_fields(src, dst, skip=()):
+    '''
+    Helper function to copy the fields of a protobuf message except the skipped ones.
+    '''
+    for field, value in src.ListFields():
+        if field.name in skip:
+            continue
+        if field.label == field.LABEL_REPEATED:
+            getattr(dst, field.name).extend(value)
+        elif field.type == field.TYPE_MESSAGE:
+            getattr(dst, field.name).CopyFrom(value)
+        else:
+            setattr(dst, field.name, value)
+
+
+def copy_with_external_data(model, output_path, size_threshold=1024):
+    '''
+    Copy the model for saving to output_path, with the initializers larger than
+    size_threshold written to the external data file output_path + ".data" one at a time.
+    The initializers of the copy only refer to the external data, so the copy stays
+    small whatever the size of the model, and the model itself is not changed.
+        parameter model: ModelProto to copy.
+        parameter output_path: the path the copy is going to be saved to.
+        return: the copy of the model.
+    '''
+    location = Path(output_path).name + ".data"
+    copied = onnx.ModelProto()
+    _copy_fields(model, copied, skip=('graph',))
+    _copy_fields(model.graph, copied.graph, skip=('initializer',))
+    with open(os.path.join(os.path.dirname(os.path.abspath(output_path)), location), 'wb') as f:
+        for tensor in model.graph.initializer:
+            stub = copied.graph.initializer.add()
+            if not tensor.HasField('raw_data') or len(tensor.raw_data) < size_threshold:
+                stub.CopyFrom(tensor)
+                continue
+            _copy_fields(tensor, stub, skip=('raw_data',))
+            raw_data = tensor.raw_data
+            offset = f.tell()
+            f.write(raw_data)
+            stub.data_location = onnx.TensorProto.EXTERNAL
+            for key, value in [('location', location), ('offset', str(offset)),
+                               ('length', str(len(raw_data)))]:
+                entry = stub.external_data.add()
+                entry.key = key
+                entry.value = value
+    return copied
+
+
+def save_model(model, output_path, use_external_data_format=None):
+    '''
+    Save the model, with the initializers in an external data file if use_external_data_format,
+    by default if the model is larger than the 2GB limit of protobuf.
+    '''
+    if use_external_data_format is None:
+        use_external_data_format = model.ByteSize() >= MAXIMUM_PROTOBUF
+    if use_external_data_format:
+        model = copy_with_external_data(model, output_path)
+    onnx.save_model(model, output_path)
+
+
 class ONNXModel(BaseModel):
     def __init__(self, model, **kwargs):
         self._model = model if not isinstance(model, str) else onnx.load(model)
+        self._model_path = model if isinstance(model, str) else None
         self.node_name_counter = {}
         self._graph_info = {}
         self._get_graph_info()
         self._input_name_to_nodes = {}
-        self._get_input_name_to_nodes()
         self._output_name_to_node = {}
-        self._get_output_name_to_node()
+        self._name_to_node = {}
+        self._name_to_initializer = {}
+        self._name_to_input = {}
+        self._name_to_output = {}
+        self._name_to_value_info = {}
+        self.update()
         self._q_config = None
 
+    # the maps of update() which refer to the messages of the graph
+    _GRAPH_INDEXES = ('_input_name_to_nodes', '_output_name_to_node', '_name_to_node',
+                      '_name_to_initializer', '_name_to_input', '_name_to_output',
+                      '_name_to_value_info')
+
+    def __deepcopy__(self, memo):
+        '''
+        Copy the model once and rebuild the name-indexed maps on the copied graph, instead
+        of copying the messages they refer to again, detached from the copied graph.
+        '''
+        copied = self.__class__.__new__(self.__class__)
+        memo[id(self)] = copied
+        for key, value in self.__dict__.items():
+            if key not in self._GRAPH_INDEXES:
+                setattr(copied, key, copy.deepcopy(value, memo))
+        copied.update()
+        return copied
+
     def framework(self):
         return 'onnxruntime'
 
@@ -70,8 +171,7 @@ class ONNXModel(BaseModel):
         self._model = model
         self._graph_info = {}
         self._get_graph_info()
-        self._get_input_name_to_nodes()             
-        self._get_output_name_to_node()             
+        self.update()
 
     @property
     def graph_info(self):
@@ -81,10 +181,47 @@ class ONNXModel(BaseModel):
         for node in self._model.graph.node:
             self.graph_info.update({node.name: node.op_type})
 
+    def update(self):
+        '''
+        Rebuild the name-indexed maps of the graph, needed after the graph is changed
+        without the methods of ONNXModel.
+        '''
+        self._get_input_name_to_nodes()
+        self._get_output_name_to_node()
+        graph = self._model.graph
+        self._name_to_node = {}
+        for node in graph.node:
+            self._name_to_node.setdefault(node.name, node)
+        self._name_to_initializer = {tensor.name: tensor for tensor in graph.initializer}
+        self._name_to_input = {tensor.name: tensor for tensor in graph.input}
+        self._name_to_output = {tensor.name: tensor for tensor in graph.output}
+        self._name_to_value_info = {tensor.name: tensor for tensor in graph.value_info}
+
     def save(self, root):
         if os.path.split(root)[0] != '' and not os.path.exists(os.path.split(root)[0]):
             raise ValueError('"root" directory does not exists.')
-        onnx.save(self._model, root)
+        save_model(self._model, root)
+
+    @property
+    def model_path(self):
+        return self._model_path
+
+    @property
+    def is_large_model(self):
+        return self._model.ByteSize() >= MAXIMUM_PROTOBUF
+
+    def create_session(self, sess_options=None, model_path=None):
+        '''
+        Create an onnxruntime InferenceSession of the model. The model larger than the 2GB
+        limit of protobuf can not be serialized in memory, so it is saved to model_path
+        with external data, and the session is created from the file.
+        '''
+        if not self.is_large_model:
+            return ort.InferenceSession(self._model.SerializeToString(), sess_options)
+        assert model_path is not None, "a path is needed to create the session of a model " \
+                                       "larger than 2GB"
+        save_model(self._model, model_path, use_external_data_format=True)
+        return ort.InferenceSession(model_path, sess_options)
 
     def nodes(self):
         return self._model.graph.node
@@ -102,36 +239,58 @@ class ONNXModel(BaseModel):
         return self._model.opset_import
 
     def remove_node(self, node):
-        if node in self._model.graph.node:
-            self._model.graph.node.remove(node)
+        self.remove_nodes([node])
 
     def remove_nodes(self, nodes_to_remove):
+        candidates = {}
         for node in nodes_to_remove:
-            self.remove_node(node)
+            candidates.setdefault(node.name, []).append(node)
+        indices = [idx for idx, node in enumerate(self._model.graph.node) \
+                   if node.name in candidates and node in candidates[node.name]]
+        for idx in reversed(indices):
+            node = self._model.graph.node[idx]
+            for input_name in node.input:
+                consumers = self._input_name_to_nodes.get(input_name, [])
+                if node in consumers:
+                    consumers.remove(node)
+            for output_name in node.output:
+                if self._output_name_to_node.get(output_name) == node:
+                    del self._output_name_to_node[output_name]
+            if self._name_to_node.get(node.name) == node:
+                del self._name_to_node[node.name]
+            del self._model.graph.node[idx]
 
     def add_node(self, node):
-        self._model.graph.node.extend([node])
+        self.add_nodes([node])
 
     def add_nodes(self, nodes_to_add):
         self._model.graph.node.extend(nodes_to_add)
+        for node in self._model.graph.node[len(self._model.graph.node) - len(nodes_to_add):]:
+            for input_name in node.input:
+                self._input_name_to_nodes.setdefault(input_name, []).append(node)
+            for output_name in node.output:
+                self._output_name_to_node[output_name] = node
+            self._name_to_node.setdefault(node.name, node)
 
     def add_initializer(self, tensor):
-        if find_by_name(tensor.name, self._model.graph.initializer) is None:
-            self._model.graph.initializer.extend([tensor])
+        self.add_initializers([tensor])
+
+    def add_initializers(self, tensors):
+        tensors = [tensor for tensor in tensors if tensor.name not in self._name_to_initializer]
+        self._model.graph.initializer.extend(tensors)
+        initializers = self._model.graph.initializer
+        for tensor in initializers[len(initializers) - len(tensors):]:
+            self._name_to_initializer[tensor.name] = tensor
 
     def get_initializer(self, name):
-        for tensor in self._model.graph.initializer:
-            if tensor.name == name:
-                return tensor
-        return None
+        return self._name_to_initializer.get(name)
 
     def remove_initializer(self, tensor):
-        if tensor in self._model.graph.initializer:
-            self._model.graph.initializer.remove(tensor)
+        self.remove_initializers([tensor])
 
     def remove_initializers(self, init_to_remove):
-        for initializer in init_to_remove:
-            self.remove_initializer(initializer)
+        names = [tensor.name for tensor in init_to_remove if tensor is not None]
+        _remove_by_names(self._model.graph.initializer, self._name_to_initializer, names)
 
     def set_initializer(self, tensor, array):
         old_tensor = self.get_initializer(tensor)
@@ -140,7 +299,23 @@ class ONNXModel(BaseModel):
         data_type = old_tensor.data_type
         new_tensor = onnx.helper.make_tensor(tensor, data_type, dims, array.flatten().tolist())
         self.add_initializer(new_tensor)
-    
+
+    def get_input(self, name):
+        return self._name_to_input.get(name)
+
+    def remove_inputs(self, names):
+        ''' remove the graph inputs of the names, return the names not found '''
+        names = set(names)
+        found = names.intersection(self._name_to_input)
+        _remove_by_names(self._model.graph.input, self._name_to_input, found)
+        return names - found
+
+    def get_output(self, name):
+        return self._name_to_output.get(name)
+
+    def get_value_info(self, name):
+        return self._name_to_value_info.get(name)
+
     @property
     def input_name_to_nodes(self):
         return self._input_name_to_nodes
@@ -203,15 +378,20 @@ class ONNXModel(BaseModel):
         Find out if a node exists in a graph or a node is in the
         new set of nodes created during quantization. Return the node found.
         '''
-        graph_nodes_list = list(graph.node)  #deep copy
-        graph_nodes_list.extend(new_nodes_list)
-        node = find_by_name(node_name, graph_nodes_list)
-        return node
+        if graph is self._model.graph and node_name in self._name_to_node:
+            return self._name_to_node[node_name]
+        if graph is not self._model.graph:
+            node = find_by_name(node_name, graph.node)
+            if node is not None:
+                return node
+        return find_by_name(node_name, new_nodes_list)
 
     def find_nodes_by_initializer(self, graph, initializer):
         '''
         Find all nodes with given initializer as an input.
         '''
+        if graph is self._model.graph:
+            return list(self._input_name_to_nodes.get(initializer.name, []))
         nodes = []
         for node in graph.node:
             for node_input in node.input:
@@ -244,8 +424,4 @@ class ONNXModel(BaseModel):
         '''
         Save model to external data, which is needed for model size > 2GB
         '''
-        if use_external_data_format:
-            onnx.external_data_helper.convert_model_to_external_data(self._model,
-                                                    all_tensors_to_one_file=True,
-                                                    location=Path(output_path).name + ".data")
-        onnx.save_model(self._model, output_path)
+        save_model(self._model, output_path, use_external_data_format or None)
@@ -16,9 +16,11 @@
 # limitations under the License.
 
 from abc import abstractmethod
+from array import array
+import math
 import time
 import numpy as np
-import tracemalloc
+import psutil
 from .utils.utility import get_size
 
 """The objectives supported by neural_compressor, which is driven by accuracy.
@@ -109,26 +111,178 @@ class Measurer(object):
         """
         return self._result_list
 
+    @property
+    def converged(self):
+        """Whether the measurement is stable enough to stop measuring more steps."""
+        return False
+
     def __str__(self):
         return self.representation
 
 class PerformanceMeasure(Measurer):
+    """Measure the duration of each start-end loop with the monotonic nanosecond clock.
+
+       The durations are kept as int64 nanoseconds. The warmup steps are detected as the
+       steps before the first window of `window` steps whose coefficient of variation is
+       not larger than `cv_threshold`, and are excluded from result(). Once the relative
+       standard error of the steady state mean drops to `rel_error`, the measurement is
+       converged, and evaluation loops stop early if `auto_stop` is set.
+
+    Args:
+       representation (string): the string represenation of Measurer object
+       window (int): number of steps used to detect the steady state.
+       cv_threshold (float): max coefficient of variation of a steady state window.
+       rel_error (float): relative standard error of the mean to regard as converged.
+       auto_stop (bool): whether evaluation loops can stop once converged.
+    """
+
+    def __init__(self, representation='', window=5, cv_threshold=0.1, rel_error=0.01,
+                 auto_stop=False):
+        super(PerformanceMeasure, self).__init__(representation)
+        self.window = window
+        self.cv_threshold = cv_threshold
+        self.rel_error = rel_error
+        self.auto_stop = auto_stop
+        self.reset()
+
+    def reset(self):
+        self._durations = array('q')
+        self._warmup = None
+        self._sum = 0
+        self._sum_sq = 0
+        self.start_time = None
+        return self._result_list
+
     def start(self):
-        self.start_time = time.time()
+        self.start_time = time.perf_counter_ns()
 
     def end(self):
-        self.duration = time.time() - self.start_time
-        assert self.duration > 0, 'please use start() before end()'
-        self._result_list.append(self.duration)
+        assert self.start_time is not None, 'please use start() before end()'
+        duration = time.perf_counter_ns() - self.start_time
+        self.start_time = None
+        self._durations.append(duration)
+        if self._warmup is None:
+            if len(self._durations) >= self.window and \
+                    self._cv(self._durations[-self.window:]) <= self.cv_threshold:
+                self._warmup = len(self._durations) - self.window
+                for value in self._durations[self._warmup:]:
+                    self._accumulate(value)
+        else:
+            self._accumulate(duration)
+
+    @property
+    def duration(self):
+        return self._durations[-1] / 1e9 if self._durations else None
+
+    def _accumulate(self, value):
+        self._sum += value
+        self._sum_sq += value * value
+
+    @staticmethod
+    def _cv(values):
+        values = np.asarray(values, dtype=np.float64)
+        mean = values.mean()
+        return values.std() / mean if mean > 0 else 0.
+
+    @property
+    def warmup(self):
+        """Number of detected warmup steps. Before a steady state window is found,
+           the first step is regarded as warmup if there are more than one steps.
+        """
+        if self._warmup is not None:
+            return self._warmup
+        return 1 if len(self._durations) > 1 else 0
+
+    @property
+    def converged(self):
+        if not self.auto_stop or self._warmup is None:
+            return False
+        num = len(self._durations) - self._warmup
+        mean = self._sum / num
+        if num < 2 * self.window or mean <= 0:
+            return False
+        std = math.sqrt(max(self._sum_sq / num - mean * mean, 0.))
+        return std / mean / math.sqrt(num) <= self.rel_error
+
+    def result(self, start=None, end=None):
+        """Get the mean duration in seconds. The detected warmup steps are skipped
+           unless the start or end index is specified.
+        """
+        if start is None and end is None:
+            start = self.warmup
+        start_idx = 0
+        end_idx = len(self._durations)
+        if start is not None and start in range(0, 1+len(self._durations)):
+            start_idx = start
+        if end is not None and end in range(0, 1+len(self._durations)):
+            end_idx = end
+        return np.array(self._durations[start_idx:end_idx], dtype=np.float64).mean() / 1e9
+
+    def result_list(self):
+        """Get the duration in seconds of each start-end loop, warmup steps included."""
+        return [duration / 1e9 for duration in self._durations]
+
+def _reset_peak_rss():
+    """Reset the peak resident set size (VmHWM) of current process, only on linux."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except (OSError, IOError):
+        return False
+
+def _get_peak_rss():
+    """Get the peak resident set size in bytes of current process.
+
+       It reads VmHWM of /proc/self/status on linux, which includes the memory
+       allocated by native framework code. Otherwise, psutil is used to get the peak
+       working set on windows or the current resident set size on other platforms.
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, IOError):
+        pass
+    memory_info = psutil.Process().memory_info()
+    return getattr(memory_info, 'peak_wset', memory_info.rss)
 
 class FootprintMeasure(Measurer):
+    """Measure the peak resident memory (MB) of the process.
+
+       The peak is reset at the first start() after reset(), so the memory held before
+       the measurement, e.g. by model loading, is excluded as far as the current
+       resident memory allows. Each end() only samples the process peak, which keeps
+       the per-step overhead negligible.
+    """
+
+    def __init__(self, representation=''):
+        super(FootprintMeasure, self).__init__(representation)
+        self._started = False
+
+    def reset(self):
+        self._started = False
+        return super(FootprintMeasure, self).reset()
+
     def start(self):
-        tracemalloc.start()
+        if not self._started:
+            _reset_peak_rss()
+            self._started = True
 
     def end(self):
-        _, peak = tracemalloc.get_traced_memory()
-        tracemalloc.stop()
-        self._result_list.append(peak // 1048576)
+        self._result_list.append(_get_peak_rss() // 1048576)
+
+    def result(self, start=None, end=None):
+        """Get the peak memory footprint (MB) among the measured steps."""
+        start_idx = 0
+        end_idx = len(self._result_list)
+        if start is not None and start in range(0, 1+len(self._result_list)):
+            start_idx = start
+        if end is not None and end in range(0, 1+len(self._result_list)):
+            end_idx = end
+        results = self._result_list[start_idx:end_idx]
+        return max(results) if results else 0
 
 class ModelSizeMeasure(Measurer):
     def start(self):
@@ -26,7 +26,7 @@ class BasicTuneStrategy(TuneStrategy):
 
     1. modelwise tuning for all quantizable ops.
     2. fallback tuning from bottom to top to decide the priority of which op has biggest impact
-       on accuracy.
+       on accuracy, or the estimated quantization error of each op if the framework supports.
     3. incremental fallback tuning by fallbacking multiple ops with the order got from #2.
 
     Args:
@@ -124,29 +124,42 @@ class BasicTuneStrategy(TuneStrategy):
                         data_type not in fallback_dtypes):
                         fallback_dtypes.append(data_type)
 
+            # the adaptors without the estimation return None and the ops are evaluated
+            # one by one instead
+            ops_sensitivity = self._ops_sensitivity()
+
             for fallback_dtype in fallback_dtypes:
                 logger.debug(
                     "Continue basic strategy by sorting opwise {} fallback priority.".format
                     (fallback_dtype))
                 ops_acc = OrderedDict()
-                for op, configs in reversed(self.opwise_tune_cfgs.items()):
-                    op_cfgs = copy.deepcopy(best_cfg)
-                    for cfg in configs:
-                        if fallback_dtype == cfg['activation']['dtype']:
-                            op_cfgs['op'][op]['activation'].clear()
-                            op_cfgs['op'][op]['activation']['dtype'] = fallback_dtype
-                            if 'weight' in cfg:
-                                assert cfg['weight']['dtype'] == fallback_dtype
-                                op_cfgs['op'][op]['weight'].clear()
-                                op_cfgs['op'][op]['weight']['dtype'] = fallback_dtype
-                    yield op_cfgs
-                    acc, _ = self.last_tune_result
-                    ops_acc[op] = acc
-
-                op_cfgs = copy.deepcopy(best_cfg)
-                if ops_acc is not None:
+                if ops_sensitivity:
+                    # the estimated quantization error replaces the accuracy of each op
+                    # fallback, so the ops are ordered without evaluating them one by one
+                    ordered_ops = [op for op, configs in self.opwise_tune_cfgs.items()
+                                   if any(fallback_dtype == cfg['activation']['dtype']
+                                          for cfg in configs)]
+                    ordered_ops.sort(key=lambda key: ops_sensitivity.get(key, 0.),
+                                     reverse=True)
+                else:
+                    for op, configs in reversed(self.opwise_tune_cfgs.items()):
+                        op_cfgs = copy.deepcopy(best_cfg)
+                        for cfg in configs:
+                            if fallback_dtype == cfg['activation']['dtype']:
+                                op_cfgs['op'][op]['activation'].clear()
+                                op_cfgs['op'][op]['activation']['dtype'] = fallback_dtype
+                                if 'weight' in cfg:
+                                    assert cfg['weight']['dtype'] == fallback_dtype
+                                    op_cfgs['op'][op]['weight'].clear()
+                                    op_cfgs['op'][op]['weight']['dtype'] = fallback_dtype
+                        yield op_cfgs
+                        acc, _ = self.last_tune_result
+                        ops_acc[op] = acc
                     ordered_ops = sorted(ops_acc.keys(), key=lambda key: ops_acc[key],
                                          reverse=True)
+
+                op_cfgs = copy.deepcopy(best_cfg)
+                if ordered_ops:
                     for op in ordered_ops:
                         old_cfg = copy.deepcopy(op_cfgs['op'][op])
                         for cfg in self.opwise_tune_cfgs[op]:
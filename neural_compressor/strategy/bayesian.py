@@ -16,8 +16,11 @@
 # limitations under the License.
 
 import copy
+import os
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+from scipy.linalg import cho_solve, cholesky, solve_triangular
 from scipy.optimize import minimize
 from sklearn.gaussian_process.kernels import Matern
 from sklearn.gaussian_process import GaussianProcessRegressor
@@ -132,22 +135,23 @@ class BayesianTuneStrategy(TuneStrategy):
         if self.bayes_opt is None:
             self.bayes_opt = BayesianOptimization(
                 pbounds=pbounds, random_seed=self.cfg.tuning.random_seed)
+        batch_size = self.cfg.tuning.strategy.get('bayesian_batch_size', 1)
         while True:
-            params = self.bayes_opt.gen_next_params()
-            logger.debug("Dump current bayesian params:")
-            logger.debug(params)
-            yield self.params_to_tune_configs(params)
-            try:
-                self.bayes_opt._space.register(params, self.last_tune_result[0])
-            except KeyError:
-                logger.debug("Find registered params, skip it.")
-                pass
+            for params in self.bayes_opt.suggest_batch(batch_size):
+                logger.debug("Dump current bayesian params:")
+                logger.debug(params)
+                yield self.params_to_tune_configs(params)
+                try:
+                    self.bayes_opt._space.register(params, self.last_tune_result[0])
+                except KeyError:
+                    logger.debug("Find registered params, skip it.")
+                    pass
 
 # Util part
 # Bayesian opt acq function
 
 
-def acq_max(ac, gp, y_max, bounds, random_seed, n_warmup=10000, n_iter=10):
+def acq_max(ac, gp, y_max, bounds, random_seed, n_warmup=10000, n_iter=10, n_jobs=1):
     """
     A function to find the maximum of the acquisition function
     Parameters
@@ -159,6 +163,7 @@ def acq_max(ac, gp, y_max, bounds, random_seed, n_warmup=10000, n_iter=10):
     random_state: instance of np.RandomState random number generator
     n_warmup: number of times to randomly sample the acquisition function
     n_iter: number of times to run scipy.minimize
+    n_jobs: number of threads to run scipy.minimize
     Returns
     -------
     x_max, The arg max of the acquisition function.
@@ -171,30 +176,133 @@ def acq_max(ac, gp, y_max, bounds, random_seed, n_warmup=10000, n_iter=10):
     x_max = x_tries[ys.argmax()]
     max_acq = ys.max()
 
+    # the value and the forward difference gradient of minus the acquisition function,
+    # which are evaluated in one batch instead of a call per dimension
+    def neg_ac(x):
+        step = np.sqrt(np.finfo(float).eps) * np.maximum(1., np.abs(x))
+        values = ac(np.vstack([x, x + np.diag(step)]), gp=gp, y_max=y_max)
+        return -values[0], -(values[1:] - values[0]) / step
+
+    def maximize(x_try):
+        return minimize(neg_ac, x_try, jac=True, bounds=bounds, method="L-BFGS-B")
+
     # Explore the parameter space more thoroughly
     x_seeds = np.random.uniform(bounds[:, 0], bounds[:, 1],
                                 size=(n_iter, bounds.shape[0]))
-    for x_try in x_seeds:
-        # Find the minimum of minus the acquisition function
-        res = minimize(lambda x: -ac(x.reshape(1, -1), gp=gp, y_max=y_max),
-                       x_try.reshape(1, -1),
-                       bounds=bounds,
-                       method="L-BFGS-B")
+    if n_jobs is not None and n_jobs > 1 and len(x_seeds) > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(maximize, x_seeds))
+    else:
+        results = [maximize(x_try) for x_try in x_seeds]
 
+    for res in results:
         # See if success
         if not res.success:
             continue
 
         # Store it if better than previous minimum(maximum).
-        if max_acq is None or -res.fun[0] >= max_acq:
+        if max_acq is None or -float(res.fun) >= max_acq:
             x_max = res.x
-            max_acq = -res.fun[0]
+            max_acq = -float(res.fun)
 
     # Clip output to make sure it lies within the bounds. Due to floating
     # point technicalities this is not always the case.
     return np.clip(x_max, bounds[:, 0], bounds[:, 1])
 
 
+class IncrementalGP(object):
+    """Gaussian process regressor with the Matern kernel, whose posterior is updated
+       incrementally.
+
+       The kernel hyperparameters are fit by sklearn's GaussianProcessRegressor on the
+       first fit and whenever the points increase by refit_ratio since the last time.
+       In between, the Cholesky factor of the kernel matrix is kept for the points fit
+       before and extended by a rank-one row per new point, so fitting a new point costs
+       O(n^2) instead of the hyperparameter search and the O(n^3) factorization.
+    """
+
+    def __init__(self, alpha=1e-6, refit_ratio=0.1, random_state=None):
+        self.alpha = alpha
+        self.refit_ratio = refit_ratio
+        self._regressor = GaussianProcessRegressor(
+            kernel=Matern(nu=2.5),
+            alpha=alpha,
+            normalize_y=True,
+            n_restarts_optimizer=5,
+            random_state=random_state,
+        )
+        self.kernel_ = None
+        self.X_train_ = None
+        self._L = None
+        self._n_refit = 0
+
+    def fit(self, X, y, update_only=False):
+        """Fit the GP on all the points X and their targets y.
+
+           The points X[:m] fit before keep their Cholesky rows, m is the length of the
+           common prefix of X and the points of the last fit.
+
+        Args:
+            X (ndarray): the points, [n, dim].
+            y (ndarray): the targets, [n].
+            update_only (bool): only update the posterior without fitting the kernel
+                                hyperparameters, e.g. with fantasized targets.
+        """
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if self.kernel_ is None or (not update_only and len(X) - self._n_refit >=
+                                    max(1, self.refit_ratio * self._n_refit)):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                self._regressor.fit(X, y)
+            self.kernel_ = self._regressor.kernel_
+            self._n_refit = len(X)
+            prefix = 0
+        else:
+            prefix = min(len(X), len(self.X_train_))
+            diff = np.any(X[:prefix] != self.X_train_[:prefix], axis=1)
+            if diff.any():
+                prefix = int(diff.argmax())
+
+        self._L = self._cholesky(X, prefix)
+        self.X_train_ = X
+        # normalize the targets as sklearn does with normalize_y
+        self._y_train_mean = np.mean(y)
+        self._y_train_std = np.std(y) if np.std(y) > 0 else 1.
+        self.alpha_ = cho_solve((self._L, True), (y - self._y_train_mean) / self._y_train_std)
+        return self
+
+    def _cholesky(self, X, prefix):
+        if prefix == 0:
+            K = self.kernel_(X)
+            K[np.diag_indices_from(K)] += self.alpha
+            return cholesky(K, lower=True)
+        L = np.zeros((len(X), len(X)))
+        L[:prefix, :prefix] = self._L[:prefix, :prefix]
+        diag = self.kernel_.diag(X) + self.alpha
+        for i in range(prefix, len(X)):
+            row = solve_triangular(L[:i, :i], self.kernel_(X[:i], X[i:i + 1])[:, 0],
+                                   lower=True)
+            pivot = diag[i] - row.dot(row)
+            if pivot <= 0:
+                # lost the positive definiteness by the rounding errors
+                return self._cholesky(X, 0)
+            L[i, :i] = row
+            L[i, i] = np.sqrt(pivot)
+        return L
+
+    def predict(self, X, return_std=False):
+        """Predict the posterior mean, and the standard deviation if return_std."""
+        X = np.asarray(X, dtype=float)
+        K_trans = self.kernel_(X, self.X_train_)
+        mean = K_trans.dot(self.alpha_) * self._y_train_std + self._y_train_mean
+        if not return_std:
+            return mean
+        V = solve_triangular(self._L, K_trans.T, lower=True)
+        var = self.kernel_.diag(X) - np.einsum("ij,ij->j", V, V)
+        return mean, np.sqrt(np.clip(var, 0, None)) * self._y_train_std
+
+
 def _hashable(x):
     """ ensure that an point is hashable by a python dict """
     return tuple(map(float, x))
@@ -386,21 +494,16 @@ class TargetSpace(object):
 
 
 class BayesianOptimization():
-    def __init__(self, pbounds, random_seed=9527, verbose=2):
+    def __init__(self, pbounds, random_seed=9527, verbose=2, n_jobs=None):
         self._random_seed = random_seed
         # Data structure containing the bounds of its domain,
         # and a record of the points we have evaluated.
         self._space = TargetSpace(pbounds, random_seed)
 
         # Internal GP regressor
-        self._gp = GaussianProcessRegressor(
-            kernel=Matern(nu=2.5),
-            alpha=1e-6,
-            normalize_y=True,
-            n_restarts_optimizer=5,
-            random_state=self._random_seed,
-        )
+        self._gp = IncrementalGP(alpha=1e-6, random_state=self._random_seed)
         self._verbose = verbose
+        self._n_jobs = os.cpu_count() if n_jobs is None else n_jobs
 
     @property
     def space(self):
@@ -423,24 +526,38 @@ class BayesianOptimization():
 
     def suggest(self):
         """Most promissing point to probe next"""
-        if len(set(self._space.target)) < 2:
-            return self._space.array_to_params(self._space.random_sample())
+        return self.suggest_batch(1)[0]
 
-        # Sklearn's GP throws a large number of warnings at times, but
-        # we don't really need to see them here.
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            self._gp.fit(self._space.params, self._space.target)
-
-        # Finding argmax of the acquisition function.
-        suggestion = acq_max(
-            ac=self._ucb,
-            gp=self._gp,
-            y_max=self._space.target.max(),
-            bounds=self._space.bounds,
-            random_seed=self._random_seed
-        )
-        return self._space.array_to_params(suggestion)
+    def suggest_batch(self, batch_size=1):
+        """Most promissing points to probe next.
+
+           The points of a batch are diversified by the kriging believer heuristic, each
+           chosen point is fit with its predicted mean as the target before choosing the
+           next one, which shrinks the uncertainty around it.
+        """
+        if len(set(self._space.target)) < 2:
+            return [self._space.array_to_params(self._space.random_sample())
+                    for _ in range(batch_size)]
+
+        params, target = self._space.params, self._space.target
+        self._gp.fit(params, target)
+        suggestions = []
+        for _ in range(batch_size):
+            # Finding argmax of the acquisition function.
+            suggestion = acq_max(
+                ac=self._ucb,
+                gp=self._gp,
+                y_max=self._space.target.max(),
+                bounds=self._space.bounds,
+                random_seed=self._random_seed,
+                n_jobs=self._n_jobs
+            )
+            suggestions.append(self._space.array_to_params(suggestion))
+            if len(suggestions) < batch_size:
+                params = np.concatenate([params, suggestion.reshape(1, -1)])
+                target = np.concatenate([target, self._gp.predict(suggestion.reshape(1, -1))])
+                self._gp.fit(params, target, update_only=True)
+        return suggestions
 
     def gen_next_params(self):
         next_params = self.suggest()
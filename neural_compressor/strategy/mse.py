@@ -140,8 +140,14 @@ class MSETuneStrategy(TuneStrategy):
                     best_cfg = copy.deepcopy(op_cfgs)
 
         if best_cfg is not None:
-            # Inspect FP32 and dequantized tensor
-            if self.ordered_ops is None:
+            ops_sensitivity = self._ops_sensitivity() if self.ordered_ops is None else None
+            if ops_sensitivity:
+                # the estimated quantization error orders the ops without the tensor dumps
+                self.ordered_ops = sorted(
+                    [op for op in self.opwise_quant_cfgs if op in ops_sensitivity],
+                    key=lambda key: ops_sensitivity[key], reverse=True)
+            elif self.ordered_ops is None:
+                # Inspect FP32 and dequantized tensor
                 op_lists = self.opwise_quant_cfgs.keys()
                 fp32_dump_content = self.adaptor.inspect_tensor(
                     self.model, self.calib_dataloader, op_lists, [1])
@@ -157,8 +163,8 @@ class MSETuneStrategy(TuneStrategy):
                 self.ordered_ops = sorted(ops_mse.keys(), key=lambda key: ops_mse[key],
                                           reverse=True)
 
-            if ops_mse is not None:
-                ordered_ops = sorted(ops_mse.keys(), key=lambda key: ops_mse[key], reverse=True)
+            if self.ordered_ops is not None:
+                ordered_ops = self.ordered_ops
                 op_cfgs = copy.deepcopy(best_cfg)
                 for op in ordered_ops:
                     if not isinstance(op, tuple):
@@ -154,6 +154,14 @@ class TuneStrategy(object):
             framework_specific_info.update({'workspace_path': self.cfg.tuning.workspace.path})
             framework_specific_info.update(
                                 {'graph_optimization': OPTIONS[framework].graph_optimization})
+            # the activation algorithms asked for by the user, the histogram calibrations
+            # are not in the default tuning space
+            activation_algorithms = []
+            for op_cfg in [self.cfg.quantization.model_wise] + \
+                    list((self.cfg.quantization.op_wise or {}).values()):
+                if isinstance(op_cfg, dict):
+                    activation_algorithms += deep_get(op_cfg, 'activation.algorithm') or []
+            framework_specific_info.update({'activation_algorithms': activation_algorithms})
         if framework == 'pytorch_ipex' or framework == 'pytorch' or framework == 'pytorch_fx':
             framework_specific_info.update({"q_dataloader": q_dataloader})
             framework_specific_info.update(
@@ -261,6 +269,8 @@ class TuneStrategy(object):
         #   ...,
         # ]
         self.tuning_history = []
+        # The estimated quantization error of each op, which orders the op fallback.
+        self.ops_sensitivity = None
 
         if resume is not None:
             self.__dict__.update(resume)
@@ -415,6 +425,19 @@ class TuneStrategy(object):
 
         return result
 
+    def _ops_sensitivity(self):
+        """Get the estimated quantization error of each op, which orders the op fallback.
+           It is computed once, only by the strategies which fall back ops.
+
+        Returns:
+            [dict]: The error of each op, None if the adaptor doesn't estimate it.
+        """
+        if self.ops_sensitivity is None and self.calib_dataloader is not None:
+            self.ops_sensitivity = self.adaptor.quantization_sensitivity(
+                self.model, self.calib_dataloader, list(self.opwise_tune_cfgs.keys()),
+                self.calib_iter[0])
+        return self.ops_sensitivity
+
     @property
     def evaluation_result(self):
         return self._evaluate(self.model)
@@ -486,6 +509,9 @@ class TuneStrategy(object):
         Returns:
             dict: Saved dict for resuming
         """
+        for history in self.tuning_history:
+            if self._same_yaml(history['cfg'], self.cfg):
+                history['ops_sensitivity'] = self.ops_sensitivity
         return {'tuning_history': self.tuning_history}
 
     def __setstate__(self, d):
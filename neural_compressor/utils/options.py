@@ -20,6 +20,12 @@ from ..conf.dotdict import DotDict
 class onnxrt:
     graph_optimization = DotDict({'level': None, 'gemm2matmul': True})
 
+class evaluation:
+    # prefetch_depth: batches loaded ahead of inference by a background thread.
+    # postprocess_depth: batches waiting for postprocess and metric update on a
+    #                    background thread. 0 disables the corresponding stage.
+    pipeline = DotDict({'prefetch_depth': 2, 'postprocess_depth': 2})
+
 OPTIONS = {'tensorflow': None,
            'tensorflow_itex': None,
            'pytorch': None,
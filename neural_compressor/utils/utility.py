@@ -33,6 +33,7 @@ from contextlib import contextmanager
 from tempfile import NamedTemporaryFile
 import os.path as osp
 import threading, _thread
+import queue
 import cpuinfo
 import numpy as np
 from neural_compressor.utils import logger
@@ -413,6 +414,179 @@ class OpPrecisionStatistics():
             self.output_handle(i)
 
 
+class _ExceptionWrapper(object):
+    """Carry an exception raised in a worker thread back to the caller thread."""
+
+    def __init__(self, exc):
+        self.exc = exc
+
+
+class Prefetcher(object):
+    """Iterate a dataloader from a background thread through a bounded queue.
+
+       The first batch is fetched in the caller thread so that any lazy setup of the
+       dataloader (e.g. building a tf.data iterator in the default graph) happens in
+       the caller's context. The remaining batches are produced ahead of the consumer,
+       at most `depth` of them at a time. Exceptions raised by the dataloader are
+       re-raised in the caller thread.
+
+       Args:
+           iterable (iterable): the dataloader to iterate.
+           depth (int): the max number of batches buffered ahead of the consumer,
+                        0 means iterating the dataloader in the caller thread.
+    """
+
+    _END = object()
+
+    def __init__(self, iterable, depth=2):
+        assert depth >= 0, "prefetch depth should not be negative"
+        self.iterable = iterable
+        self.depth = depth
+        self._queue = None
+        self._stop = None
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        self.close()
+        if self.depth == 0:
+            return iter(self.iterable)
+        return self._prefetch()
+
+    def _prefetch(self):
+        iterator = iter(self.iterable)
+        try:
+            first = next(iterator)
+        except StopIteration:
+            return
+        data_queue = self._queue = queue.Queue(maxsize=self.depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce,
+                                        args=(iterator, data_queue, self._stop),
+                                        daemon=True)
+        self._thread.start()
+        yield first
+        while True:
+            item = data_queue.get()
+            if item is self._END:
+                break
+            if isinstance(item, _ExceptionWrapper):
+                raise item.exc
+            yield item
+
+    def _produce(self, iterator, data_queue, stop):
+        def put(item):
+            while not stop.is_set():
+                try:
+                    data_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+        except Exception as e:
+            put(_ExceptionWrapper(e))
+            return
+        put(self._END)
+
+    def close(self):
+        """Stop the producer thread and drop the buffered batches."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                while True:
+                    self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread.join(timeout=0.1)
+        self._thread = None
+        self._queue = None
+
+
+class AsyncRunner(object):
+    """Run a function on submitted arguments in order on a background thread.
+
+       It is used to overlap per-batch postprocess and metric update with the
+       inference of the next batch. The function is always called from the same
+       worker thread and in submission order, so stateful callees such as metrics
+       see the same sequence of updates as in a serial loop. The first exception
+       raised by the function is re-raised in the caller thread by `submit` or `join`.
+
+       Args:
+           func (function): the function to run on each submitted item.
+           depth (int): the max number of items waiting to be processed,
+                        0 means calling the function synchronously in `submit`.
+    """
+
+    _END = object()
+
+    def __init__(self, func, depth=2):
+        assert depth >= 0, "queue depth should not be negative"
+        self.func = func
+        self._error = None
+        self._cancelled = False
+        self._queue = None
+        self._thread = None
+        if depth > 0:
+            self._queue = queue.Queue(maxsize=depth)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.join()
+        else:
+            self._cancelled = True
+            self._shutdown()
+
+    def _run(self):
+        while True:
+            args = self._queue.get()
+            if args is self._END:
+                return
+            if self._error is None and not self._cancelled:
+                try:
+                    self.func(*args)
+                except Exception as e:
+                    self._error = e
+
+    def _shutdown(self):
+        if self._thread is not None:
+            self._queue.put(self._END)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, *args):
+        """Queue one call of the function with the given arguments."""
+        if self._thread is None:
+            self.func(*args)
+            return
+        if self._error is not None:
+            self._shutdown()
+            raise self._error
+        self._queue.put(args)
+
+    def join(self):
+        """Wait for all submitted calls to finish."""
+        self._shutdown()
+        if self._error is not None:
+            raise self._error
+
+
 class MODE(Enum):
     QUANTIZATION = 1
     BENCHMARK = 2
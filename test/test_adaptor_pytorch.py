@@ -4,6 +4,7 @@ import torch.nn.quantized as nnq
 from torch.quantization import QuantStub, DeQuantStub
 import torchvision
 import unittest
+import unittest.mock
 import os
 from neural_compressor.adaptor import FRAMEWORKS
 from neural_compressor.model import MODELS
@@ -551,6 +552,53 @@ class TestPytorchAdaptor(unittest.TestCase):
         quantizer.eval_dataloader = dataloader
         quantizer()
 
+    def test_calibration_stats(self):
+        model = MODELS['pytorch'](M().eval())
+        weight = model.model.conv.weight
+        adaptor = FRAMEWORKS[self.framework](self.framework_specific_info)
+        q_capability = adaptor.query_fw_capability(model)
+        op_cfgs = {}
+        for op, cfg in q_capability['opwise'].items():
+            op_cfgs[op] = {key: {k: v[0] for k, v in value.items()} for key, value in cfg.items()}
+        tune_cfg = {'op': op_cfgs, 'calib_iteration': 1, 'calib_sampling_size': 1}
+        dataloader = [(torch.randn(1, 3, 224, 224), 0)]
+        x = dataloader[0][0]
+        with unittest.mock.patch.object(adaptor, 'model_calibration',
+                                        wraps=adaptor.model_calibration) as calibration:
+            q_model = adaptor.quantize(tune_cfg, model, dataloader)
+            self.assertEqual(calibration.call_count, 1)
+            # the statistics are reused by the trials with the same observers
+            self.assertTrue(torch.equal(
+                adaptor.quantize(tune_cfg, model, dataloader).model(x), q_model.model(x)))
+            self.assertEqual(calibration.call_count, 1)
+            # the fallback op is observed by a new observer, so it is calibrated again
+            tune_cfg['op'][('linear', 'Linear')] = {'activation': {'dtype': 'fp32'},
+                                                    'weight': {'dtype': 'fp32'}}
+            q_model = adaptor.quantize(tune_cfg, model, dataloader)
+            adaptor.quantize(tune_cfg, model, dataloader)
+            self.assertEqual(calibration.call_count, 2)
+        # the fp32 model is neither copied nor changed
+        self.assertIs(q_model.model.linear.module.weight, model.model.linear.weight)
+        self.assertIs(model.model.conv.weight, weight)
+        self.assertIsInstance(model.model.conv, nn.Conv2d)
+        self.assertFalse(hasattr(model.model.conv, 'activation_post_process'))
+
+    def test_quantization_sensitivity(self):
+        model = MODELS['pytorch'](M().eval())
+        with torch.no_grad():
+            # an outlier weight makes the linear op sensitive to quantization
+            model.model.linear.weight[0, 0] = 1000.
+        weight = model.model.linear.weight.clone()
+        adaptor = FRAMEWORKS[self.framework](self.framework_specific_info)
+        ops = [('conv', 'Conv2d'), ('linear', 'Linear'), ('not_exist', 'Linear')]
+        dataloader = [(torch.randn(1, 3, 224, 224), 0) for i in range(2)]
+        sensitivity = adaptor.quantization_sensitivity(model, dataloader, ops, 2)
+        self.assertEqual(list(sensitivity.keys()), ops[:2])
+        self.assertGreater(sensitivity[('linear', 'Linear')], sensitivity[('conv', 'Conv2d')])
+        # the hooks are removed and the fp32 weights are restored
+        self.assertFalse(model.model.linear._forward_hooks)
+        self.assertTrue(torch.equal(model.model.linear.weight, weight))
+
     def test_floatfunctions_fallback(self):
         class ModelWithFunctionals(torch.nn.Module):
             def __init__(self):
@@ -711,6 +759,54 @@ class TestPytorchFXAdaptor(unittest.TestCase):
                               })
             self.assertTrue(isinstance(model_fx, torch.fx.graph_module.GraphModule))
 
+    def test_fx_traced_model(self):
+        framework_specific_info = {"device": "cpu",
+                                   "approach": "post_training_static_quant",
+                                   "random_seed": 1234,
+                                   "q_dataloader": None,
+                                   "workspace_path": "./"}
+        adaptor = FRAMEWORKS['pytorch_fx'](framework_specific_info)
+        model = MODELS['pytorch_fx'](M().eval())
+        q_capability = adaptor.query_fw_capability(model)
+        op_cfgs = {}
+        for op, cfg in q_capability['opwise'].items():
+            op_cfgs[op] = {key: {k: v[0] for k, v in value.items()} for key, value in cfg.items()}
+        tune_cfg = {'op': op_cfgs, 'calib_iteration': 1, 'calib_sampling_size': 1}
+        dataloader = [(torch.randn(1, 3, 224, 224), 0)]
+        x = dataloader[0][0]
+        traced_model = adaptor._fx_traced_model(model)
+        q_model = adaptor.quantize(tune_cfg, model, dataloader)
+        # the model is traced once and the trials don't change the traced model
+        self.assertTrue(torch.equal(
+            adaptor.quantize(tune_cfg, model, dataloader).model(x), q_model.model(x)))
+        self.assertIs(adaptor._fx_traced_model(model), traced_model)
+        self.assertFalse(any('activation_post_process' in name
+                             for name, _ in traced_model.named_modules()))
+        self.assertIs(traced_model.linear.weight, model.model.linear.weight)
+        self.assertIsInstance(model.model.conv, nn.Conv2d)
+
+    def test_fx_traced_model_preserved_attributes(self):
+        framework_specific_info = {"device": "cpu",
+                                   "approach": "post_training_static_quant",
+                                   "random_seed": 1234,
+                                   "q_dataloader": None,
+                                   "workspace_path": "./"}
+        adaptor = FRAMEWORKS['pytorch_fx'](framework_specific_info)
+        fp32_model = M().eval()
+        fp32_model.version = 'v1'
+        model = MODELS['pytorch_fx'](fp32_model, **{'prepare_custom_config_dict': \
+                                                    {'preserved_attributes': ['version']}})
+        q_capability = adaptor.query_fw_capability(model)
+        op_cfgs = {}
+        for op, cfg in q_capability['opwise'].items():
+            op_cfgs[op] = {key: {k: v[0] for k, v in value.items()} for key, value in cfg.items()}
+        tune_cfg = {'op': op_cfgs, 'calib_iteration': 1, 'calib_sampling_size': 1}
+        dataloader = [(torch.randn(1, 3, 224, 224), 0)]
+        traced_model = adaptor._fx_traced_model(model)
+        self.assertEqual(traced_model.version, 'v1')
+        q_model = adaptor.quantize(tune_cfg, model, dataloader)
+        self.assertEqual(q_model.model.version, 'v1')
+
     @unittest.skipIf(PT_VERSION < PyTorchVersionMode.PT19.value,
       "Please use PyTroch 1.9 or higher version for dynamic quantization with pytorch_fx backend")
     def test_fx_dynamic_quant(self):
@@ -292,5 +292,41 @@ class TestQuantization(unittest.TestCase):
         self.assertTrue(bayes_opt._space.max()['target'] == 2.0)
         self.assertTrue(len(bayes_opt._space.res()) == 8)
 
+    def test_bayesian_batch(self):
+        from neural_compressor.strategy.bayesian import BayesianOptimization
+        pbounds = {'x1': (0, 1), 'x2': (0, 1)}
+        np.random.seed(9527)
+        bayes_opt = BayesianOptimization(pbounds=pbounds, random_seed=9527)
+        for i in range(4):
+            registered = len(bayes_opt._space)
+            batch = bayes_opt.suggest_batch(3)
+            self.assertEqual(len(batch), 3)
+            for params in batch:
+                try:
+                    bayes_opt._space.register(params, objective_func(params))
+                except KeyError:
+                    pass
+        # the first two points of the last batch are fit with their predicted targets
+        self.assertEqual(len(bayes_opt._gp.X_train_), registered + 2)
+
+    def test_incremental_gp(self):
+        from sklearn.gaussian_process import GaussianProcessRegressor
+        from neural_compressor.strategy.bayesian import IncrementalGP
+        rng = np.random.RandomState(9527)
+        x = rng.rand(20, 3)
+        y = np.sin(x).sum(axis=1)
+        gp = IncrementalGP(refit_ratio=10, random_state=9527)
+        for i in range(2, 21):
+            gp.fit(x[:i], y[:i])
+        # the kernel is fit once and the posterior is updated by the new points
+        self.assertEqual(gp._n_refit, 2)
+        sklearn_gp = GaussianProcessRegressor(kernel=gp.kernel_, alpha=1e-6, optimizer=None,
+                                              normalize_y=True).fit(x, y)
+        x_test = rng.rand(5, 3)
+        mean, std = gp.predict(x_test, return_std=True)
+        expected_mean, expected_std = sklearn_gp.predict(x_test, return_std=True)
+        self.assertTrue(np.allclose(mean, expected_mean))
+        self.assertTrue(np.allclose(std, expected_std))
+
 if __name__ == "__main__":
     unittest.main()
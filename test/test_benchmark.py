@@ -202,5 +202,40 @@ class TestObjective(unittest.TestCase):
                     throughput = re.search(r"Throughput:\s+(\d+(\.\d+)?) images/sec", line)
             self.assertIsNotNone(throughput)
 
+class TestLatencyReport(unittest.TestCase):
+    def test_summarize_latency(self):
+        from neural_compressor.experimental.benchmark import summarize_latency
+        latencies = np.arange(1, 101) / 1000.
+        summary = summarize_latency(latencies, batch_size=4)
+        self.assertEqual(summary['count'], 100)
+        # the mean is per sample while the tail is per iteration
+        self.assertAlmostEqual(summary['mean'], 50.5 / 4)
+        self.assertAlmostEqual(summary['p50'], 50.5)
+        self.assertAlmostEqual(summary['p90'], 90.1)
+        self.assertAlmostEqual(summary['p99'], 99.01)
+        self.assertAlmostEqual(summary['max'], 100.)
+        self.assertAlmostEqual(summary['jitter'], np.std(np.arange(1, 101)))
+        self.assertAlmostEqual(summary['throughput'], 4000. / 50.5)
+        self.assertEqual(summarize_latency([]), {'count': 0})
+
+    def test_aggregate_instance_results(self):
+        from neural_compressor.experimental.benchmark import aggregate_instance_results
+        results = [{'instance': 0, 'accuracy': 0.5, 'batch_size': 2,
+                    'latencies': [0.002] * 9 + [0.02]},
+                   {'instance': 1, 'accuracy': 0.7, 'batch_size': 2,
+                    'latencies': [0.004] * 10}]
+        report = aggregate_instance_results(results)
+        self.assertEqual(report['num_of_instance'], 2)
+        self.assertAlmostEqual(report['accuracy'], 0.6)
+        self.assertEqual(report['latency']['count'], 20)
+        # the slow iteration of instance 0 only shows in the tail
+        self.assertAlmostEqual(report['latency']['max'], 20.)
+        self.assertAlmostEqual(report['latency']['p50'], 4.)
+        self.assertGreater(report['latency']['p99'], report['latency']['p90'])
+        self.assertAlmostEqual(report['instances'][1]['latency']['mean'], 2.)
+        self.assertAlmostEqual(report['throughput'],
+            sum(ins['latency']['throughput'] for ins in report['instances']))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -185,6 +185,68 @@ class TestDistillation(unittest.TestCase):
                                                 distiller.cfg.distillation.train, \
                                                 hooks=distiller.hooks)
 
+    def test_teacher_outputs_cache(self):
+        from neural_compressor.experimental.common.criterion import \
+            PyTorchKnowledgeDistillationLoss, PyTorchTeacherOutputsCache
+        teacher_model = nn.Linear(4, 6)
+        forwards = []
+        teacher_model.register_forward_hook(lambda module, input, output: forwards.append(1))
+        inputs = [torch.randn(2, 4) for _ in range(3)]
+        for topk in [None, 3]:
+            forwards.clear()
+            shutil.rmtree('./teacher_outputs', ignore_errors=True)
+            cache = PyTorchTeacherOutputsCache('./teacher_outputs', num_samples=6, topk=topk)
+            criterion = PyTorchKnowledgeDistillationLoss(loss_types=['CE', 'KL'],
+                                                         teacher_outputs_cache=cache)
+            criterion.teacher_model = teacher_model
+            outputs = []
+            for nepoch in range(3):
+                for idx, input in enumerate(inputs):
+                    criterion.teacher_model_forward(input)
+                    if topk is not None:
+                        # the first epoch sees the same top k logits as the later ones
+                        self.assertEqual(int(torch.isinf(criterion.teacher_outputs).sum()), 6)
+                    if nepoch == 0:
+                        outputs.append(criterion.teacher_outputs)
+                    elif topk is None:
+                        self.assertTrue(torch.allclose(criterion.teacher_outputs, outputs[idx]))
+                    else:
+                        self.assertTrue(torch.equal(criterion.teacher_outputs, outputs[idx]))
+                    loss = criterion(torch.randn(2, 6), torch.tensor([0, 1]))
+                    self.assertTrue(torch.isfinite(loss))
+            # the teacher model only runs in the first epoch
+            self.assertEqual(len(forwards), 3)
+            cache.flush()
+            cache = PyTorchTeacherOutputsCache('./teacher_outputs', num_samples=6, topk=topk)
+            self.assertEqual(tuple(cache.get([0, 1]).shape), (2, 6))
+        shutil.rmtree('./teacher_outputs', ignore_errors=True)
+        # the samples are counted from the beginning of each epoch, and only when they
+        # come in the same order in every epoch
+        from neural_compressor.experimental import Distillation
+        cache = PyTorchTeacherOutputsCache('./teacher_outputs', num_samples=6)
+        criterion = PyTorchKnowledgeDistillationLoss(teacher_outputs_cache=cache)
+        criterion.teacher_model = teacher_model
+        distiller = Distillation()
+        distiller.criterion = criterion
+        dataset = [(torch.randn(4), 0) for _ in range(6)]
+        distiller._train_dataloader = torch.utils.data.DataLoader(dataset, batch_size=2)
+        criterion.teacher_model_forward(inputs[0])
+        distiller._on_epoch_begin(1)
+        self.assertEqual(criterion.sample_index, 0)
+        distiller._train_dataloader = torch.utils.data.DataLoader(dataset, batch_size=2,
+                                                                  shuffle=True)
+        distiller._on_epoch_begin(2)
+        with self.assertRaises(ValueError):
+            criterion.teacher_model_forward(inputs[1])
+        criterion.teacher_model_forward(inputs[1], indices=[2, 3])
+        self.assertTrue(cache.filled[[2, 3]].all())
+        shutil.rmtree('./teacher_outputs', ignore_errors=True)
+        # only the logits of the outputs which are not a tensor are stored
+        logits = torch.randn(2, 6)
+        self.assertIs(PyTorchTeacherOutputsCache.logits({'logits': logits}), logits)
+        with self.assertRaises(TypeError):
+            PyTorchTeacherOutputsCache.logits((logits,))
+
     @unittest.skipIf(tf.version.VERSION < '2.3.0', " keras requires higher version than tf-2.3.0")
     def test_tf_distillation(self):
         from neural_compressor.experimental import Distillation, common
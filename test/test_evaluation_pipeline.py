@@ -0,0 +1,172 @@
+"""Tests for the prefetching evaluation pipeline"""
+import threading
+import time
+import unittest
+import numpy as np
+import onnx
+from onnx import helper, TensorProto, numpy_helper
+
+from neural_compressor.utils.utility import Prefetcher, AsyncRunner
+from neural_compressor.utils import options
+from neural_compressor.adaptor import FRAMEWORKS
+from neural_compressor.model.onnx_model import ONNXModel
+
+
+def build_matmul_model():
+    input = helper.make_tensor_value_info('input', TensorProto.FLOAT, [None, 4])
+    output = helper.make_tensor_value_info('output', TensorProto.FLOAT, [None, 2])
+    weight = numpy_helper.from_array(
+        np.arange(8).reshape(4, 2).astype(np.float32), 'weight')
+    matmul = helper.make_node('MatMul', ['input', 'weight'], ['output'], name='MatMul')
+    graph = helper.make_graph([matmul], 'test_graph', [input], [output], [weight])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    return model
+
+
+class ListDataloader(object):
+    def __init__(self, num, batch_size=2):
+        self.batch_size = batch_size
+        self.data = [np.full((batch_size, 4), i, dtype=np.float32) for i in range(num)]
+
+    def __iter__(self):
+        for idx, data in enumerate(self.data):
+            yield data, idx
+
+
+class RecordMetric(object):
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.preds = []
+        self.labels = []
+
+    def update(self, preds, labels):
+        self.preds.append(preds[0])
+        self.labels.extend(labels)
+
+    def result(self):
+        return float(np.sum([p.sum() for p in self.preds]))
+
+
+class TestPrefetcher(unittest.TestCase):
+    def test_order(self):
+        for depth in [0, 1, 3]:
+            with Prefetcher(range(20), depth) as batches:
+                self.assertEqual(list(batches), list(range(20)))
+                # iterate twice restarts the dataloader
+                self.assertEqual(list(batches), list(range(20)))
+
+    def test_empty(self):
+        with Prefetcher([], 2) as batches:
+            self.assertEqual(list(batches), [])
+
+    def test_exception(self):
+        def gen():
+            yield 0
+            yield 1
+            raise ValueError('broken dataloader')
+
+        results = []
+        with self.assertRaises(ValueError):
+            with Prefetcher(gen(), 2) as batches:
+                for i in batches:
+                    results.append(i)
+        self.assertEqual(results, [0, 1])
+
+    def test_early_stop(self):
+        produced = []
+
+        def gen():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        threads = threading.active_count()
+        with Prefetcher(gen(), 2) as batches:
+            for i in batches:
+                if i == 3:
+                    break
+        self.assertEqual(threading.active_count(), threads)
+        self.assertLess(len(produced), 10)
+
+    def test_first_batch_in_caller_thread(self):
+        caller = threading.current_thread()
+        producers = []
+
+        def gen():
+            for i in range(3):
+                producers.append(threading.current_thread())
+                yield i
+
+        with Prefetcher(gen(), 2) as batches:
+            self.assertEqual(list(batches), [0, 1, 2])
+        self.assertIs(producers[0], caller)
+
+
+class TestAsyncRunner(unittest.TestCase):
+    def test_order(self):
+        for depth in [0, 1, 4]:
+            results = []
+            with AsyncRunner(lambda x: results.append(x), depth) as runner:
+                for i in range(50):
+                    runner.submit(i)
+            self.assertEqual(results, list(range(50)))
+
+    def test_exception(self):
+        def func(x):
+            if x == 2:
+                raise RuntimeError('broken metric')
+
+        with self.assertRaises(RuntimeError):
+            with AsyncRunner(func, 2) as runner:
+                for i in range(5):
+                    runner.submit(i)
+                    time.sleep(0.01)
+
+
+class TestOnnxrtEvaluatePipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.model = ONNXModel(build_matmul_model())
+        framework_specific_info = {"device": "cpu",
+                                   "approach": "post_training_static_quant",
+                                   "random_seed": 1234,
+                                   "q_dataloader": None,
+                                   "backend": "qlinearops",
+                                   "graph_optimization": options.onnxrt.graph_optimization,
+                                   "workspace_path": './nc_workspace/pipeline/'}
+        self.adaptor = FRAMEWORKS["onnxrt_qlinearops"](framework_specific_info)
+
+    @classmethod
+    def tearDownClass(self):
+        import shutil
+        shutil.rmtree('./nc_workspace', ignore_errors=True)
+
+    def evaluate(self, prefetch_depth, postprocess_depth, iteration=-1):
+        pipeline = options.evaluation.pipeline
+        origin = dict(pipeline)
+        pipeline.prefetch_depth = prefetch_depth
+        pipeline.postprocess_depth = postprocess_depth
+        try:
+            metric = RecordMetric()
+            acc = self.adaptor.evaluate(self.model, ListDataloader(10), metric=metric,
+                                        iteration=iteration)
+        finally:
+            pipeline.update(origin)
+        return acc, metric
+
+    def test_pipeline_matches_serial(self):
+        serial_acc, serial_metric = self.evaluate(0, 0)
+        acc, metric = self.evaluate(2, 2)
+        self.assertEqual(acc, serial_acc)
+        self.assertEqual(metric.labels, serial_metric.labels)
+        self.assertEqual(metric.labels, list(range(10)))
+
+    def test_pipeline_iteration(self):
+        _, metric = self.evaluate(2, 2, iteration=3)
+        self.assertEqual(metric.labels, [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -261,5 +261,67 @@ class TestObjective(unittest.TestCase):
         benchmarker()
 
 
+class TestPerformanceMeasure(unittest.TestCase):
+    def measure(self, measurer, durations):
+        from unittest import mock
+        clock = []
+        now = 0
+        for duration in durations:
+            clock.extend([now, now + duration])
+            now += duration
+        with mock.patch('neural_compressor.objective.time.perf_counter_ns',
+                        side_effect=clock):
+            for _ in durations:
+                measurer.start()
+                measurer.end()
+                if measurer.converged:
+                    break
+
+    def test_warmup_detection(self):
+        from neural_compressor.objective import PerformanceMeasure
+        measurer = PerformanceMeasure()
+        durations = [50000000, 30000000, 20000000] + [10000000, 10100000] * 10
+        self.measure(measurer, durations)
+        self.assertEqual(measurer.warmup, 3)
+        self.assertEqual(len(measurer.result_list()), len(durations))
+        self.assertAlmostEqual(measurer.result_list()[0], 0.05)
+        self.assertAlmostEqual(measurer.result(), 0.01005)
+        self.assertAlmostEqual(measurer.result(0), np.mean(durations) / 1e9)
+        self.assertFalse(measurer.converged)
+
+        measurer.reset()
+        self.assertEqual(measurer.result_list(), [])
+        self.measure(measurer, [10000000])
+        self.assertEqual(measurer.warmup, 0)
+        self.assertAlmostEqual(measurer.result(), 0.01)
+
+    def test_auto_stop(self):
+        from neural_compressor.objective import PerformanceMeasure
+        measurer = PerformanceMeasure(auto_stop=True)
+        durations = [50000000] + [10000000, 10100000] * 100
+        self.measure(measurer, durations)
+        self.assertTrue(measurer.converged)
+        self.assertEqual(measurer.warmup, 1)
+        self.assertEqual(len(measurer.result_list()), 11)
+
+
+class TestFootprintMeasure(unittest.TestCase):
+    def test_peak_footprint(self):
+        from neural_compressor.objective import FootprintMeasure
+        measurer = FootprintMeasure()
+        measurer.start()
+        data = np.ones((64, 1024, 1024), dtype=np.uint8)
+        del data
+        measurer.end()
+        measurer.start()
+        measurer.end()
+        self.assertEqual(len(measurer.result_list()), 2)
+        # the peak is only reset at the first start(), so it covers the released array
+        self.assertGreaterEqual(measurer.result(), 64)
+        self.assertEqual(measurer.result(), max(measurer.result_list()))
+        measurer.reset()
+        self.assertEqual(measurer.result_list(), [])
+
+
 if __name__ == "__main__":
     unittest.main()
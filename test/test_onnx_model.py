@@ -1,12 +1,13 @@
 import sys
 import os
+import copy
 import onnx
 from onnx import helper, TensorProto, numpy_helper
 import unittest
 import numpy as np
 
 sys.path.append('..')
-from neural_compressor.model.onnx_model import ONNXModel
+from neural_compressor.model.onnx_model import ONNXModel, copy_with_external_data
 
 def get_onnx_model():
     model = torchvision.models.resnet18()
@@ -278,6 +279,50 @@ class TestOnnxModel(unittest.TestCase):
         self.assertEqual(len(nodes), 1)
         self.assertEqual(nodes[0].name, "Conv1")
 
+    def test_name_maps(self):
+        X1_weight = self.model.get_initializer('X1_weight')
+        self.model.remove_initializers([X1_weight, self.model.get_initializer('X5_bias')])
+        self.assertIsNone(self.model.get_initializer('X1_weight'))
+        self.assertEqual([init.name for init in self.model.initializer()],
+                         ['X1_bias', 'X3_weight', 'X3_bias', 'X5_weight'])
+        new_weight = generate_input_initializer([3, 3, 1, 1], np.float32, 'X1_weight')
+        self.model.add_initializer(new_weight)
+        self.model.add_initializer(X1_weight)
+        self.assertEqual(len(self.model.initializer()), 5)
+        self.assertEqual(self.model.get_initializer('X1_weight'), new_weight)
+        # the initializer in the map is the one in the graph
+        self.model.get_initializer('X1_weight').name = 'renamed'
+        self.assertEqual(self.model.initializer()[-1].name, 'renamed')
+
+        self.assertEqual(self.model.get_input('input0').name, 'input0')
+        self.assertEqual(self.model.get_output('output').name, 'output')
+        self.assertEqual(self.model.remove_inputs(['input0', 'X1']), set(['X1']))
+        self.assertIsNone(self.model.get_input('input0'))
+        self.assertEqual(len(self.model.graph().input), 0)
+
+        add = self.model.find_node_by_name('Add', [], self.model.graph())
+        self.model.remove_node(add)
+        self.assertIsNone(self.model.find_node_by_name('Add', [], self.model.graph()))
+        self.assertNotIn('output', self.model.output_name_to_node)
+        self.assertEqual(self.model.get_children(self.model.get_parent(add, 0)), [])
+        new_add = onnx.helper.make_node('Add', ['X4', 'X5'], ['output'], name='Add')
+        self.model.add_node(new_add)
+        self.assertEqual(self.model.find_node_by_name('Add', [], self.model.graph()), new_add)
+        self.assertEqual(self.model.output_name_to_node['output'].name, 'Add')
+        self.assertEqual([node.name for node in self.model.input_name_to_nodes['X5']], ['Add'])
+
+    def test_deepcopy(self):
+        copied = copy.deepcopy(self.model)
+        # the maps of the copy refer to the tensors and nodes of its own graph
+        copied.get_initializer('X1_weight').name = 'renamed'
+        self.assertEqual(copied.initializer()[0].name, 'renamed')
+        self.assertEqual(self.model.initializer()[0].name, 'X1_weight')
+        copied.find_node_by_name('Conv1', [], copied.graph()).name = 'renamed'
+        self.assertIn('renamed', [node.name for node in copied.nodes()])
+        relu = copied.find_node_by_name('Relu1', [], copied.graph())
+        self.assertIn('renamed', [node.name for node in copied.get_children(relu)])
+        self.assertIn('Conv1', [node.name for node in self.model.nodes()])
+
     def test_get_scale_zero(self):
         input_scale, input_zero = self.q_model.get_scale_zero('B_quantized')
         weight_scale, weight_zero = self.q_model.get_scale_zero('C_quantized') 
@@ -286,6 +331,26 @@ class TestOnnxModel(unittest.TestCase):
     def test_save(self):
         self.model.save_model_to_file('./test_model_6.onnx', use_external_data_format=True)
 
+    def test_external_data(self):
+        weight = generate_input_initializer([64, 64], np.float32, 'X1_weight')
+        self.model.remove_initializer(self.model.get_initializer('X1_weight'))
+        self.model.add_initializer(weight)
+        path = './test_model_external.onnx'
+        saved = copy_with_external_data(self.model.model, path, size_threshold=1024)
+        onnx.save(saved, path)
+        # only the large initializer is external, and the model is not changed
+        self.assertEqual(saved.graph.initializer[-1].data_location, TensorProto.EXTERNAL)
+        self.assertEqual(saved.graph.initializer[0].data_location, TensorProto.DEFAULT)
+        self.assertEqual(self.model.get_initializer('X1_weight'), weight)
+        loaded = ONNXModel(path)
+        self.assertEqual(loaded.model_path, path)
+        np.testing.assert_array_equal(
+            numpy_helper.to_array(loaded.get_initializer('X1_weight')),
+            numpy_helper.to_array(weight))
+        self.assertFalse(loaded.is_large_model)
+        os.remove(path)
+        os.remove(path + '.data')
+
     
 if __name__ == "__main__":
     unittest.main()
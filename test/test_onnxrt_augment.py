@@ -162,6 +162,102 @@ class TestAugment(unittest.TestCase):
         calib_params = augment.dump_calibration()
         assert "A" in calib_params and "B" in calib_params and "D" in calib_params and "C" in calib_params
 
+    def test_dump_calibration_histogram_modes(self):
+        model, dataloader = self.cv_session
+        ranges = {}
+        for calib_mode in ['naive', 'percentile', 'kl']:
+            augment = ONNXRTAugment(ONNXModel(model),
+                                    dataloader,
+                                    ["Conv", "Relu"],
+                                    self.augment_path,
+                                    iterations=[0, 1, 2])
+            calib_params = augment.dump_calibration(calib_mode=calib_mode)
+            assert "A" in calib_params and "C" in calib_params and "D" in calib_params
+            ranges[calib_mode] = augment.get_calibration_ranges()
+        for tensor, (rmin, rmax) in ranges['naive'].items():
+            for calib_mode in ['percentile', 'kl']:
+                self.assertGreaterEqual(ranges[calib_mode][tensor][0], rmin)
+                self.assertLessEqual(ranges[calib_mode][tensor][1], rmax)
+
+        # only the activations of the given nodes use histogram calibration
+        augment = ONNXRTAugment(ONNXModel(model),
+                                dataloader,
+                                ["Conv", "Relu"],
+                                self.augment_path,
+                                iterations=[0, 1, 2])
+        augment.dump_calibration(node_calib_modes={'relu': 'kl'})
+        histogram_outputs = [name for name, (_, kind) in augment.calib_outputs.items() \
+                             if kind == 'histogram']
+        self.assertEqual(sorted(histogram_outputs), ['C', 'D'])
+        self.assertEqual(augment.get_calibration_ranges()['A'], ranges['naive']['A'])
+
+    def test_shared_tensor_calib_mode(self):
+        #      A
+        #      |
+        #    Relu
+        #    /  \
+        # Conv  Conv
+        #   |    |
+        #   C    D
+        A = helper.make_tensor_value_info('A', TensorProto.FLOAT, [1, 1, 5, 5])
+        B = helper.make_tensor('B', TensorProto.FLOAT, [1, 1, 3, 3],
+                               np.random.randn(9).astype(np.float32).tolist())
+        C = helper.make_tensor_value_info('C', TensorProto.FLOAT, [1, 1, 5, 5])
+        D = helper.make_tensor_value_info('D', TensorProto.FLOAT, [1, 1, 5, 5])
+        relu_node = onnx.helper.make_node('Relu', ['A'], ['X'], name='relu')
+        conv1_node = onnx.helper.make_node('Conv', ['X', 'B'], ['C'], name='conv1',
+                                           kernel_shape=[3, 3], pads=[1, 1, 1, 1])
+        conv2_node = onnx.helper.make_node('Conv', ['X', 'B'], ['D'], name='conv2',
+                                           kernel_shape=[3, 3], pads=[1, 1, 1, 1])
+        graph = helper.make_graph([relu_node, conv1_node, conv2_node], 'test_graph_1',
+                                  [A], [C, D], [B])
+        model = helper.make_model(graph, **{'opset_imports': [helper.make_opsetid('', 13)]})
+        augment = ONNXRTAugment(ONNXModel(model), None, ["Conv", "Relu"], self.augment_path)
+
+        # the producer decides, whatever the modes of the consumers
+        modes = augment._resolve_tensor_calib_modes(
+            {'relu': 'percentile', 'conv1': 'kl', 'conv2': 'naive'})
+        self.assertEqual(modes['X'], 'percentile')
+        self.assertEqual(modes['C'], 'kl')
+        self.assertEqual(modes['D'], 'naive')
+        # without a producer mode, the consumers have to agree
+        modes = augment._resolve_tensor_calib_modes({'conv1': 'kl', 'conv2': 'kl'})
+        self.assertEqual(modes['X'], 'kl')
+        for node_calib_modes in [{'conv1': 'kl', 'conv2': 'percentile'},
+                                 {'conv2': 'percentile', 'conv1': 'kl'}]:
+            modes = augment._resolve_tensor_calib_modes(node_calib_modes)
+            self.assertEqual(modes['X'], 'naive')
+
+    def test_histogram_collector(self):
+        from neural_compressor.adaptor.ox_utils.calibration import HistogramCollector, \
+            MinMaxCollector
+        np.random.seed(0)
+        data = [np.random.randn(1000).astype(np.float32) * (i + 1) for i in range(4)]
+        collector = HistogramCollector(num_bins=512)
+        minmax = MinMaxCollector()
+        for d in data:
+            collector.collect(d)
+            minmax.collect(d)
+        all_data = np.concatenate(data)
+        self.assertEqual(collector.hist.size, 512)
+        self.assertEqual(collector.hist.sum(), all_data.size)
+        self.assertEqual(collector.get_range(), minmax.get_range())
+        self.assertAlmostEqual(minmax.get_range()[0], float(all_data.min()))
+        rmin, rmax = collector.get_percentile_range(99.)
+        self.assertLess(rmax, float(all_data.max()))
+        self.assertGreater(rmin, float(all_data.min()))
+        # estimate of the 99.5 percentile is within the re-binning precision
+        self.assertLess(abs(rmax - np.percentile(all_data, 99.5)), 4 * collector.bin_width)
+        rmin, rmax = collector.get_entropy_range()
+        self.assertLessEqual(rmax, float(all_data.max()))
+        self.assertAlmostEqual(rmin, -rmax, places=5)
+
+        # outliers are clipped by entropy calibration
+        collector = HistogramCollector()
+        collector.collect(np.concatenate([np.random.randn(10000), [100.]]))
+        _, rmax = collector.get_entropy_range()
+        self.assertLess(rmax, 50.)
+
     def test_augment_graph(self):
 
         ''' TEST_CONFIG_1'''
@@ -530,8 +626,7 @@ class TestAugment(unittest.TestCase):
         #test calculation of quantization params
         #TO_DO: check rmin/rmax
         quantization_params_dict = augment.dump_calibration()
-        node_output_names, output_dicts_list = augment.get_intermediate_outputs()
-        dict_for_quantization = augment._map_calibration(node_output_names, output_dicts_list)
+        dict_for_quantization = augment.get_calibration_ranges()
         #check the size of the quantization dictionary
         self.assertEqual(len(quantization_params_dict), 11)
         
@@ -2,6 +2,7 @@ import os
 import shutil
 import unittest
 import copy
+from unittest.mock import patch
 import onnx
 import numpy as np
 from onnx import helper, TensorProto, numpy_helper, onnx_pb
@@ -140,6 +141,59 @@ class TestAdaptorONNXRT(unittest.TestCase):
             quantizable_op_types = [op]
             self.static_test(model, q_config, quantize_params, quantizable_op_types)
 
+    def test_quantize_weight_per_channel(self):
+        model = build_model()
+        weight = numpy_helper.to_array(model.graph.initializer[1])
+        for qType, scheme in [(onnx_pb.TensorProto.INT8, 'sym'),
+                              (onnx_pb.TensorProto.UINT8, 'asym')]:
+            quantizer = ONNXQuantizer(copy.deepcopy(model),
+                {'conv2': self.q_config}, self.qlinear_backend, True, None, ['Conv'])
+            q_name, zp_name, scale_name = quantizer.quantize_weight_per_channel(
+                'conv2_weight', qType, scheme, 0)
+            initializers = {init.name: numpy_helper.to_array(init) \
+                            for init in quantizer.model.initializer()}
+            q_weight = initializers[q_name]
+            scale = initializers[scale_name]
+            zero_point = initializers[zp_name]
+            self.assertEqual(q_weight.shape, weight.shape)
+            self.assertEqual(scale.shape, (5,))
+            self.assertEqual(zero_point.dtype, q_weight.dtype)
+            # every channel is quantized with its own range
+            for i in range(weight.shape[0]):
+                rmin, rmax = min(weight[i].min(), 0), max(weight[i].max(), 0)
+                if scheme == 'sym':
+                    max_range = max(abs(rmin), abs(rmax))
+                    expected_scale = max_range * 2 / 254 if max_range > 0 else 1
+                else:
+                    expected_scale = (rmax - rmin) / 255 if rmin != rmax else 1
+                self.assertAlmostEqual(scale[i], expected_scale, places=6)
+            if scheme == 'sym':
+                dequantized = q_weight.astype(np.float32) * scale.reshape(-1, 1, 1, 1)
+                np.testing.assert_allclose(dequantized, weight, atol=scale.max())
+
+    def test_weight_cache(self):
+        model = build_model()
+        q_config = {'conv1': self.q_config, 'conv2': self.q_config}
+        weight_cache = {}
+        quantizer = ONNXQuantizer(copy.deepcopy(model), q_config, self.integer_backend,
+            False, None, ['Conv'], weight_cache)
+        quantizer.quantize_model()
+        self.assertEqual(len(weight_cache), 2)
+        with patch('neural_compressor.adaptor.ox_utils.onnx_quantizer.quantize_data') \
+            as quantize_data:
+            cached = ONNXQuantizer(copy.deepcopy(model), q_config, self.integer_backend,
+                False, None, ['Conv'], weight_cache)
+            cached.quantize_model()
+            quantize_data.assert_not_called()
+        self.assertEqual(cached.model.model, quantizer.model.model)
+
+        # only the weight with new parameters is quantized again
+        q_config['conv2'] = copy.deepcopy(self.q_config)
+        q_config['conv2']['weight'].update({'dtype': 2, 'scheme': 'asym'})
+        ONNXQuantizer(copy.deepcopy(model), q_config, self.integer_backend,
+            False, None, ['Conv'], weight_cache).quantize_model()
+        self.assertEqual(len(weight_cache), 3)
+
     def test_matmul(self):
         A = helper.make_tensor_value_info('A', TensorProto.FLOAT, [1, 1, 5, 5])
         B = helper.make_tensor_value_info('B', TensorProto.FLOAT, [1, 1, 5, 1])
@@ -149,5 +149,39 @@ class TestQuantization(unittest.TestCase):
         tmp_val2 = testObject.calculate_loss(0.03, 2, testObject.loss_function_config)
         self.assertTrue(True if int(tmp_val2 - tmp_val) == 10 else False)
 
+    def test_tpe_sampler(self):
+        import pickle
+        from neural_compressor.contrib.strategy.tpe import TPESampler
+
+        space = {'a': 2, 'b': 3, 'c': 4}
+        sampler = TPESampler(space, n_initial_points=5, seed=9527)
+        # the loss is minimal at a=1, b=2, c=3
+        loss = lambda params: sum(abs(params[k] - space[k] + 1) for k in space)
+        for i in range(40):
+            # two proposals in flight, told in reverse order
+            first, second = sampler.ask(), sampler.ask()
+            for trial_id, params in [second, first]:
+                sampler.tell(trial_id, loss(params))
+        self.assertEqual(len(sampler), 80)
+        self.assertEqual(sampler.best(), (0, {'a': 1, 'b': 2, 'c': 3}))
+
+        # the incremental densities match the ones counted from the sorted trials
+        n_below = int(np.ceil(sampler.gamma * np.sqrt(len(sampler))))
+        below = [trial_id for _, trial_id in sampler._order[:n_below]]
+        self.assertEqual(set(below), sampler._below)
+        below_counts = np.zeros_like(sampler._below_counts)
+        for trial_id in below:
+            below_counts[sampler._trials[trial_id]] += 1
+        self.assertTrue((below_counts == sampler._below_counts).all())
+        self.assertEqual(sampler._above_counts.sum(), (len(sampler) - n_below) * len(space))
+
+        # the pending proposals are not saved in the checkpoint
+        trial_id, params = sampler.ask()
+        resumed = pickle.loads(pickle.dumps(sampler))
+        self.assertEqual(resumed._pending, {})
+        self.assertEqual(resumed._above_counts.sum(), sampler._above_counts.sum() - len(space))
+        resumed.observe(params, loss(params))
+        self.assertEqual(len(resumed), 81)
+
 if __name__ == "__main__":
     unittest.main()